@@ -0,0 +1,188 @@
+"""
+WebSocket del chat (ASGI puro, montado en mi_proyecto/asgi.py).
+
+El navegador abre una sola conexión por pestaña en CHAT_WEBSOCKET_PATH,
+autenticada con la cookie de sesión de Django. Por ella recibe los eventos
+de apps/chat/realtime.py y envía acciones JSON:
+
+- {"type": "send", "to": "<usuario>", "content": "..."}
+- {"type": "read", "with": "<usuario>"}
+- {"type": "typing", "to": "<usuario>"}
+- {"type": "ping"}
+
+Los errores vuelven como {"type": "error", "error": "..."}. Si el cliente
+no consume eventos a tiempo se cierra la conexión (código 4008) y el
+navegador se reconecta y vuelve a sincronizar por HTTP.
+"""
+import asyncio
+import json
+import logging
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+
+from .realtime import get_channel_layer, publish_typing, user_group
+from .services import ChatError, are_friends, mark_conversation_read, send_message
+
+logger = logging.getLogger(__name__)
+
+MAX_QUEUED_EVENTS = 100
+CLOSE_UNAUTHORIZED = 4001
+CLOSE_FORBIDDEN_ORIGIN = 4003
+CLOSE_TOO_SLOW = 4008
+
+
+def _db(fn):
+    """sync_to_async que además recicla conexiones viejas, como el handler HTTP."""
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=True)
+
+
+def _headers(scope) -> dict:
+    return {name.decode('latin-1'): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+
+def origin_allowed(scope) -> bool:
+    """
+    Evita que otra web abra el socket con la cookie del usuario: igual que
+    el chequeo CSRF, el Origin debe ser el mismo host o estar en CSRF_TRUSTED_ORIGINS.
+    """
+    headers = _headers(scope)
+    origin = headers.get('origin')
+    if not origin:
+        return True
+    if urlsplit(origin).netloc == headers.get('host'):
+        return True
+    return origin in getattr(settings, 'CSRF_TRUSTED_ORIGINS', [])
+
+
+@_db
+def _authenticate(scope):
+    cookies = parse_cookie(_headers(scope).get('cookie', ''))
+    request = HttpRequest()
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    user = get_user(request)
+    return user if user.is_authenticated else None
+
+
+@_db
+def _friend(user, username):
+    target = User.objects.filter(username=username, is_active=True).first()
+    if target is None or not are_friends(user, target):
+        raise ChatError('Solo puedes chatear con tus amigos.')
+    return target
+
+
+@_db
+def _send(user, target, content):
+    send_message(user, target, content)
+
+
+@_db
+def _mark_read(user, target):
+    mark_conversation_read(user, target)
+
+
+class ChatSocket:
+    """Aplicación ASGI de una conexión WebSocket de chat."""
+
+    async def __call__(self, scope, receive, send):
+        event = await receive()
+        if event['type'] != 'websocket.connect':
+            return
+        if not origin_allowed(scope):
+            await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN_ORIGIN})
+            return
+        user = await _authenticate(scope)
+        if user is None:
+            await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+            return
+        await send({'type': 'websocket.accept'})
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=MAX_QUEUED_EVENTS)
+
+        def enqueue(event):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Cliente demasiado lento: se descarta lo pendiente y se cierra.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+        layer = get_channel_layer()
+        group = user_group(user.pk)
+        token = layer.subscribe(group, lambda event: loop.call_soon_threadsafe(enqueue, event))
+        writer = asyncio.create_task(self._write(queue, send))
+        try:
+            await self._read(user, receive, enqueue, writer)
+        finally:
+            layer.unsubscribe(group, token)
+            writer.cancel()
+
+    async def _write(self, queue, send):
+        while True:
+            event = await queue.get()
+            if event is None:
+                await send({'type': 'websocket.close', 'code': CLOSE_TOO_SLOW})
+                return
+            await send({'type': 'websocket.send', 'text': json.dumps(event)})
+
+    async def _read(self, user, receive, enqueue, writer):
+        friends = {}
+        while not writer.done():
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                return
+            if event['type'] != 'websocket.receive':
+                continue
+            try:
+                action = json.loads(event.get('text') or '')
+            except ValueError:
+                continue
+            if not isinstance(action, dict):
+                continue
+            try:
+                await self._handle(user, action, friends, enqueue)
+            except ChatError as exc:
+                enqueue({'type': 'error', 'error': str(exc)})
+            except Exception:
+                logger.exception('Error procesando una acción de chat.')
+                enqueue({'type': 'error', 'error': 'No se pudo procesar la acción.'})
+
+    async def _handle(self, user, action, friends, enqueue):
+        kind = action.get('type')
+        if kind == 'ping':
+            enqueue({'type': 'pong'})
+            return
+        username = action.get('to') or action.get('with')
+        if kind not in ('send', 'read', 'typing') or not isinstance(username, str):
+            raise ChatError('Acción desconocida.')
+
+        # Los amigos ya verificados se recuerdan durante la conexión (typing llega seguido).
+        target = friends.get(username) if kind == 'typing' else None
+        if target is None:
+            target = await _friend(user, username)
+            friends[username] = target
+
+        if kind == 'send':
+            await _send(user, target, action.get('content'))
+        elif kind == 'read':
+            await _mark_read(user, target)
+        else:
+            # Con Redis, publicar es E/S de red: fuera del loop.
+            await sync_to_async(publish_typing, thread_sensitive=False)(user, target.pk)
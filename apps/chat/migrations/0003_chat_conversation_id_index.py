@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_chatmessage_idx_receiver_unread_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='idx_chat_conversation',
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['sender', 'receiver', 'id'], name='idx_chat_conversation_id'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_conversations(apps, schema_editor):
+    """Crea una Conversation por cada par con mensajes, con sus contadores."""
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+    Conversation = apps.get_model('chat', 'Conversation')
+
+    pairs = {}
+    rows = ChatMessage.objects.order_by().values('sender_id', 'receiver_id').annotate(
+        last_id=Max('id'),
+        unread=Count('id', filter=Q(is_read=False)),
+        read_up_to=Max('id', filter=Q(is_read=True)),
+    )
+    for row in rows:
+        user_a, user_b = sorted((row['sender_id'], row['receiver_id']))
+        state = pairs.setdefault((user_a, user_b), {
+            'last_id': 0, 'unread_a': 0, 'unread_b': 0, 'read_up_to_a': 0, 'read_up_to_b': 0,
+        })
+        side = 'a' if row['receiver_id'] == user_a else 'b'
+        state['last_id'] = max(state['last_id'], row['last_id'])
+        state[f'unread_{side}'] += row['unread']
+        state[f'read_up_to_{side}'] = max(state[f'read_up_to_{side}'], row['read_up_to'] or 0)
+
+    last_messages = ChatMessage.objects.in_bulk([state['last_id'] for state in pairs.values()])
+    conversations = []
+    for (user_a, user_b), state in pairs.items():
+        last = last_messages[state.pop('last_id')]
+        conversations.append(Conversation(
+            user_a_id=user_a,
+            user_b_id=user_b,
+            last_message=last,
+            last_sender_id=last.sender_id,
+            last_message_at=last.timestamp,
+            last_message_preview=last.content[:120],
+            **state,
+        ))
+    Conversation.objects.bulk_create(conversations, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_chat_conversation_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('last_message_preview', models.CharField(blank=True, max_length=120)),
+                ('unread_a', models.PositiveIntegerField(default=0, help_text='Mensajes de user_b que user_a no leyó')),
+                ('unread_b', models.PositiveIntegerField(default=0, help_text='Mensajes de user_a que user_b no leyó')),
+                ('read_up_to_a', models.PositiveBigIntegerField(default=0, help_text='Último mensaje leído por user_a')),
+                ('read_up_to_b', models.PositiveBigIntegerField(default=0, help_text='Último mensaje leído por user_b')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.chatmessage')),
+                ('last_sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conversación',
+                'verbose_name_plural': 'Conversaciones',
+                'indexes': [models.Index(fields=['user_a', '-last_message_at'], name='idx_conversation_a_recent'), models.Index(fields=['user_b', '-last_message_at'], name='idx_conversation_b_recent')],
+                'constraints': [models.UniqueConstraint(fields=('user_a', 'user_b'), name='uniq_conversation_pair')],
+            },
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -18,12 +18,72 @@ class ChatMessage(models.Model):
         ordering = ['timestamp']
         indexes = [
             models.Index(fields=['receiver', 'is_read'], name='idx_receiver_unread'),
-            models.Index(fields=['sender', 'receiver'], name='idx_chat_conversation'),
+            # Lecturas de una conversación por id (sync incremental): cada sentido
+            # de la conversación es un rango del índice.
+            models.Index(fields=['sender', 'receiver', 'id'], name='idx_chat_conversation_id'),
         ]
 
     def __str__(self):
         return f"De {self.sender.username} para {self.receiver.username} ({self.timestamp})"
 
+class Conversation(models.Model):
+    """
+    Estado de la conversación entre dos usuarios, mantenido al enviar y al
+    leer (apps/chat/services.py): último mensaje, vista previa y mensajes sin
+    leer de cada participante. Así la lista del inbox y los contadores no
+    recorren ChatMessage.
+
+    El par se guarda ordenado: user_a es siempre el de menor id.
+    """
+    PREVIEW_LENGTH = 120
+
+    user_a = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    user_b = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    last_message = models.ForeignKey(ChatMessage, null=True, blank=True, related_name='+', on_delete=models.SET_NULL)
+    last_sender = models.ForeignKey(User, null=True, blank=True, related_name='+', on_delete=models.SET_NULL)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    unread_a = models.PositiveIntegerField(default=0, help_text="Mensajes de user_b que user_a no leyó")
+    unread_b = models.PositiveIntegerField(default=0, help_text="Mensajes de user_a que user_b no leyó")
+    read_up_to_a = models.PositiveBigIntegerField(default=0, help_text="Último mensaje leído por user_a")
+    read_up_to_b = models.PositiveBigIntegerField(default=0, help_text="Último mensaje leído por user_b")
+
+    class Meta:
+        verbose_name = "Conversación"
+        verbose_name_plural = "Conversaciones"
+        constraints = [
+            models.UniqueConstraint(fields=['user_a', 'user_b'], name='uniq_conversation_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['user_a', '-last_message_at'], name='idx_conversation_a_recent'),
+            models.Index(fields=['user_b', '-last_message_at'], name='idx_conversation_b_recent'),
+        ]
+
+    def __str__(self):
+        return f"Conversación {self.user_a_id} - {self.user_b_id}"
+
+    @staticmethod
+    def ordered_pair(user_id: int, other_id: int) -> tuple[int, int]:
+        return (user_id, other_id) if user_id < other_id else (other_id, user_id)
+
+    @classmethod
+    def involving(cls, user):
+        return cls.objects.filter(models.Q(user_a=user) | models.Q(user_b=user))
+
+    def side(self, user_id: int) -> str:
+        """'a' o 'b' según qué participante es `user_id`."""
+        return 'a' if user_id == self.user_a_id else 'b'
+
+    def other_id(self, user_id: int) -> int:
+        return self.user_b_id if user_id == self.user_a_id else self.user_a_id
+
+    def unread_for(self, user_id: int) -> int:
+        return getattr(self, f'unread_{self.side(user_id)}')
+
+    def read_up_to_of(self, user_id: int) -> int:
+        return getattr(self, f'read_up_to_{self.side(user_id)}')
+
+
 class Perfil(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     avatar_base64 = models.TextField(blank=True, null=True)  # Guardaremos la imagen en Base64
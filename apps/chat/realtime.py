@@ -0,0 +1,179 @@
+"""
+Eventos del chat en tiempo real.
+
+Cada usuario tiene un grupo ("user:<id>") al que se suscriben sus
+conexiones abiertas: los WebSockets de apps/chat/consumers.py y las
+peticiones de long-polling de EventsLongPollAPIView. Los eventos son
+diccionarios JSON con un "type":
+
+- "message": mensaje nuevo (se envía a emisor y receptor).
+- "read": el receptor leyó los mensajes de una conversación.
+- "typing": el otro usuario está escribiendo.
+
+La capa de canales se elige con CHAT_CHANNEL_LAYER:
+
+- InMemoryChannelLayer (por defecto): reparte los eventos entre las
+  suscripciones del mismo proceso. Alcanza con un solo proceso ASGI.
+- RedisChannelLayer: además publica en Redis (pub/sub) para que lleguen
+  a los demás procesos; cada proceso reparte localmente lo que recibe.
+  Requiere el paquete `redis` y CHAT_REDIS_URL.
+
+`publish` se puede llamar desde código síncrono (vistas) o desde el loop
+de asyncio; los suscriptores reciben el evento en un callback que no debe
+bloquear (encolan y vuelven).
+"""
+import json
+import logging
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+except ImportError:  # opcional: solo para RedisChannelLayer
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+EVENT_MESSAGE = 'message'
+EVENT_READ = 'read'
+EVENT_TYPING = 'typing'
+
+
+def user_group(user_id: int) -> str:
+    return f'user:{user_id}'
+
+
+class InMemoryChannelLayer:
+    """Reparte eventos entre los suscriptores del proceso actual."""
+
+    def __init__(self):
+        self._groups = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def subscribe(self, group: str, callback) -> str:
+        """Registra `callback(event)` para `group`. Devuelve el token para desuscribirse."""
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._groups[group][token] = callback
+        return token
+
+    def unsubscribe(self, group: str, token: str) -> None:
+        with self._lock:
+            callbacks = self._groups.get(group)
+            if callbacks is not None:
+                callbacks.pop(token, None)
+                if not callbacks:
+                    del self._groups[group]
+
+    def publish(self, group: str, event: dict) -> None:
+        self._deliver(group, event)
+
+    def _deliver(self, group: str, event: dict) -> None:
+        with self._lock:
+            callbacks = list(self._groups.get(group, {}).values())
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception('Error entregando un evento de chat a %s.', group)
+
+
+class RedisChannelLayer(InMemoryChannelLayer):
+    """
+    Capa entre procesos: publica en Redis y un hilo por proceso escucha el
+    canal y reparte localmente. El emisor también recibe su propio evento
+    por Redis, así que no se entrega dos veces.
+    """
+
+    channel_prefix = 'sudaplay:chat:'
+
+    def __init__(self):
+        super().__init__()
+        if redis is None:
+            raise RuntimeError('RedisChannelLayer requiere el paquete "redis".')
+        self._client = redis.Redis.from_url(settings.CHAT_REDIS_URL)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def subscribe(self, group: str, callback) -> str:
+        self._ensure_listener()
+        return super().subscribe(group, callback)
+
+    def publish(self, group: str, event: dict) -> None:
+        try:
+            self._client.publish(self.channel_prefix + group, json.dumps(event))
+        except redis.RedisError:
+            logger.exception('No se pudo publicar en Redis; se entrega solo en este proceso.')
+            self._deliver(group, event)
+
+    def _ensure_listener(self) -> None:
+        with self._listener_lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name='chat-redis-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(self.channel_prefix + '*')
+        for item in pubsub.listen():
+            channel = item['channel'].decode() if isinstance(item['channel'], bytes) else item['channel']
+            try:
+                event = json.loads(item['data'])
+            except (TypeError, ValueError):
+                continue
+            self._deliver(channel[len(self.channel_prefix):], event)
+
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+def get_channel_layer():
+    global _layer
+    if _layer is None:
+        with _layer_lock:
+            if _layer is None:
+                _layer = import_string(
+                    getattr(settings, 'CHAT_CHANNEL_LAYER', 'apps.chat.realtime.InMemoryChannelLayer')
+                )()
+    return _layer
+
+
+def message_payload(msg) -> dict:
+    return {
+        'id': msg.id,
+        'sender': msg.sender.username,
+        'receiver': msg.receiver.username,
+        'content': msg.content,
+        'timestamp': msg.timestamp.isoformat(),
+        'is_read': msg.is_read,
+    }
+
+
+def publish_message(msg) -> None:
+    """Avisa del mensaje al receptor y a las demás pestañas del emisor."""
+    event = {'type': EVENT_MESSAGE, 'message': message_payload(msg)}
+    layer = get_channel_layer()
+    layer.publish(user_group(msg.receiver_id), event)
+    layer.publish(user_group(msg.sender_id), event)
+
+
+def publish_read(reader, sender_id: int, last_read_id: int) -> None:
+    """Confirmación de lectura: `reader` leyó hasta `last_read_id` los mensajes de `sender_id`."""
+    get_channel_layer().publish(user_group(sender_id), {
+        'type': EVENT_READ,
+        'reader': reader.username,
+        'last_read_id': last_read_id,
+    })
+
+
+def publish_typing(user, target_id: int) -> None:
+    get_channel_layer().publish(user_group(target_id), {
+        'type': EVENT_TYPING,
+        'sender': user.username,
+    })
@@ -0,0 +1,97 @@
+"""
+Operaciones del chat compartidas por la API HTTP, el WebSocket y el
+long-polling: enviar mensajes y marcar conversaciones como leídas.
+
+Cada operación actualiza en la misma transacción la fila Conversation del
+par (último mensaje, no leídos) y, una vez confirmada, publica el evento
+correspondiente en la capa de canales.
+"""
+from django.db import transaction
+from django.db.models import F, Max, Q, Value
+from django.db.models.functions import Greatest
+
+from apps.login.models import UserProfile
+
+from .models import ChatMessage, Conversation
+from .realtime import publish_message, publish_read
+from .signals import conversation_read
+
+MAX_MESSAGE_LENGTH = 1000
+
+
+class ChatError(Exception):
+    """Operación de chat no permitida; el mensaje se muestra al usuario."""
+
+
+def are_friends(user, target) -> bool:
+    return UserProfile.friends.through.objects.filter(
+        from_userprofile__user=user, to_userprofile__user=target,
+    ).exists()
+
+
+def send_message(sender, target, content: str) -> ChatMessage:
+    content = (content or '').strip()
+    if not content:
+        raise ChatError('El mensaje no puede estar vacío.')
+    if len(content) > MAX_MESSAGE_LENGTH:
+        raise ChatError(f'El mensaje no puede superar los {MAX_MESSAGE_LENGTH} caracteres.')
+    if not are_friends(sender, target):
+        raise ChatError('No puedes enviar mensajes a alguien que no es tu amigo.')
+
+    with transaction.atomic():
+        msg = ChatMessage.objects.create(sender=sender, receiver=target, content=content)
+        record_message(msg)
+    publish_message(msg)
+    return msg
+
+
+def conversation_between(user_id: int, other_id: int) -> Conversation | None:
+    user_a, user_b = Conversation.ordered_pair(user_id, other_id)
+    return Conversation.objects.filter(user_a_id=user_a, user_b_id=user_b).first()
+
+
+def record_message(msg: ChatMessage) -> None:
+    """Suma el no leído del receptor y, si es el más nuevo, deja `msg` como último mensaje."""
+    user_a, user_b = Conversation.ordered_pair(msg.sender_id, msg.receiver_id)
+    conversation, _ = Conversation.objects.get_or_create(user_a_id=user_a, user_b_id=user_b)
+    unread = f'unread_{conversation.side(msg.receiver_id)}'
+    rows = Conversation.objects.filter(pk=conversation.pk)
+    rows.update(**{unread: F(unread) + 1})
+    # Con envíos concurrentes no se pisa un último mensaje más nuevo.
+    rows.filter(Q(last_message__isnull=True) | Q(last_message_id__lt=msg.id)).update(
+        last_message=msg,
+        last_sender_id=msg.sender_id,
+        last_message_at=msg.timestamp,
+        last_message_preview=msg.content[:Conversation.PREVIEW_LENGTH],
+    )
+
+
+def mark_conversation_read(reader, sender, up_to_id: int | None = None) -> int:
+    """
+    Marca como leídos los mensajes de `sender` a `reader` y avisa al emisor.
+    Si el contador de la conversación dice que no hay no leídos no toca
+    ChatMessage; si ya se conoce el último no leído (`up_to_id`) se ahorra
+    buscarlo. Devuelve el id del último mensaje marcado, o 0 si no había.
+    """
+    conversation = conversation_between(reader.pk, sender.pk)
+    if conversation is None or (up_to_id is None and conversation.unread_for(reader.pk) == 0):
+        return 0
+
+    side = conversation.side(reader.pk)
+    unread_field, read_field = f'unread_{side}', f'read_up_to_{side}'
+    with transaction.atomic():
+        transaction.on_commit(lambda: conversation_read.send(
+            sender=Conversation, reader_id=reader.pk, sender_id=sender.pk,
+        ))
+        unread = ChatMessage.objects.filter(sender=sender, receiver=reader, is_read=False)
+        last_id = up_to_id or unread.aggregate(last=Max('id'))['last']
+        if last_id is None:
+            Conversation.objects.filter(pk=conversation.pk).update(**{unread_field: 0})
+            return 0
+        marked = unread.filter(id__lte=last_id).update(is_read=True)
+        Conversation.objects.filter(pk=conversation.pk).update(**{
+            unread_field: Greatest(F(unread_field) - Value(marked), Value(0)),
+            read_field: Greatest(F(read_field), Value(last_id)),
+        })
+    publish_read(reader, sender.pk, last_id)
+    return last_id
@@ -0,0 +1,6 @@
+"""Señales propias de la app chat."""
+from django.dispatch import Signal
+
+# `reader_id` leyó los mensajes que le envió `sender_id`. Se emite tras el commit
+# de mark_conversation_read, que actualiza con update() y no dispara post_save.
+conversation_read = Signal()
@@ -1,3 +1,92 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from apps.login.models import UserProfile
+
+from .services import mark_conversation_read, send_message
+from .views import GetMessagesAPIView
+
+
+class MessageSyncTests(TestCase):
+    """Sincronización de mensajes por cursores y ETag (GetMessagesAPIView)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create no dispara post_save: el perfil de chat.Perfil no hace falta aquí.
+        cls.ana, cls.beto = User.objects.bulk_create([User(username='ana'), User(username='beto')])
+        ana_profile, beto_profile = UserProfile.objects.bulk_create([
+            UserProfile(user=cls.ana), UserProfile(user=cls.beto),
+        ])
+        ana_profile.friends.add(beto_profile)
+
+    def setUp(self):
+        self.client.force_login(self.ana)
+        self.url = reverse('chat:api_get_messages', args=[self.beto.username])
+
+    def send(self, sender, receiver, *contents):
+        return [send_message(sender, receiver, content).pk for content in contents]
+
+    def fetch(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_after_id_returns_only_newer_messages(self):
+        first, second = self.send(self.beto, self.ana, 'uno', 'dos')
+        third, fourth = self.send(self.ana, self.beto, 'tres', 'cuatro')
+
+        data = self.fetch(after_id=second).json()
+        self.assertEqual([msg['id'] for msg in data['messages']], [third, fourth])
+        self.assertEqual(data['newest_id'], fourth)
+        self.assertFalse(data['has_more_after'])
+
+        data = self.fetch(after_id=fourth).json()
+        self.assertEqual((data['messages'], data['newest_id']), ([], fourth))
+
+    def test_after_id_pages_forward(self):
+        ids = self.send(self.beto, self.ana, 'uno', 'dos', 'tres')
+        with mock.patch.object(GetMessagesAPIView, 'page_size', 2):
+            data = self.fetch(after_id=0).json()
+        self.assertEqual([msg['id'] for msg in data['messages']], ids[:2])
+        self.assertTrue(data['has_more_after'])
+
+    def test_before_id_loads_history(self):
+        ids = self.send(self.beto, self.ana, 'uno', 'dos', 'tres', 'cuatro')
+        with mock.patch.object(GetMessagesAPIView, 'page_size', 2):
+            latest = self.fetch().json()
+            older = self.fetch(before_id=latest['oldest_id']).json()
+        self.assertEqual([msg['id'] for msg in latest['messages']], ids[2:])
+        self.assertTrue(latest['has_more_before'])
+        self.assertEqual([msg['id'] for msg in older['messages']], ids[:2])
+        self.assertFalse(older['has_more_before'])
+
+    def test_unchanged_conversation_answers_304(self):
+        self.send(self.beto, self.ana, 'hola')
+        etag = self.fetch()['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # Solo coinciden etiquetas exactas: una más larga que la contiene no es la misma.
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"1{etag[1:]}').status_code, 200)
+
+    def test_fetch_marks_incoming_as_read_in_body_and_etag(self):
+        self.send(self.beto, self.ana, 'hola')
+        response = self.fetch()
+        self.assertEqual([msg['is_read'] for msg in response.json()['messages']], [True])
+        # La respuesta refleja la lectura que hizo: el mismo ETag vale para la siguiente.
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_read_by_other_user_changes_etag(self):
+        self.send(self.ana, self.beto, 'hola')
+        response = self.fetch()
+        self.assertEqual([msg['is_read'] for msg in response.json()['messages']], [False])
+
+        mark_conversation_read(self.beto, self.ana)
 
-# Create your tests here.
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+        self.assertEqual([msg['is_read'] for msg in changed.json()['messages']], [True])
+        self.assertEqual(changed.json()['last_read_id'], changed.json()['newest_id'])
@@ -11,4 +11,5 @@ urlpatterns = [
     # APIs
     path('api/messages/<str:username>/', views.GetMessagesAPIView.as_view(), name='api_get_messages'),
     path('api/send/<str:username>/', views.SendMessageAPIView.as_view(), name='api_send_message'),
+    path('api/events/', views.ChatEventsAPIView.as_view(), name='api_events'),
 ]
@@ -1,41 +1,22 @@
 import json
-import base64
-import mimetypes
+import queue
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views import View
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import HttpResponseNotModified, JsonResponse
 from django.contrib.auth.models import User
 from django.contrib import messages
+from apps.login import avatars
 from apps.login.models import UserProfile
-from .models import ChatMessage
+from .models import ChatMessage, Conversation
+from .realtime import EVENT_MESSAGE, get_channel_layer, message_payload, user_group
+from .services import ChatError, conversation_between, mark_conversation_read, send_message
 from django.db import models
 
 
-def get_image_data_uri(image_field):
-    """Convierte el avatar en una cadena lista para incrustar en el HTML."""
-    if not image_field:
-        return None
-
-    try:
-        with image_field.open('rb') as avatar_file:
-            image_bytes = avatar_file.read()
-    except Exception:
-        return None
-
-    mime_type, _ = mimetypes.guess_type(image_field.name)
-    if not mime_type:
-        mime_type = 'image/png'
-
-    try:
-        encoded = base64.b64encode(image_bytes).decode('ascii')
-    except Exception:
-        return None
-
-    return f"data:{mime_type};base64,{encoded}"
-
-
 class ChatInboxView(View):
     """Renderiza la página del Inbox principal o un chat en específico usando el modelo WhatsApp."""
     @method_decorator(login_required(login_url='login:login'))
@@ -45,10 +26,24 @@ class ChatInboxView(View):
         except User.profile.RelatedObjectDoesNotExist:
             my_profile = UserProfile.objects.create(user=request.user)
             
-        friends = my_profile.friends.all().select_related('user')
+        friends = list(my_profile.friends.all().select_related('user'))
+        # Estado de cada conversación (una consulta indexada, sin recorrer mensajes).
+        conversations = {
+            conversation.other_id(request.user.pk): conversation
+            for conversation in Conversation.involving(request.user)
+        }
+        # Miniaturas cacheables por el navegador, resueltas en bloque con una consulta al manifiesto.
+        avatar_pictures = avatars.avatar_pictures(friends, size=64)
         for friend in friends:
-            # Guardamos el avatar como Base64 para que el template lo renderice sin más peticiones.
-            friend.avatar_base64 = get_image_data_uri(friend.avatar)
+            friend.avatar_picture = avatar_pictures[friend.pk]
+            friend.avatar_url = friend.avatar_picture['src']
+            conversation = conversations.get(friend.user_id)
+            friend.last_message_preview = conversation.last_message_preview if conversation else ''
+            friend.last_message_at = conversation.last_message_at if conversation else None
+            friend.last_message_mine = bool(conversation and conversation.last_sender_id == request.user.pk)
+            friend.unread_count = conversation.unread_for(request.user.pk) if conversation else 0
+        # Conversaciones más recientes primero; amigos sin mensajes al final.
+        friends.sort(key=lambda f: f.last_message_at.timestamp() if f.last_message_at else 0, reverse=True)
         
         target_user = None
         if username:
@@ -59,7 +54,7 @@ class ChatInboxView(View):
             except User.profile.RelatedObjectDoesNotExist:
                 target_profile = UserProfile.objects.create(user=target_user)
 
-            target_profile.avatar_base64 = get_image_data_uri(target_profile.avatar)
+            target_profile.avatar_url = avatars.avatar_url(target_profile, size=64)
             target_user.profile = target_profile
 
             # Verifica si son amigos para chatear, si no, redirige al inbox general con un mensaje de advertencia.
@@ -70,83 +65,178 @@ class ChatInboxView(View):
         context = {
             'friends': friends,
             'target_user': target_user,
+            'chat_websocket_path': settings.CHAT_WEBSOCKET_PATH,
         }
         return render(request, 'chat/inbox.html', context)
 
 
+def _messages_etag(last_id, my_read_id, their_read_id):
+    """Último mensaje y hasta dónde leyó cada lado: todo lo que cambia la respuesta."""
+    return f'"{last_id or 0}-{my_read_id or 0}-{their_read_id or 0}"'
+
+
+def _cursor_param(request, name):
+    value = request.GET.get(name)
+    if value is None:
+        return None
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return None
+
+
 class GetMessagesAPIView(View):
-    """API para obtener mensajes recientes con un usuario específico (para el polling HTTP)."""
+    """
+    Sincronización de una conversación por cursores de id:
+
+    - sin parámetros: la página más reciente;
+    - ?after_id=<id>: solo los mensajes posteriores (el delta);
+    - ?before_id=<id>: la página anterior, para cargar historial.
+
+    Las respuestas sin before_id llevan un ETag con el último mensaje y hasta
+    dónde leyó cada lado (de la fila Conversation): si no cambió nada se
+    responde 304 sin leer mensajes.
+    """
+    page_size = 50
+
     @method_decorator(login_required(login_url='login:login'))
     def get(self, request, username, *args, **kwargs):
         target_user = get_object_or_404(User, username=username)
-        
-        # Opcionalmente, podemos recibir un "last_timestamp" u offset,
-        # pero para simplicidad, mandaremos los ultimos 50 mensajes y dejaremos
-        # que el frontend decida qué es nuevo comparando IDs, o todo de golpe.
-        messages_qs = ChatMessage.objects.filter(
+        after_id = _cursor_param(request, 'after_id')
+        before_id = _cursor_param(request, 'before_id')
+        conversation = ChatMessage.objects.filter(
             models.Q(sender=request.user, receiver=target_user) |
             models.Q(sender=target_user, receiver=request.user)
-        ).select_related('sender', 'receiver').order_by('timestamp')[:100]
-
-        data = []
-        for msg in messages_qs:
-            data.append({
-                'id': msg.id,
-                'sender': msg.sender.username,
-                'content': msg.content,
-                'timestamp': msg.timestamp.isoformat(),
-                'is_read': msg.is_read
-            })
-
-        # Marcar los mensajes entrantes como leídos
-        ChatMessage.objects.filter(
-            sender=target_user, 
-            receiver=request.user, 
-            is_read=False
-        ).update(is_read=True)
-
-        return JsonResponse({'success': True, 'messages': data})
+        )
+
+        etag = None
+        last_read_id = None
+        if before_id is None:
+            # El estado sale de la fila Conversation: sin recorrer mensajes.
+            state = conversation_between(request.user.pk, target_user.pk)
+            last_id = state.last_message_id if state else 0
+            last_read_id = state.read_up_to_of(target_user.pk) if state else 0
+            my_read_id = state.read_up_to_of(request.user.pk) if state else 0
+            etag = _messages_etag(last_id, my_read_id, last_read_id)
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag in if_none_match or '*' in if_none_match:
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+        rows = conversation.select_related('sender', 'receiver')
+        if after_id is not None:
+            rows = list(rows.filter(id__gt=after_id).order_by('id')[:self.page_size + 1])
+            has_more = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+        else:
+            if before_id is not None:
+                rows = rows.filter(id__lt=before_id)
+            rows = list(rows.order_by('-id')[:self.page_size + 1])
+            has_more = len(rows) > self.page_size
+            rows = rows[:self.page_size][::-1]
+
+        # Marcar como leídos solo si en lo que se devuelve hay mensajes entrantes sin leer
+        # (los anteriores ya se marcaron al leer estos o quedan incluidos en el UPDATE).
+        unread_ids = [msg.id for msg in rows if msg.sender_id == target_user.pk and not msg.is_read]
+        if unread_ids:
+            read_up_to = mark_conversation_read(request.user, target_user, up_to_id=max(unread_ids))
+            # La respuesta muestra lo que quedó tras marcarlos, y su ETag también.
+            for msg in rows:
+                if msg.sender_id == target_user.pk and msg.id <= read_up_to:
+                    msg.is_read = True
+            if etag:
+                etag = _messages_etag(last_id, max(my_read_id, read_up_to), last_read_id)
+
+        response = JsonResponse({
+            'success': True,
+            'messages': [message_payload(msg) for msg in rows],
+            'oldest_id': rows[0].id if rows else before_id,
+            'newest_id': rows[-1].id if rows else after_id,
+            'has_more_before': has_more if after_id is None else None,
+            'has_more_after': has_more if after_id is not None else False,
+            'last_read_id': last_read_id,
+        })
+        if etag:
+            response['ETag'] = etag
+            # El navegador guarda la respuesta y la revalida con If-None-Match.
+            response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
 class SendMessageAPIView(View):
     """API para enviar un mensaje a otro usuario."""
     @method_decorator(login_required(login_url='login:login'))
     def post(self, request, username, *args, **kwargs):
+        target_user = get_object_or_404(User, username=username)
         try:
-            target_user = get_object_or_404(User, username=username)
-            try:
-                my_profile = request.user.profile
-            except User.profile.RelatedObjectDoesNotExist:
-                my_profile = UserProfile.objects.create(user=request.user)
-                
-            try:
-                target_profile = target_user.profile
-            except User.profile.RelatedObjectDoesNotExist:
-                target_profile = UserProfile.objects.create(user=target_user)
-
-            if not my_profile.friends.filter(id=target_profile.id).exists():
-                return JsonResponse({'success': False, 'error': 'No puedes enviar mensajes a alguien que no es tu amigo.'})
-
             data = json.loads(request.body)
-            content = data.get('content', '').strip()
-
-            if not content:
-                return JsonResponse({'success': False, 'error': 'El mensaje no puede estar vacío.'})
-
-            msg = ChatMessage.objects.create(
-                sender=request.user,
-                receiver=target_user,
-                content=content
-            )
-
-            return JsonResponse({
-                'success': True, 
-                'message': {
-                    'id': msg.id,
-                    'sender': msg.sender.username,
-                    'content': msg.content,
-                    'timestamp': msg.timestamp.isoformat()
-                }
-            })
-        except Exception as e:
+            msg = send_message(request.user, target_user, data.get('content', ''))
+        except ChatError as e:
             return JsonResponse({'success': False, 'error': str(e)})
+        except (ValueError, AttributeError):
+            return JsonResponse({'success': False, 'error': 'Solicitud inválida.'})
+
+        return JsonResponse({'success': True, 'message': message_payload(msg)})
+
+
+class ChatEventsAPIView(View):
+    """
+    Long-polling para navegadores sin WebSocket: ?after=<id del último mensaje visto>.
+
+    Si ya hay mensajes nuevos responde enseguida; si no, espera como mucho
+    CHAT_LONG_POLL_TIMEOUT segundos (pocos: la espera ocupa un worker WSGI) a
+    que llegue algún evento y, si no llegó ninguno, vuelve a consultar por
+    `after`. Así un mensaje enviado desde otro proceso, que la capa en memoria
+    no entrega aquí, aparece como mucho en el ciclo siguiente. Sin `after`
+    devuelve solo el cursor actual para empezar.
+    """
+    max_events = 100
+
+    def _new_messages(self, mine, after):
+        rows = (
+            ChatMessage.objects.filter(mine, id__gt=after)
+            .select_related('sender', 'receiver').order_by('id')[:self.max_events]
+        )
+        return [{'type': EVENT_MESSAGE, 'message': message_payload(msg)} for msg in rows]
+
+    @method_decorator(login_required(login_url='login:login'))
+    def get(self, request, *args, **kwargs):
+        try:
+            after = int(request.GET.get('after', 0))
+        except ValueError:
+            after = 0
+        mine = models.Q(sender=request.user) | models.Q(receiver=request.user)
+
+        if after <= 0:
+            last = ChatMessage.objects.filter(mine).aggregate(last=models.Max('id'))['last'] or 0
+            return JsonResponse({'events': [], 'cursor': last})
+
+        # Suscribirse antes de consultar: lo que llegue entre la consulta y la espera no se pierde.
+        events = queue.Queue(maxsize=self.max_events)
+
+        def offer(event):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+        layer = get_channel_layer()
+        group = user_group(request.user.pk)
+        token = layer.subscribe(group, offer)
+        try:
+            result = self._new_messages(mine, after)
+            if not result:
+                try:
+                    result = [events.get(timeout=getattr(settings, 'CHAT_LONG_POLL_TIMEOUT', 2))]
+                except queue.Empty:
+                    result = self._new_messages(mine, after)
+                while not events.empty():
+                    result.append(events.get_nowait())
+        finally:
+            layer.unsubscribe(group, token)
+
+        cursor = max(
+            [after] + [event['message']['id'] for event in result if event['type'] == EVENT_MESSAGE]
+        )
+        return JsonResponse({'events': result, 'cursor': cursor})
@@ -0,0 +1,255 @@
+"""
+Miniaturas de avatar (derivados) en AVIF, WebP y PNG.
+
+Cada avatar se identifica por el sha256 de su imagen original, que
+UserProfile guarda en `avatar_sha256`. De cada original se derivan
+miniaturas cuadradas, una por tamaño de AVATAR_THUMBNAIL_SIZES y formato
+de AVATAR_DERIVATIVE_FORMATS, guardadas en el storage por contenido:
+
+    avatars/thumbs/<aa>/<sha256 del original>-<tamaño>.<formato>
+
+Como el nombre depende solo del contenido, los usuarios con el mismo avatar
+comparten archivos, las URLs no cambian nunca y se sirven con caché de un
+año (en S3 el objeto lleva Cache-Control: immutable).
+
+Los derivados se generan de forma perezosa: el modelo AvatarDerivative es
+el manifiesto de los que ya existen. Al armar una página se consulta el
+manifiesto una vez para todos los avatares; los que están listos apuntan
+directo al storage y los que faltan a AvatarDerivativeView, que los genera
+en la primera petición, los anota y redirige. `prewarm_avatars` los genera
+por adelantado (catálogo y avatares subidos) en paralelo.
+
+Los perfiles sin hash todavía usan la imagen del catálogo de static/avatars.
+"""
+import hashlib
+import io
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import IntegrityError
+from django.templatetags.static import static
+from django.urls import reverse
+from PIL import Image, ImageOps, features
+
+from .models import AvatarDerivative, UserProfile
+
+try:
+    from storages.backends.s3boto3 import S3Boto3Storage
+except ImportError:  # sin django-storages (almacenamiento local)
+    S3Boto3Storage = None
+
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_AVATAR = 'sonriente.png'
+
+FALLBACK_FORMAT = 'png'
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'png': 'image/png',
+}
+# Parámetros de Pillow por formato: calidad visual suficiente para 64-128 px.
+SAVE_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 60, 'speed': 6},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'png': {'format': 'PNG', 'optimize': True},
+}
+
+
+def thumbnail_sizes() -> tuple[int, ...]:
+    return tuple(getattr(settings, 'AVATAR_THUMBNAIL_SIZES', (64, 128)))
+
+
+@lru_cache(maxsize=1)
+def derivative_formats() -> tuple[str, ...]:
+    """Formatos configurados que este Pillow sabe escribir, del preferido al de respaldo (PNG)."""
+    configured = getattr(settings, 'AVATAR_DERIVATIVE_FORMATS', ('avif', 'webp', 'png'))
+    formats = [fmt for fmt in configured if fmt in MIME_TYPES and (fmt == 'png' or features.check(fmt))]
+    if FALLBACK_FORMAT not in formats:
+        formats.append(FALLBACK_FORMAT)
+    return tuple(formats)
+
+
+def catalog_dir() -> Path:
+    return Path(settings.BASE_DIR) / 'static' / 'avatars'
+
+
+@lru_cache(maxsize=1)
+def catalog_names() -> frozenset[str]:
+    directory = catalog_dir()
+    if not directory.exists():
+        return frozenset()
+    return frozenset(avatar.name for avatar in directory.iterdir() if avatar.is_file())
+
+
+@lru_cache(maxsize=1)
+def catalog_digests() -> dict[str, str]:
+    """{sha256: nombre} de las imágenes del catálogo."""
+    return {digest_of((catalog_dir() / name).read_bytes()): name for name in catalog_names()}
+
+
+@lru_cache(maxsize=1)
+def thumbnail_storage():
+    """El storage por defecto; en S3, con Cache-Control de larga duración en cada objeto."""
+    storage = storages['default']
+    if S3Boto3Storage is not None and isinstance(storage, S3Boto3Storage):
+        return S3Boto3Storage(object_parameters={**storage.object_parameters, 'CacheControl': CACHE_CONTROL})
+    return storage
+
+
+def digest_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def derivative_name(digest: str, size: int, fmt: str) -> str:
+    return f'avatars/thumbs/{digest[:2]}/{digest}-{size}.{fmt}'
+
+
+def render_derivative(data: bytes, size: int, fmt: str) -> bytes:
+    """Recorta al centro y escala a size x size en el formato pedido, conservando la transparencia."""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        thumb = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        thumb.save(output, **SAVE_OPTIONS[fmt])
+        return output.getvalue()
+
+
+def store_derivative(digest: str, data: bytes, size: int, fmt: str) -> AvatarDerivative:
+    """
+    Genera y guarda un derivado de `data`. Devuelve la fila del manifiesto
+    sin guardarla: la vista la crea sola y `prewarm_avatars` en bloque.
+    """
+    storage = thumbnail_storage()
+    name = derivative_name(digest, size, fmt)
+    # FileSystemStorage renombra en vez de sobrescribir; con S3 (file_overwrite) se evita el HEAD.
+    if not getattr(storage, 'file_overwrite', False) and storage.exists(name):
+        length = storage.size(name)
+    else:
+        content = render_derivative(data, size, fmt)
+        storage.save(name, ContentFile(content))
+        length = len(content)
+    return AvatarDerivative(source_sha256=digest, size=size, format=fmt, name=name, bytes=length)
+
+
+def source_bytes(digest: str) -> bytes | None:
+    """La imagen original de `digest`: del catálogo si está ahí, si no la subida por algún perfil."""
+    catalog_name = catalog_digests().get(digest)
+    if catalog_name:
+        return (catalog_dir() / catalog_name).read_bytes()
+    profile = (
+        UserProfile.objects.filter(avatar_sha256=digest)
+        .exclude(avatar='').exclude(avatar__isnull=True)
+        .only('id', 'avatar').first()
+    )
+    if profile is None:
+        return None
+    with profile.avatar.open('rb') as avatar_file:
+        data = avatar_file.read()
+    return data if digest_of(data) == digest else None
+
+
+def ensure_derivative(digest: str, size: int, fmt: str) -> AvatarDerivative | None:
+    """El derivado pedido, generándolo si todavía no está en el manifiesto. None si no hay original."""
+    derivative = AvatarDerivative.objects.filter(source_sha256=digest, size=size, format=fmt).first()
+    if derivative is not None:
+        return derivative
+    data = source_bytes(digest)
+    if data is None:
+        return None
+    derivative = store_derivative(digest, data, size, fmt)
+    try:
+        derivative.save()
+    except IntegrityError:
+        # Otra petición lo generó a la vez: el archivo es el mismo.
+        derivative = AvatarDerivative.objects.get(source_sha256=digest, size=size, format=fmt)
+    return derivative
+
+
+def assign_avatar(profile, filename: str, data: bytes) -> None:
+    """Guarda `data` como avatar del perfil (sin guardar el perfil); sus miniaturas se generan al pedirlas."""
+    profile.avatar.save(filename, ContentFile(data), save=False)
+    profile.avatar_sha256 = digest_of(data)
+
+
+def _closest_size(size: int) -> int:
+    sizes = sorted(thumbnail_sizes())
+    return next((candidate for candidate in sizes if candidate >= size), sizes[-1])
+
+
+def _catalog_url(profile) -> str:
+    names = catalog_names()
+    avatar_name = Path(getattr(getattr(profile, 'avatar', None), 'name', '') or '').name
+    if avatar_name in names:
+        return static(f'avatars/{avatar_name}')
+    if DEFAULT_AVATAR in names:
+        return static(f'avatars/{DEFAULT_AVATAR}')
+    return static(f'avatars/{min(names)}') if names else ''
+
+
+def _manifest(digests) -> dict[tuple[str, int, str], str]:
+    """{(sha256, tamaño, formato): nombre} de los derivados ya generados, en una consulta."""
+    digests = set(digests)
+    if not digests:
+        return {}
+    rows = AvatarDerivative.objects.filter(source_sha256__in=digests).values_list(
+        'source_sha256', 'size', 'format', 'name'
+    )
+    return {(digest, size, fmt): name for digest, size, fmt, name in rows}
+
+
+def _derivative_url(manifest, digest: str, size: int, fmt: str) -> str:
+    name = manifest.get((digest, size, fmt))
+    if name:
+        return thumbnail_storage().url(name)
+    return reverse('login:avatar_derivative', args=[digest, size, fmt])
+
+
+def avatar_pictures(profiles, size: int = 64) -> dict:
+    """
+    Resuelve en bloque {pk del perfil: datos de un <picture>} con una sola
+    consulta al manifiesto. Cada valor tiene `src` (PNG) y `srcset` para el
+    <img>, `sources` (un srcset por formato moderno) y `size`.
+    """
+    profiles = [profile for profile in profiles if profile is not None]
+    manifest = _manifest(profile.avatar_sha256 for profile in profiles if profile.avatar_sha256)
+    sizes = (_closest_size(size), _closest_size(size * 2))
+    pictures = {}
+    for profile in profiles:
+        digest = profile.avatar_sha256
+        if not digest:
+            pictures[profile.pk] = {'src': _catalog_url(profile), 'srcset': '', 'sources': [], 'size': size}
+            continue
+        srcsets = {
+            fmt: ', '.join(
+                f'{_derivative_url(manifest, digest, candidate, fmt)} {density}x'
+                for density, candidate in enumerate(sizes, start=1)
+            )
+            for fmt in derivative_formats()
+        }
+        pictures[profile.pk] = {
+            'src': _derivative_url(manifest, digest, sizes[0], FALLBACK_FORMAT),
+            'srcset': srcsets[FALLBACK_FORMAT],
+            'sources': [
+                {'type': MIME_TYPES[fmt], 'srcset': srcsets[fmt]}
+                for fmt in derivative_formats() if fmt != FALLBACK_FORMAT
+            ],
+            'size': size,
+        }
+    return pictures
+
+
+def avatar_urls(profiles, size: int = 64) -> dict:
+    """{pk del perfil: URL del PNG}, para quien necesita una sola URL (JSON, JavaScript)."""
+    return {pk: picture['src'] for pk, picture in avatar_pictures(profiles, size).items()}
+
+
+def avatar_url(profile, size: int = 64) -> str:
+    """URL del PNG del avatar de `profile` (o None) en el tamaño de miniatura más cercano."""
+    if profile is None:
+        return _catalog_url(None)
+    return avatar_urls([profile], size)[profile.pk]
@@ -0,0 +1,17 @@
+"""
+Cachés por usuario de la app login (ver apps/web/caching.py).
+
+El ámbito de ambas es el id del usuario. Las señales de apps/login/signals.py
+las invalidan cuando cambian los datos de los que salen (perfil, solicitudes
+de amistad, mensajes de chat), así que pueden durar horas:
+`NAVBAR_PROFILE.invalidate(user_id)` descarta solo los datos de ese usuario,
+en todos los procesos.
+"""
+from django.conf import settings
+
+from apps.web.caching import CacheNamespace
+
+# Avatar, bio y porcentaje de perfil completo del navbar (context_processors.navbar_profile).
+NAVBAR_PROFILE = CacheNamespace('navbar_profile', timeout=getattr(settings, 'NAVBAR_PROFILE_CACHE_TTL', 6 * 3600))
+# Dropdown de notificaciones (NotificationsAPIView).
+NOTIFICATIONS = CacheNamespace('notifications', timeout=getattr(settings, 'NOTIFICATIONS_CACHE_TTL', 3600))
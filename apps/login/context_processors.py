@@ -1,9 +1,9 @@
 from pathlib import Path
 
 from django.conf import settings
-from django.core.cache import cache
 from django.templatetags.static import static
 
+from .caches import NAVBAR_PROFILE
 from .models import UserProfile
 
 _AVATAR_CACHE = None
@@ -78,26 +78,22 @@ def navbar_profile(request):
             'sudaplay_logo_url': static('img/SudaPlay.png'),
         }
 
-    cache_key = f'navbar_profile_{request.user.id}'
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+    user = request.user
+    return NAVBAR_PROFILE.get_or_compute(user.id, lambda: _navbar_profile_data(user))
 
+
+def _navbar_profile_data(user):
     # Una sola query con select_related para evitar queries adicionales
-    profile = UserProfile.objects.filter(user=request.user).first()
+    profile = UserProfile.objects.filter(user=user).first()
 
     avatar_url = _resolve_avatar(profile)
     profile_bio = profile.bio or '' if profile else ''
-    completion = _calculate_completion(request.user, profile) if profile else 0
+    completion = _calculate_completion(user, profile) if profile else 0
 
-    result = {
+    return {
         'navbar_avatar_url': avatar_url,
         'navbar_profile_completion': completion,
         'navbar_profile_bio': profile_bio,
         'navbar_avatar_variants': _avatar_variants(),
         'sudaplay_logo_url': static('img/SudaPlay.png'),
     }
-    # Cachear por 30 segundos para evitar queries repetidas en cada request
-    cache.set(cache_key, result, timeout=30)
-    return result
-
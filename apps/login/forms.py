@@ -10,8 +10,8 @@ from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.core.files.base import ContentFile
 
+from .avatars import assign_avatar
 from .models import UserProfile
 
 
@@ -184,7 +184,7 @@ class ProfileUpdateForm(forms.ModelForm):
                 current_avatar_name = Path(getattr(profile.avatar, 'name', '')).name
                 if current_avatar_name != avatar_choice:
                     with avatar_path.open('rb') as avatar_file:
-                        profile.avatar.save(avatar_choice, ContentFile(avatar_file.read()), save=False)
+                        assign_avatar(profile, avatar_choice, avatar_file.read())
         else:
             current_avatar_name = Path(getattr(profile.avatar, 'name', '')).name
             if current_avatar_name and current_avatar_name not in self.available_avatars:
@@ -195,9 +195,10 @@ class ProfileUpdateForm(forms.ModelForm):
                     fallback_path = Path(settings.BASE_DIR) / 'static' / 'avatars' / fallback
                     if fallback_path.exists():
                         with fallback_path.open('rb') as avatar_file:
-                            profile.avatar.save(fallback, ContentFile(avatar_file.read()), save=False)
+                            assign_avatar(profile, fallback, avatar_file.read())
                 else:
                     profile.avatar = None
+                    profile.avatar_sha256 = ''
 
         profile.bio = self.cleaned_data.get('bio', '').strip()
         profile.save()
@@ -0,0 +1,98 @@
+import base64
+import mimetypes
+import time
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from apps.chat.views import ChatInboxView
+from apps.login.avatars import catalog_dir, catalog_names, digest_of
+from apps.login.models import UserProfile
+
+
+def _legacy_data_uri(image_field):
+    """Lo que hacía el inbox antes: leer el avatar del storage e incrustarlo en base64."""
+    with image_field.open('rb') as avatar_file:
+        image_bytes = avatar_file.read()
+    mime_type = mimetypes.guess_type(image_field.name)[0] or 'image/png'
+    return f"data:{mime_type};base64,{base64.b64encode(image_bytes).decode('ascii')}"
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compara el render del inbox con avatares en base64 (antes) y con miniaturas (después)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--friends', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        names = sorted(catalog_names())
+        if not names:
+            self.stderr.write('No hay avatares en static/avatars.')
+            return
+        # Una copia de cada avatar del catálogo en el storage, como las que deja el formulario de perfil.
+        uploaded = {
+            name: default_storage.save(f'avatars/bench-{name}', ContentFile((catalog_dir() / name).read_bytes()))
+            for name in names
+        }
+        try:
+            with transaction.atomic():
+                viewer = self._populate(options['friends'], names, uploaded)
+                self._run(viewer, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            for stored in uploaded.values():
+                default_storage.delete(stored)
+
+    def _populate(self, count, names, uploaded):
+        viewer = User.objects.create(username='__benchmark_inbox__')
+        me = UserProfile.objects.get_or_create(user=viewer)[0]
+        digests = {name: digest_of((catalog_dir() / name).read_bytes()) for name in names}
+        friends = User.objects.bulk_create([User(username=f'__bench_friend_{i}__') for i in range(count)])
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(user=user, avatar=uploaded[names[i % len(names)]], avatar_sha256=digests[names[i % len(names)]])
+            for i, user in enumerate(friends)
+        ])
+        me.friends.add(*profiles)
+        return viewer
+
+    def _run(self, viewer, repeat):
+        request = RequestFactory().get('/chat/')
+        request.user = viewer
+        view = ChatInboxView.as_view()
+
+        legacy_times, legacy_bytes = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            profiles = list(viewer.profile.friends.all())
+            # Cada data URI se repetía en el <img> y en el onclick de la tarjeta.
+            legacy_bytes = sum(2 * len(_legacy_data_uri(profile.avatar)) for profile in profiles)
+            legacy_times.append(time.perf_counter() - started)
+
+        times, size = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = view(request)
+            times.append(time.perf_counter() - started)
+            size = len(response.content)
+
+        friends = viewer.profile.friends.count()
+        self.stdout.write(f'Inbox con {friends} amigos ({repeat} repeticiones, mejor tiempo)')
+        self.stdout.write(
+            f'  antes (base64):    solo avatares {min(legacy_times) * 1000:8.1f} ms, '
+            f'{legacy_bytes / 1024:9.0f} KB de avatares en el HTML'
+        )
+        self.stdout.write(
+            f'  después (miniaturas): render completo {min(times) * 1000:8.1f} ms, '
+            f'{size / 1024:9.0f} KB de HTML; imágenes cacheadas por el navegador'
+        )
@@ -0,0 +1,71 @@
+import random
+import statistics
+import string
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.login.players import autocomplete_players, search_players
+
+SYLLABLES = ['ka', 'ro', 'mi', 'to', 'zu', 'pla', 'gamer', 'neo', 'dark', 'suda', 'pixel', 'lu', 'xx', 'pro', 'san']
+QUERIES = ['k', 'da', 'pix', 'gamer', 'suda_', 'xyz', 'plamito', 'er12']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de la búsqueda y el autocompletado de jugadores con usuarios sintéticos (se descartan al terminar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000, help='Usuarios sintéticos a generar.')
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por consulta.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Motor: {connection.vendor}")
+        try:
+            with transaction.atomic():
+                viewer = self._populate(options['users'])
+                self._run(viewer, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Datos sintéticos descartados.')
+
+    def _populate(self, count):
+        rng = random.Random(7)
+        started = time.perf_counter()
+        viewer = User.objects.create(username='__benchmark_viewer__')
+        batch = []
+        for i in range(count):
+            name = ''.join(rng.choices(SYLLABLES, k=rng.randint(1, 3)))
+            suffix = ''.join(rng.choices(string.digits + '_', k=3))
+            # bulk_create no dispara señales: no se crean perfiles, como usuarios sin avatar.
+            batch.append(User(username=f"{name}{suffix}{i}", password='!'))
+            if len(batch) == 10_000:
+                User.objects.bulk_create(batch)
+                batch = []
+        User.objects.bulk_create(batch)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE auth_user')
+        self.stdout.write(f"{count} usuarios generados en {time.perf_counter() - started:.1f}s\n")
+        return viewer
+
+    def _time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+    def _run(self, viewer, repeat):
+        self.stdout.write(f"{'consulta':<12}{'buscar p50':>12}{'p95 ms':>10}{'autocompl. p50':>16}{'p95 ms':>10}")
+        for query in QUERIES:
+            search = self._time(lambda: search_players(query, viewer), repeat)
+            suggest = self._time(lambda: autocomplete_players(query, viewer), repeat)
+            self.stdout.write(f"{query:<12}{search[0]:>12.1f}{search[1]:>10.1f}{suggest[0]:>16.1f}{suggest[1]:>10.1f}")
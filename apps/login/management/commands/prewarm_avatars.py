@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.login import avatars
+from apps.login.models import AvatarDerivative, UserProfile
+
+
+def _read_upload(name):
+    with default_storage.open(name, 'rb') as avatar_file:
+        return avatar_file.read()
+
+
+def _read_catalog(name):
+    return (avatars.catalog_dir() / name).read_bytes()
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera por adelantado las miniaturas de avatar (catálogo y avatares subidos) '
+        'que todavía no están en el manifiesto, y completa el hash de los perfiles que no lo tienen'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Hilos para leer, redimensionar y subir')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--skip-catalog', action='store_true', help='Solo avatares de perfiles')
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            self._backfill_digests(pool, options['batch_size'])
+            sources = self._sources(options['skip_catalog'])
+            created = self._prewarm(pool, sources, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(sources)} avatares revisados; {created} miniaturas generadas.'
+        ))
+
+    def _load(self, name):
+        """Bytes del avatar `name` del storage; los del catálogo se leen de static, sin descargarlos."""
+        basename = Path(name).name
+        if basename in avatars.catalog_names():
+            return _read_catalog(basename)
+        return _read_upload(name)
+
+    def _backfill_digests(self, pool, batch_size):
+        """Calcula avatar_sha256 de los perfiles que no lo tienen, leyendo cada imagen una vez."""
+        profiles = list(
+            UserProfile.objects.filter(avatar_sha256='')
+            .exclude(avatar='').exclude(avatar__isnull=True)
+            .only('id', 'avatar')
+        )
+        if not profiles:
+            return
+        names = {profile.avatar.name for profile in profiles}
+        futures = {pool.submit(self._load, name): name for name in names}
+        digests = {}
+        for future in as_completed(futures):
+            try:
+                digests[futures[future]] = avatars.digest_of(future.result())
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f'No se pudo leer {futures[future]}: {exc}')
+
+        pending = []
+        for profile in profiles:
+            if profile.avatar.name in digests:
+                profile.avatar_sha256 = digests[profile.avatar.name]
+                pending.append(profile)
+        UserProfile.objects.bulk_update(pending, ['avatar_sha256'], batch_size=batch_size)
+        self.stdout.write(f'{len(pending)} perfiles con hash nuevo ({len(digests)} imágenes distintas).')
+
+    def _sources(self, skip_catalog):
+        """{sha256: función que devuelve los bytes del original}."""
+        sources = {}
+        if not skip_catalog:
+            for digest, name in avatars.catalog_digests().items():
+                sources[digest] = lambda name=name: _read_catalog(name)
+        uploads = (
+            UserProfile.objects.exclude(avatar_sha256='')
+            .exclude(avatar='').exclude(avatar__isnull=True)
+            .order_by()
+            .values_list('avatar_sha256', 'avatar')
+            .distinct()
+        )
+        for digest, name in uploads:
+            sources.setdefault(digest, lambda name=name: self._load(name))
+        return sources
+
+    def _prewarm(self, pool, sources, batch_size):
+        existing = set(
+            AvatarDerivative.objects.filter(source_sha256__in=list(sources))
+            .values_list('source_sha256', 'size', 'format')
+        )
+        wanted = [(size, fmt) for size in avatars.thumbnail_sizes() for fmt in avatars.derivative_formats()]
+        futures = {}
+        for digest, load in sources.items():
+            missing = [(size, fmt) for size, fmt in wanted if (digest, size, fmt) not in existing]
+            if missing:
+                futures[pool.submit(self._render, digest, load, missing)] = digest
+
+        # Los hilos solo leen, redimensionan y suben; el manifiesto se escribe desde aquí.
+        created = 0
+        pending = []
+        for future in as_completed(futures):
+            try:
+                pending.extend(future.result())
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f'No se pudo procesar {futures[future][:12]}: {exc}')
+                continue
+            if len(pending) >= batch_size:
+                created += len(AvatarDerivative.objects.bulk_create(pending, ignore_conflicts=True))
+                pending = []
+        if pending:
+            created += len(AvatarDerivative.objects.bulk_create(pending, ignore_conflicts=True))
+        return created
+
+    @staticmethod
+    def _render(digest, load, missing):
+        data = load()
+        if avatars.digest_of(data) != digest:
+            raise ValueError('el archivo cambió desde que se calculó su hash')
+        return [avatars.store_derivative(digest, data, size, fmt) for size, fmt in missing]
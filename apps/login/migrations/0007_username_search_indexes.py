@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:05
+
+from django.db import migrations
+
+# Índices de expresión sobre auth_user para apps/login/players.py. La expresión
+# UPPER(username::text) es la que usan los lookups istartswith/icontains en PostgreSQL.
+SEARCH_SETUP_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_user_username_prefix ON auth_user (UPPER(username::text) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_user_username_trgm ON auth_user USING gin (UPPER(username::text) gin_trgm_ops)",
+]
+
+SEARCH_TEARDOWN_SQL = [
+    "DROP INDEX IF EXISTS idx_user_username_trgm",
+    "DROP INDEX IF EXISTS idx_user_username_prefix",
+]
+
+
+def setup_search(apps, schema_editor):
+    # Solo PostgreSQL; en SQLite la búsqueda funciona igual, sin índice.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in SEARCH_SETUP_SQL:
+        schema_editor.execute(statement)
+
+
+def teardown_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in SEARCH_TEARDOWN_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('login', '0006_avatar_nullable'),
+    ]
+
+    operations = [
+        migrations.RunPython(setup_search, teardown_search),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('login', '0007_username_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_sha256',
+            field=models.CharField(blank=True, editable=False, help_text='Hash del avatar; nombra sus miniaturas (ver apps/login/avatars.py)', max_length=64),
+        ),
+    ]
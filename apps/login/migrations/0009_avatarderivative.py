@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('login', '0008_userprofile_avatar_sha256'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvatarDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_sha256', models.CharField(help_text='Hash del avatar original', max_length=64)),
+                ('size', models.PositiveSmallIntegerField(help_text='Lado en píxeles')),
+                ('format', models.CharField(choices=[('avif', 'AVIF'), ('webp', 'WebP'), ('png', 'PNG')], max_length=4)),
+                ('name', models.CharField(help_text='Ruta del archivo en el storage', max_length=255)),
+                ('bytes', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Miniatura de Avatar',
+                'verbose_name_plural': 'Miniaturas de Avatares',
+                'constraints': [models.UniqueConstraint(fields=('source_sha256', 'size', 'format'), name='uniq_avatar_derivative')],
+            },
+        ),
+    ]
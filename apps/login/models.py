@@ -21,6 +21,10 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True, help_text="Biografía del usuario")
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, help_text="Foto de perfil")
+    avatar_sha256 = models.CharField(
+        max_length=64, blank=True, editable=False,
+        help_text="Hash del avatar; nombra sus miniaturas (ver apps/login/avatars.py)",
+    )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
     is_verified = models.BooleanField(default=False, help_text="¿Email verificado?")
     phone = models.CharField(max_length=20, blank=True)
@@ -60,3 +64,32 @@ class FriendRequest(models.Model):
 
     def __str__(self):
         return f"{self.from_user.username} -> {self.to_user.username}"
+
+
+class AvatarDerivative(models.Model):
+    """
+    Manifiesto de las miniaturas generadas de cada avatar (ver apps/login/avatars.py).
+    Una fila por (hash del original, tamaño, formato) ya guardada en el storage.
+    """
+    FORMAT_CHOICES = [
+        ('avif', 'AVIF'),
+        ('webp', 'WebP'),
+        ('png', 'PNG'),
+    ]
+
+    source_sha256 = models.CharField(max_length=64, help_text="Hash del avatar original")
+    size = models.PositiveSmallIntegerField(help_text="Lado en píxeles")
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    name = models.CharField(max_length=255, help_text="Ruta del archivo en el storage")
+    bytes = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Miniatura de Avatar"
+        verbose_name_plural = "Miniaturas de Avatares"
+        constraints = [
+            models.UniqueConstraint(fields=['source_sha256', 'size', 'format'], name='uniq_avatar_derivative'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_sha256[:12]} {self.size}px {self.format}"
@@ -0,0 +1,124 @@
+"""
+Búsqueda de jugadores y autocompletado por nombre de usuario.
+
+En PostgreSQL la migración login 0007 crea sobre auth_user dos índices de
+expresión sobre UPPER(username::text), que es exactamente lo que generan
+los lookups `istartswith` / `icontains` de Django:
+
+- idx_user_username_prefix (btree, text_pattern_ops): prefijos, usado por
+  el autocompletado y por las búsquedas de menos de 3 caracteres.
+- idx_user_username_trgm (GIN, gin_trgm_ops): subcadenas de 3 o más
+  caracteres, para la búsqueda completa.
+
+Los resultados van siempre acotados (sin COUNT(*) ni listas sin límite):
+primero los que empiezan con el texto buscado, luego los más cortos.
+En SQLite los mismos lookups funcionan sin índice.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+
+from .models import FriendRequest, UserProfile
+
+MIN_TRIGRAM_LENGTH = 3
+MAX_QUERY_LENGTH = 150
+
+STATUS_NONE = 'none'
+STATUS_FRIENDS = 'friends'
+STATUS_PENDING_SENT = 'pending_sent'
+STATUS_PENDING_RECEIVED = 'pending_received'
+
+
+def page_size() -> int:
+    return getattr(settings, 'PLAYER_SEARCH_PAGE_SIZE', 20)
+
+
+def max_page() -> int:
+    return getattr(settings, 'PLAYER_SEARCH_MAX_PAGE', 10)
+
+
+def autocomplete_limit() -> int:
+    return getattr(settings, 'PLAYER_AUTOCOMPLETE_LIMIT', 8)
+
+
+def normalize_query(query: str | None) -> str:
+    return (query or '').strip()[:MAX_QUERY_LENGTH]
+
+
+def _players(viewer):
+    return (
+        User.objects
+        .filter(is_active=True)
+        .exclude(pk=viewer.pk)
+        .select_related('profile')
+        .only('id', 'username', 'profile__avatar', 'profile__avatar_sha256', 'profile__bio')
+    )
+
+
+def search_players(query: str, viewer, page: int = 1) -> tuple[list[User], bool]:
+    """
+    Página `page` de jugadores cuyo nombre contiene `query`.
+    Devuelve (usuarios, hay_siguiente).
+    """
+    query = normalize_query(query)
+    if not query:
+        return [], False
+
+    if len(query) >= MIN_TRIGRAM_LENGTH:
+        qs = _players(viewer).filter(username__icontains=query).annotate(
+            prefix_rank=Case(
+                When(username__istartswith=query, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        ).order_by('prefix_rank', Length('username'), 'username')
+    else:
+        # Con 1-2 caracteres los trigramas no filtran nada: solo prefijos.
+        qs = _players(viewer).filter(username__istartswith=query).order_by(Length('username'), 'username')
+
+    size = page_size()
+    offset = (page - 1) * size
+    users = list(qs[offset:offset + size + 1])
+    return users[:size], len(users) > size
+
+
+def autocomplete_players(query: str, viewer) -> list[User]:
+    """Sugerencias por prefijo del nombre de usuario (mientras se escribe)."""
+    query = normalize_query(query)
+    if not query:
+        return []
+    qs = _players(viewer).filter(username__istartswith=query).order_by(Length('username'), 'username')
+    return list(qs[:autocomplete_limit()])
+
+
+def friendship_statuses(viewer, user_ids) -> dict[int, str]:
+    """
+    Estado de amistad de `viewer` con cada usuario de `user_ids`, resuelto con
+    una sola consulta (UNION de las solicitudes pendientes en ambos sentidos
+    y de las amistades).
+    """
+    user_ids = list(user_ids)
+    statuses = dict.fromkeys(user_ids, STATUS_NONE)
+    if not user_ids:
+        return statuses
+
+    requests = FriendRequest.objects.filter(
+        Q(from_user=viewer, to_user_id__in=user_ids) | Q(to_user=viewer, from_user_id__in=user_ids)
+    ).annotate(is_friend=Value(0)).values_list('from_user_id', 'to_user_id', 'is_friend')
+    friends = UserProfile.friends.through.objects.filter(
+        from_userprofile__user=viewer,
+        to_userprofile__user_id__in=user_ids,
+    ).annotate(
+        from_id=F('from_userprofile__user_id'), to_id=F('to_userprofile__user_id'), is_friend=Value(1),
+    ).values_list('from_id', 'to_id', 'is_friend')
+
+    # Las amistades se aplican al final: pisan cualquier solicitud vieja.
+    for from_id, to_id, is_friend in sorted(requests.union(friends, all=True), key=lambda row: row[2]):
+        if is_friend:
+            statuses[to_id] = STATUS_FRIENDS
+        elif from_id == viewer.pk:
+            statuses[to_id] = STATUS_PENDING_SENT
+        else:
+            statuses[from_id] = STATUS_PENDING_RECEIVED
+    return statuses
@@ -1,9 +1,87 @@
 """Senales especificas de la app login."""
+from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from apps.chat.models import ChatMessage
+from apps.chat.signals import conversation_read
+
+from .caches import NAVBAR_PROFILE, NOTIFICATIONS
+from .models import FriendRequest, UserProfile
+
 
 @receiver(user_logged_in)
 def ensure_post_login_welcome_flag(sender, request, user, **kwargs):
     """Asegura que cualquier login deje la bandera para la bienvenida."""
     request.session["show_post_login_welcome"] = True
+
+
+# Las invalidaciones esperan al commit: si se hicieran antes, otra petición
+# podría volver a cachear los datos viejos con la versión nueva.
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_navbar_on_profile_change(sender, instance, **kwargs):
+    """Avatar, bio y datos del porcentaje de perfil completo."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: NAVBAR_PROFILE.invalidate(user_id))
+
+
+@receiver(post_save, sender=User)
+def invalidate_navbar_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    """El correo cuenta para el porcentaje de perfil completo; el login solo toca last_login."""
+    if created or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: NAVBAR_PROFILE.invalidate(user_id))
+
+
+def _invalidate_notifications(user_ids):
+    user_ids = set(user_ids)
+
+    def invalidate():
+        for user_id in user_ids:
+            NOTIFICATIONS.invalidate(user_id)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=FriendRequest)
+@receiver(post_delete, sender=FriendRequest)
+def invalidate_notifications_on_friend_request(sender, instance, **kwargs):
+    """Solicitud enviada, aceptada, rechazada o cancelada: cambia para los dos usuarios."""
+    _invalidate_notifications([instance.from_user_id, instance.to_user_id])
+
+
+@receiver(m2m_changed, sender=UserProfile.friends.through)
+def invalidate_notifications_on_friendship(sender, instance, action, pk_set, **kwargs):
+    """
+    Amistad agregada o quitada. `friends` es simétrico entre perfiles: se
+    invalida el dueño de `instance` y los usuarios de los perfiles de
+    `pk_set`. El navbar no muestra amigos, así que NAVBAR_PROFILE no cambia.
+    """
+    if action == 'pre_clear':
+        # Después del clear ya no se sabe quiénes eran los amigos.
+        pk_set = set(instance.friends.values_list('pk', flat=True))
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if not pk_set:
+        return
+    user_ids = list(UserProfile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+    _invalidate_notifications([instance.user_id, *user_ids])
+
+
+@receiver(post_save, sender=ChatMessage)
+@receiver(post_delete, sender=ChatMessage)
+def invalidate_notifications_on_message(sender, instance, **kwargs):
+    """Mensaje nuevo (o borrado): cambian los no leídos de quien lo recibe."""
+    user_id = instance.receiver_id
+    transaction.on_commit(lambda: NOTIFICATIONS.invalidate(user_id))
+
+
+@receiver(conversation_read)
+def invalidate_notifications_on_read(sender, reader_id, **kwargs):
+    """Conversación leída: sus mensajes dejan de figurar como nuevos."""
+    NOTIFICATIONS.invalidate(reader_id)
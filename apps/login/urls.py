@@ -19,6 +19,9 @@ urlpatterns = [
     
     # Friend System & Player Search
     path('jugadores/buscar/', views.SearchPlayersView.as_view(), name='search_players'),
+    path('api/jugadores/buscar/', views.PlayerSearchAPIView.as_view(), name='player_search_api'),
+    path('api/jugadores/autocompletar/', views.PlayerAutocompleteAPIView.as_view(), name='player_autocomplete_api'),
+    path('avatares/<str:digest>/<int:size>.<str:fmt>', views.AvatarDerivativeView.as_view(), name='avatar_derivative'),
     path('jugador/<str:username>/', views.PlayerProfileView.as_view(), name='player_profile'),
     path('amigos/solicitar/', views.SendFriendRequestAPIView.as_view(), name='send_friend_request'),
     path('amigos/aceptar/', views.AcceptFriendRequestAPIView.as_view(), name='accept_friend_request'),
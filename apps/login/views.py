@@ -12,7 +12,6 @@ from pathlib import Path
 
 import requests
 from django.conf import settings
-from django.core.cache import cache
 from django.shortcuts import redirect
 from django.views import View
 from django.views.generic import FormView
@@ -23,15 +22,18 @@ from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.contrib import messages
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.http import JsonResponse
+from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.templatetags.static import static
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
 from django.utils.decorators import method_decorator
 from django.db.models import Count, Case, When, IntegerField, Q
 
+from . import avatars, players
+from .caches import NOTIFICATIONS
 from .forms import RegisterForm, ProfileUpdateForm
 from .models import UserProfile, FriendRequest
-from apps.chat.models import ChatMessage
+from apps.chat.models import Conversation
 
 
 def _available_avatar_names():
@@ -337,14 +339,13 @@ class NotificationsAPIView(View):
 
     @method_decorator(login_required(login_url='login:login'))
     def get(self, request, *args, **kwargs):
-        cache_key = f'notifications_{request.user.id}'
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return JsonResponse(cached)
+        return JsonResponse(NOTIFICATIONS.get_or_compute(request.user.id, lambda: self._notifications(request.user)))
 
+    def _notifications(self, user):
+        """Datos del dropdown; se cachean por usuario en NOTIFICATIONS (apps/login/caches.py)."""
         notifications = []
         pending_requests = list(FriendRequest.objects.filter(
-            to_user=request.user
+            to_user=user
         ).select_related('from_user').order_by('-created_at')[:4])
 
         unread_requests = len(pending_requests)
@@ -357,21 +358,23 @@ class NotificationsAPIView(View):
                 'url': str(reverse_lazy('login:player_profile', args=[req.from_user.username]))
             })
 
-        unread_messages = list(ChatMessage.objects.filter(
-            receiver=request.user,
-            is_read=False
-        ).exclude(sender=request.user).select_related('sender').order_by('-timestamp')[:4])
+        # Conversaciones con mensajes sin leer (contadores de Conversation, sin recorrer mensajes)
+        unread_conversations = list(Conversation.objects.filter(
+            Q(user_a=user, unread_a__gt=0) | Q(user_b=user, unread_b__gt=0)
+        ).select_related('user_a', 'user_b').order_by('-last_message_at')[:4])
 
-        for msg in unread_messages:
+        for conversation in unread_conversations:
+            other = conversation.user_b if conversation.user_a_id == user.id else conversation.user_a
+            unread = conversation.unread_for(user.id)
             notifications.append({
-                'id': f"msg-{msg.id}",
+                'id': f"msg-{conversation.last_message_id}",
                 'type': 'chat_message',
-                'text': f"Nuevo mensaje de {msg.sender.username}",
-                'created_at': msg.timestamp.isoformat(),
-                'url': str(reverse_lazy('chat:chat', args=[msg.sender.username]))
+                'text': f"Nuevo mensaje de {other.username}" if unread == 1 else f"{unread} mensajes nuevos de {other.username}",
+                'created_at': conversation.last_message_at.isoformat() if conversation.last_message_at else '',
+                'url': str(reverse_lazy('chat:chat', args=[other.username]))
             })
 
-        unread_count = unread_requests + len(unread_messages)
+        unread_count = unread_requests + len(unread_conversations)
 
         if not notifications:
             notifications.append({
@@ -382,16 +385,49 @@ class NotificationsAPIView(View):
                 'url': ''
             })
 
-        result = {
+        return {
             'notifications': notifications,
             'unread_count': unread_count
         }
-        cache.set(cache_key, result, timeout=20)  # Cachear 20s por usuario
-        return JsonResponse(result)
+
+def _page_number(request):
+    try:
+        return min(max(int(request.GET.get('page', 1)), 1), players.max_page())
+    except ValueError:
+        return 1
+
+
+def _player_rows(users, viewer):
+    """Datos de cada jugador con avatar y estado de amistad resueltos en bloque."""
+    statuses = players.friendship_statuses(viewer, [user.pk for user in users])
+    profiles = [getattr(user, 'profile', None) for user in users]
+    pictures = avatars.avatar_pictures(profiles, size=64)
+    rows = []
+    for user, profile in zip(users, profiles):
+        picture = pictures.get(getattr(profile, 'pk', None)) or {
+            'src': avatars.avatar_url(None), 'srcset': '', 'sources': [], 'size': 64,
+        }
+        rows.append({
+            'id': user.pk,
+            'username': user.username,
+            'bio': getattr(profile, 'bio', '') or '',
+            'avatar_url': picture['src'],
+            'avatar': picture,
+            'friendship_status': statuses[user.pk],
+            'url': reverse('login:player_profile', args=[user.username]),
+        })
+    return rows
+
+
+def _search_next_url(view_name, query, page, has_next):
+    if not has_next or page >= players.max_page():
+        return ''
+    return f"{reverse(view_name)}?{urlencode({'q': query, 'page': page + 1})}"
+
 
 class SearchPlayersView(View):
     """
-    Vista para buscar jugadores por nombre de usuario.
+    Vista para buscar jugadores por nombre de usuario (paginada).
     """
     template_name = 'login/search_players.html'
 
@@ -401,23 +437,80 @@ class SearchPlayersView(View):
 
     def get(self, request, *args, **kwargs):
         from django.shortcuts import render
-        query = request.GET.get('q', '').strip()
-        results = []
-
-        if query:
-            # Buscar usuarios cuyo username contenga el término, excluyendo al usuario actual
-            results = User.objects.filter(
-                username__icontains=query,
-                is_active=True
-            ).exclude(id=request.user.id).select_related('profile')
+        query = players.normalize_query(request.GET.get('q'))
+        page = _page_number(request)
+        users, has_next = players.search_players(query, request.user, page)
 
         context = {
             'query': query,
-            'results': results,
+            'page': page,
+            'results': _player_rows(users, request.user),
+            'next_url': _search_next_url('login:search_players', query, page, has_next),
+            'previous_url': f"{reverse('login:search_players')}?{urlencode({'q': query, 'page': page - 1})}" if page > 1 else '',
         }
         return render(request, self.template_name, context)
 
 
+class PlayerSearchAPIView(View):
+    """
+    API de búsqueda de jugadores: ?q=<texto>&page=<n>.
+    Devuelve avatar y estado de amistad de cada resultado.
+    """
+
+    @method_decorator(login_required(login_url='login:login'))
+    def get(self, request, *args, **kwargs):
+        query = players.normalize_query(request.GET.get('q'))
+        page = _page_number(request)
+        users, has_next = players.search_players(query, request.user, page)
+        next_url = _search_next_url('login:player_search_api', query, page, has_next)
+        return JsonResponse({
+            'query': query,
+            'page': page,
+            'has_next': bool(next_url),
+            'next_url': next_url,
+            'results': _player_rows(users, request.user),
+        })
+
+
+class PlayerAutocompleteAPIView(View):
+    """
+    API de autocompletado por prefijo: ?q=<texto>. Pensada para llamarse con
+    debounce mientras se escribe; el navegador puede reutilizar la respuesta unos segundos.
+    """
+
+    @method_decorator(login_required(login_url='login:login'))
+    def get(self, request, *args, **kwargs):
+        query = players.normalize_query(request.GET.get('q'))
+        users = players.autocomplete_players(query, request.user)
+        response = JsonResponse({
+            'query': query,
+            'results': _player_rows(users, request.user),
+        })
+        response['Cache-Control'] = 'private, max-age=30'
+        return response
+
+
+class AvatarDerivativeView(View):
+    """
+    Miniatura de avatar generada a pedido: si no existe la crea y la anota en
+    el manifiesto, y redirige a su URL definitiva en el storage.
+    """
+
+    def get(self, request, digest, size, fmt, *args, **kwargs):
+        if (
+            len(digest) != 64 or digest.strip('0123456789abcdef')
+            or size not in avatars.thumbnail_sizes() or fmt not in avatars.derivative_formats()
+        ):
+            raise Http404('Miniatura no válida.')
+        derivative = avatars.ensure_derivative(digest, size, fmt)
+        if derivative is None:
+            raise Http404('Avatar no encontrado.')
+        response = HttpResponseRedirect(avatars.thumbnail_storage().url(derivative.name))
+        # El destino depende solo del contenido; se puede recordar un día.
+        response['Cache-Control'] = 'public, max-age=86400'
+        return response
+
+
 class PlayerProfileView(View):
     """
     Vista para el perfil público de otro jugador.
@@ -432,7 +525,12 @@ class PlayerProfileView(View):
         from django.shortcuts import render, get_object_or_404
         from apps.web.models import Game
         
-        target_user = get_object_or_404(User, username=username, is_active=True)
+        # Usuario, perfil y cantidad de amigos en una sola consulta.
+        target_user = get_object_or_404(
+            User.objects.select_related('profile').annotate(friend_count=Count('profile__friends')),
+            username=username,
+            is_active=True,
+        )
         
         # Si intenta ver su propio perfil desde aquí, redirigir al perfil privado
         if target_user == request.user:
@@ -442,27 +540,14 @@ class PlayerProfileView(View):
         try:
             profile = target_user.profile
         except User.profile.RelatedObjectDoesNotExist:
-            from .models import UserProfile
             profile = UserProfile.objects.create(user=target_user)
-            
-        try:
-            my_profile = request.user.profile
-        except User.profile.RelatedObjectDoesNotExist:
-            from .models import UserProfile
-            my_profile = UserProfile.objects.create(user=request.user)
+
         user_games = Game.objects.filter(
             uploaded_by=target_user, is_approved=True
         ).select_related('uploaded_by').order_by('-created_at')
 
-        # Determinar el estado de amistad
-        friendship_status = 'none' # none, pending_sent, pending_received, friends
-        
-        if my_profile.friends.filter(id=profile.id).exists():
-            friendship_status = 'friends'
-        elif FriendRequest.objects.filter(from_user=request.user, to_user=target_user).exists():
-            friendship_status = 'pending_sent'
-        elif FriendRequest.objects.filter(from_user=target_user, to_user=request.user).exists():
-            friendship_status = 'pending_received'
+        # Estado de amistad: none, pending_sent, pending_received o friends
+        friendship_status = players.friendship_statuses(request.user, [target_user.pk])[target_user.pk]
 
         available_avatars = _available_avatar_names()
         context = {
@@ -471,6 +556,7 @@ class PlayerProfileView(View):
             'profile_avatar_url': _resolve_avatar_url(profile, available_avatars),
             'user_games': user_games,
             'friendship_status': friendship_status,
+            'friend_count': target_user.friend_count,
         }
         return render(request, self.template_name, context)
 
@@ -489,29 +575,14 @@ class SendFriendRequestAPIView(View):
             if to_user == request.user:
                 return JsonResponse({'success': False, 'error': 'No puedes enviarte una solicitud a ti mismo.'})
 
-            # Prevent trying to access non-existent profiles directly
-            try:
-                my_profile = request.user.profile
-            except User.profile.RelatedObjectDoesNotExist:
-                from .models import UserProfile
-                my_profile = UserProfile.objects.create(user=request.user)
-                
-            try:
-                target_profile = to_user.profile
-            except User.profile.RelatedObjectDoesNotExist:
-                from .models import UserProfile
-                target_profile = UserProfile.objects.create(user=to_user)
-
-            # Check if already friends
-            if my_profile.friends.filter(id=target_profile.id).exists():
+            # Amistad y solicitudes en ambos sentidos, en una sola consulta
+            status = players.friendship_statuses(request.user, [to_user.pk])[to_user.pk]
+            if status == players.STATUS_FRIENDS:
                 return JsonResponse({'success': False, 'error': 'Ya son amigos.'})
-
-            # Check if request already exists in either direction
-            if FriendRequest.objects.filter(from_user=request.user, to_user=to_user).exists():
-                 return JsonResponse({'success': False, 'error': 'Solicitud ya enviada.'})
-            
-            if FriendRequest.objects.filter(from_user=to_user, to_user=request.user).exists():
-                 return JsonResponse({'success': False, 'error': 'Este usuario ya te ha enviado una solicitud.'})
+            if status == players.STATUS_PENDING_SENT:
+                return JsonResponse({'success': False, 'error': 'Solicitud ya enviada.'})
+            if status == players.STATUS_PENDING_RECEIVED:
+                return JsonResponse({'success': False, 'error': 'Este usuario ya te ha enviado una solicitud.'})
 
             FriendRequest.objects.create(from_user=request.user, to_user=to_user)
             return JsonResponse({'success': True})
@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.contrib import admin
 
-from .models import Game, GameRating
+from .analytics import daily_series, with_bar_heights
+
+from .models import BuildBlob, BuildJob, Game, GameBuild, GameDailyStats, GameRanking, GameRating
 
 
 @admin.register(Game)
@@ -18,7 +21,7 @@ class GameAdmin(admin.ModelAdmin):
     )
     list_filter = ("genre", "is_web_playable", "is_approved", "is_featured", "created_at")
     search_fields = ("title", "short_description", "uploaded_by__username")
-    readonly_fields = ("downloads", "views", "rating_votes", "created_at", "updated_at", "web_build_path", "processing_error")
+    readonly_fields = ("downloads", "views", "rating", "rating_votes", "rating_sum", "created_at", "updated_at", "web_build_path", "current_build", "processing_error")
     list_editable = ("is_approved", "is_featured")
 
 
@@ -27,3 +30,58 @@ class GameRatingAdmin(admin.ModelAdmin):
     list_display = ("game", "user", "value", "created_at")
     list_filter = ("value", "created_at")
     search_fields = ("game__title", "user__username")
+
+
+@admin.register(GameRanking)
+class GameRankingAdmin(admin.ModelAdmin):
+    list_display = ("board", "genre", "position", "game", "score", "computed_at")
+    list_filter = ("board", "genre")
+    search_fields = ("game__title",)
+    list_select_related = ("game",)
+    readonly_fields = ("board", "genre", "position", "game", "score", "computed_at")
+
+
+@admin.register(GameDailyStats)
+class GameDailyStatsAdmin(admin.ModelAdmin):
+    """Tablero de actividad: la serie por día (de todos los juegos o del filtrado) sobre la lista."""
+    change_list_template = "admin/web/gamedailystats/change_list.html"
+    list_display = ("day", "game", "views", "downloads", "ratings", "rating_sum")
+    search_fields = ("game__title",)
+    list_select_related = ("game",)
+    date_hierarchy = "day"
+    readonly_fields = ("game", "day", "views", "downloads", "ratings", "rating_sum")
+
+    def changelist_view(self, request, extra_context=None):
+        days = getattr(settings, "ANALYTICS_DASHBOARD_DAYS", 30)
+        game_id = request.GET.get("game__id__exact")
+        series = with_bar_heights(daily_series([game_id] if game_id else None, days))
+        extra_context = {
+            **(extra_context or {}),
+            "stats_days": days,
+            "stats_series": series,
+            "stats_totals": {field: sum(point[field] for point in series) for field in ("views", "downloads", "ratings")},
+        }
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(BuildJob)
+class BuildJobAdmin(admin.ModelAdmin):
+    list_display = ("game", "kind", "state", "attempts", "worker", "created_at", "started_at", "finished_at")
+    list_filter = ("kind", "state", "created_at")
+    search_fields = ("game__title",)
+    readonly_fields = ("created_at", "started_at", "heartbeat_at", "finished_at", "worker", "last_error")
+
+
+@admin.register(GameBuild)
+class GameBuildAdmin(admin.ModelAdmin):
+    list_display = ("game", "index_path", "file_count", "total_size", "created_at")
+    search_fields = ("game__title",)
+    readonly_fields = ("game", "index_path", "file_count", "total_size", "created_at")
+    exclude = ("manifest",)
+
+
+@admin.register(BuildBlob)
+class BuildBlobAdmin(admin.ModelAdmin):
+    list_display = ("sha256", "size", "storage_path", "created_at", "last_referenced_at")
+    search_fields = ("sha256",)
+    readonly_fields = ("sha256", "size", "storage_path", "created_at", "last_referenced_at")
@@ -0,0 +1,157 @@
+"""
+Estadísticas por día de los juegos.
+
+Cada partida abierta, descarga o calificación agrega un GameEvent. Igual que
+los contadores de counters.py, los eventos se acumulan en memoria del
+proceso y se guardan juntos con un bulk_create cada
+GAME_COUNTER_FLUSH_INTERVAL segundos, al acumular GAME_COUNTER_MAX_PENDING y
+al terminar el proceso: el request no espera un INSERT por evento.
+
+`python manage.py rollup_game_events` (con cron, o `--interval`) resume los
+eventos en GameDailyStats, una fila por juego y día. Recalcula los días
+completos desde el último día ya resumido (y el anterior, por los eventos
+que llegan tarde), así que repetirlo no cuenta dos veces. Después borra los
+eventos de más de GAME_EVENT_RETENTION_DAYS días: las series de "Mis juegos"
+y del admin salen de GameDailyStats, nunca de los eventos crudos.
+"""
+from datetime import date, datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .counters import WriteBuffer
+from .models import Game, GameDailyStats, GameEvent
+
+STATS_FIELDS = ("views", "downloads", "ratings", "rating_sum")
+
+
+class EventLog(WriteBuffer):
+    """Acumula GameEvent sin guardar y los inserta en lote (ver counters.WriteBuffer)."""
+
+    def __init__(self):
+        super().__init__("eventos de juegos")
+
+    def record(self, game_id: int, kind: int, value: int = 0) -> None:
+        self.add(GameEvent(game_id=game_id, kind=kind, value=value, created_at=timezone.now()))
+
+    def _write(self, batch) -> int:
+        try:
+            return len(GameEvent.objects.bulk_create(batch))
+        except IntegrityError:
+            # Un juego se borró mientras sus eventos esperaban: se descartan solo esos.
+            existing = set(Game.objects.filter(pk__in={event.game_id for event in batch}).values_list("pk", flat=True))
+            return len(GameEvent.objects.bulk_create([event for event in batch if event.game_id in existing]))
+
+
+event_log = EventLog()
+
+
+def retention_days() -> int:
+    return getattr(settings, "GAME_EVENT_RETENTION_DAYS", 90)
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, dt_time.min))
+
+
+def rollup_events(since: date | None = None) -> int:
+    """
+    Recalcula GameDailyStats desde `since` (por defecto, el día anterior al
+    último resumido; la primera vez, el del evento más antiguo) hasta hoy.
+    Devuelve cuántas filas diarias escribió.
+    """
+    if since is None:
+        last_day = GameDailyStats.objects.aggregate(last=Max("day"))["last"]
+        if last_day is not None:
+            since = last_day - timedelta(days=1)
+        else:
+            first_event = GameEvent.objects.aggregate(first=Min("created_at"))["first"]
+            if first_event is None:
+                return 0
+            since = timezone.localdate(first_event)
+
+    rows = (
+        GameEvent.objects
+        .filter(created_at__gte=_day_start(since))
+        .annotate(day=TruncDate("created_at"))
+        .values("game", "day")
+        .annotate(
+            views=Count("pk", filter=Q(kind=GameEvent.KIND_VIEW)),
+            downloads=Count("pk", filter=Q(kind=GameEvent.KIND_DOWNLOAD)),
+            ratings=Count("pk", filter=Q(kind=GameEvent.KIND_RATING)),
+            rating_sum=Sum("value", filter=Q(kind=GameEvent.KIND_RATING), default=0),
+        )
+        .order_by()
+    )
+    stats = [
+        GameDailyStats(game_id=row["game"], day=row["day"], **{field: row[field] for field in STATS_FIELDS})
+        for row in rows
+    ]
+    GameDailyStats.objects.bulk_create(
+        stats,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["game", "day"],
+        update_fields=list(STATS_FIELDS),
+    )
+    return len(stats)
+
+
+def prune_events() -> int:
+    """Borra los eventos de más de GAME_EVENT_RETENTION_DAYS días que ya están resumidos."""
+    last_day = GameDailyStats.objects.aggregate(last=Max("day"))["last"]
+    if last_day is None:
+        return 0
+    cutoff = min(timezone.localdate() - timedelta(days=retention_days()), last_day - timedelta(days=1))
+    deleted, _ = GameEvent.objects.filter(created_at__lt=_day_start(cutoff)).delete()
+    return deleted
+
+
+def daily_series(games, days: int = 30) -> list[dict]:
+    """
+    Totales por día de los últimos `days` días (hoy incluido) de los juegos
+    `games` (queryset o ids; None = todos), con ceros en los días sin
+    actividad. Es una consulta agregada sobre GameDailyStats.
+    """
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    qs = GameDailyStats.objects.filter(day__gte=start)
+    if games is not None:
+        qs = qs.filter(game__in=games)
+    totals = {
+        row["day"]: row
+        for row in qs.values("day").annotate(**{field: Sum(field) for field in STATS_FIELDS}).order_by()
+    }
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = totals.get(day, {})
+        point = {"day": day, **{field: row.get(field) or 0 for field in STATS_FIELDS}}
+        point["rating_avg"] = round(point["rating_sum"] / point["ratings"], 1) if point["ratings"] else None
+        series.append(point)
+    return series
+
+
+def game_totals(games, days: int = 30) -> dict:
+    """{game_id: {views, downloads, ratings, rating_sum}} de los últimos `days` días."""
+    start = timezone.localdate() - timedelta(days=days - 1)
+    return {
+        row["game"]: row
+        for row in (
+            GameDailyStats.objects.filter(game__in=games, day__gte=start)
+            .values("game")
+            .annotate(**{field: Sum(field) for field in STATS_FIELDS})
+            .order_by()
+        )
+    }
+
+
+def with_bar_heights(series: list[dict], field: str = "views") -> list[dict]:
+    """Agrega `height` (0-100, relativo al máximo de `field`) para las barras de los templates."""
+    peak = max((point[field] for point in series), default=0)
+    for point in series:
+        point["height"] = round(point[field] * 100 / peak) if peak else 0
+    return series
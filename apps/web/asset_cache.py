@@ -0,0 +1,282 @@
+"""
+Soporte del proxy de assets de juegos (GameAssetProxyView).
+
+- Sesión HTTP compartida con pool de conexiones keep-alive hacia Supabase.
+- Caché local en disco, acotada por tamaño y con desalojo LRU, de los assets
+  más pedidos. La clave es el SHA-256 del blob (contenido inmutable), así
+  que distintas versiones o juegos que comparten un archivo comparten la
+  entrada de caché.
+- Utilidades para responder peticiones `Range` desde un archivo local.
+- Negociación de `Accept-Encoding` entre las variantes precomprimidas.
+"""
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def upstream_session() -> requests.Session:
+    """Sesión HTTP compartida por todos los hilos del proceso."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                # Los bytes se reenvían tal cual: no pedir compresión al origen.
+                session.headers["Accept-Encoding"] = "identity"
+                _session = session
+    return _session
+
+
+class AssetDiskCache:
+    """
+    Caché de archivos en disco con tope de bytes.
+
+    Cada proceso lleva la cuenta de lo que escribió; cuando supera el tope,
+    recorre el directorio (compartido entre workers) y borra los archivos
+    usados hace más tiempo (mtime, que se actualiza en cada acierto) hasta
+    quedar en el 90% del tope.
+    """
+
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8
+        self._lock = threading.Lock()
+        self._total = None
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Path | None:
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def accepts(self, size: int | None) -> bool:
+        return size is not None and 0 <= size <= self.max_entry_bytes
+
+    def fill(self, key: str, chunks):
+        """
+        Reenvía `chunks` mientras los escribe en un temporal; si el stream se
+        completa, lo mueve a la caché. Si el cliente corta la descarga, se
+        descarta el temporal.
+        """
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+        completed = False
+        size = 0
+        try:
+            for chunk in chunks:
+                tmp.write(chunk)
+                size += len(chunk)
+                yield chunk
+            completed = True
+        finally:
+            tmp.close()
+            if completed:
+                final = self._path(key)
+                final.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp.name, final)
+                self._account(size)
+            else:
+                os.unlink(tmp.name)
+
+    def _account(self, size: int) -> None:
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._scan())
+            else:
+                self._total += size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        for path in self.root.glob("??/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def _evict(self) -> None:
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._total = total
+        logger.info("Caché de assets: %s archivos desalojados, %s bytes en uso.", removed, total)
+
+
+def get_asset_cache() -> AssetDiskCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AssetDiskCache(
+                    getattr(settings, "GAME_ASSET_CACHE_DIR", Path(settings.BASE_DIR) / "cache" / "game_assets"),
+                    getattr(settings, "GAME_ASSET_CACHE_MAX_BYTES", 2 * 1024 ** 3),
+                )
+    return _cache
+
+
+def parse_range(header: str | None, size: int):
+    """
+    Interpreta un encabezado `Range: bytes=...` de un solo rango.
+
+    Devuelve (inicio, fin) inclusivos, None si no hay rango utilizable (se
+    responde el archivo completo, como permite la RFC 9110 con varios
+    rangos) o "unsatisfiable" si el rango cae fuera del archivo.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_str, _, end_str = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            suffix = int(end_str)
+            if suffix == 0:
+                return "unsatisfiable"
+            start = max(size - suffix, 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+def read_span(fileobj, length: int):
+    try:
+        while length > 0:
+            chunk = fileobj.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def file_response(request, path: Path, content_type: str, etag: str | None, filename: str | None = None):
+    """
+    Sirve un archivo local respetando `Range` (y `If-Range` contra el ETag).
+    `filename` es el nombre en línea del Content-Disposition; por defecto, el
+    del archivo en disco.
+    """
+    size = path.stat().st_size
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if not if_range or if_range == etag:
+        byte_range = parse_range(request.headers.get("Range"), size)
+
+    if byte_range is None:
+        return FileResponse(path.open("rb"), content_type=content_type, filename=filename or path.name)
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range
+    fileobj = path.open("rb")
+    fileobj.seek(start)
+    response = StreamingHttpResponse(read_span(fileobj, end - start + 1), status=206, content_type=content_type)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(end - start + 1)
+    return response
+
+
+# Orden de preferencia cuando el cliente acepta varias codificaciones.
+ENCODING_PREFERENCE = ("br", "gzip")
+
+
+def accepted_encodings(header: str | None) -> set[str]:
+    """Codificaciones aceptadas según `Accept-Encoding` (descarta las de q=0)."""
+    accepted = set()
+    for part in (header or "").split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            accepted.add(token)
+    return accepted
+
+
+def negotiate_encoding(header: str | None, available) -> str:
+    """Mejor variante disponible para el cliente, o "" para servir el original."""
+    if not available:
+        return ""
+    accepted = accepted_encodings(header)
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return ""
+
+
+def can_decode(encoding: str) -> bool:
+    if encoding == "gzip":
+        return True
+    if encoding == "br":
+        from .precompress import brotli
+        return brotli is not None
+    return False
+
+
+def decode_stream(chunks, encoding: str):
+    """
+    Descomprime al vuelo un archivo que el juego trae ya comprimido, para los
+    clientes que no aceptan esa codificación (p. ej. brotli sobre HTTP).
+    """
+    if encoding == "br":
+        from .precompress import brotli
+        decompressor = brotli.Decompressor()
+        for chunk in chunks:
+            yield decompressor.process(chunk)
+        return
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield decompressor.decompress(chunk)
+    yield decompressor.flush()
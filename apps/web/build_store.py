@@ -0,0 +1,402 @@
+"""
+Almacén de contenido direccionado por hash para los archivos de los builds.
+
+Cada archivo extraído de un ZIP se guarda una sola vez como blob en
+games/blobs/<aa>/<sha256> (en el bucket de Supabase o en MEDIA_ROOT) y
+cada build queda como un manifiesto (GameBuild + BuildFile) que apunta a
+esos blobs. Los runtimes que se repiten entre juegos y re-subidas (loader
+de Unity, .wasm de Godot, bundles de Phaser) no se vuelven a subir.
+"""
+import hashlib
+import logging
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.utils import timezone
+
+from .content_types import describe_asset
+from .models import BuildBlob, BuildFile, GameBuild
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = "games/blobs"
+HASH_CHUNK_SIZE = 1024 * 1024
+# Límite de parámetros por consulta (SQLite admite 999 en versiones antiguas).
+QUERY_BATCH_SIZE = 500
+# Manifiestos de build que se mantienen decodificados en memoria por proceso.
+MANIFEST_CACHE_SIZE = 256
+
+_manifests: OrderedDict[int, dict] = OrderedDict()
+_manifests_lock = threading.Lock()
+
+
+class AssetEntry(NamedTuple):
+    """Un archivo del manifiesto tal como lo necesita el proxy de assets."""
+    sha256: str
+    size: int
+    content_type: str
+    encoding: str
+    variants: dict | None = None
+
+    @property
+    def storage_path(self) -> str:
+        return blob_path(self.sha256)
+
+
+def blob_path(sha256: str) -> str:
+    """Ruta del blob en el almacenamiento (clave del bucket o relativa a MEDIA_ROOT)."""
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}"
+
+
+def hash_zip_entry(zip_file, info) -> str:
+    """Calcula el SHA-256 de un miembro del ZIP leyéndolo en bloques."""
+    digest = hashlib.sha256()
+    with zip_file.open(info) as entry:
+        for chunk in iter(lambda: entry.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_local_blob(zip_file, info) -> tuple[str, Path]:
+    """
+    Extrae un miembro del ZIP al almacén local de blobs (MEDIA_ROOT).
+    Si el contenido ya existía, descarta la copia. Devuelve (sha256, ruta del blob).
+    """
+    media_root = Path(settings.MEDIA_ROOT)
+    tmp_dir = media_root / BLOB_PREFIX / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    with zip_file.open(info) as entry, tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+        for chunk in iter(lambda: entry.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            tmp.write(chunk)
+
+    sha256 = digest.hexdigest()
+    final_path = media_root / blob_path(sha256)
+    if final_path.exists():
+        os.unlink(tmp.name)
+    else:
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp.name, final_path)
+    return sha256, final_path
+
+
+def link_blob(blob_file: Path, target: Path) -> None:
+    """Enlaza (hard link) un blob dentro del directorio del build; copia si no se puede."""
+    try:
+        os.link(blob_file, target)
+    except OSError:
+        shutil.copyfile(blob_file, target)
+
+
+def existing_blobs(hashes) -> set[str]:
+    """
+    Devuelve qué hashes ya están almacenados y marca esos blobs como
+    referenciados ahora, para que el recolector no los borre mientras el
+    build que los reutiliza todavía no guardó su manifiesto.
+    """
+    hashes = list(set(hashes))
+    found = set()
+    now = timezone.now()
+    for start in range(0, len(hashes), QUERY_BATCH_SIZE):
+        batch = hashes[start:start + QUERY_BATCH_SIZE]
+        # Marcar antes de leer: si el recolector borró la fila mientras tanto,
+        # el UPDATE no la encuentra y el blob se vuelve a subir.
+        BuildBlob.objects.filter(sha256__in=batch).update(last_referenced_at=now)
+        found.update(
+            BuildBlob.objects.filter(sha256__in=batch, last_referenced_at__gte=now).values_list("sha256", flat=True)
+        )
+    return found
+
+
+def blobs_without_variants(hashes) -> set[str]:
+    """Hashes ya almacenados a los que todavía no se les generaron variantes comprimidas."""
+    hashes = list(set(hashes))
+    missing = set()
+    for start in range(0, len(hashes), QUERY_BATCH_SIZE):
+        missing.update(
+            BuildBlob.objects
+            .filter(sha256__in=hashes[start:start + QUERY_BATCH_SIZE], variants__isnull=True)
+            .values_list("sha256", flat=True)
+        )
+    return missing
+
+
+def previous_manifest(build: GameBuild | None) -> dict[str, tuple[int | None, int, str]]:
+    """Manifiesto del build publicado: {ruta: (crc32, tamaño, sha256)}."""
+    if build is None:
+        return {}
+    rows = BuildFile.objects.filter(build=build).values_list("path", "crc32", "blob__size", "blob__sha256")
+    return {path: (crc32, size, sha256) for path, crc32, size, sha256 in rows}
+
+
+def unchanged_sha(previous: dict, info) -> str | None:
+    """
+    Si el miembro del ZIP coincide en CRC32 y tamaño con la misma ruta del
+    build anterior, devuelve el sha256 que ya tenía (sin descomprimirlo).
+    """
+    prev = previous.get(info.filename)
+    if prev and prev[0] == info.CRC and prev[1] == info.file_size:
+        return prev[2]
+    return None
+
+
+def publish_build(build: GameBuild, web_build_path: str, entries: list[tuple[str, str, int, int]],
+                  variants: dict[str, dict[str, int]] | None = None) -> GameBuild:
+    """
+    Registra los blobs nuevos, completa el manifiesto del build borrador y
+    lo publica.
+
+    `entries` es una lista de (ruta dentro del ZIP, sha256, tamaño, crc32) y
+    `variants` las variantes comprimidas generadas en este procesamiento
+    ({sha256: {encoding: tamaño}}).
+    Los blobs ya deben estar en el almacenamiento. El cambio de versión es
+    una sola transacción: los jugadores ven el build anterior completo o el
+    nuevo completo, nunca una mezcla. Se conservan GAME_BUILD_KEEP_PREVIOUS
+    versiones anteriores; los blobs que solo usaban las versiones
+    descartadas se eliminan del almacenamiento.
+    """
+    game = build.game
+    sizes = {sha: size for _, sha, size, _ in entries}
+    keep_previous = getattr(settings, "GAME_BUILD_KEEP_PREVIOUS", 1)
+
+    with transaction.atomic():
+        BuildBlob.objects.bulk_create(
+            [BuildBlob(sha256=sha, size=size, storage_path=blob_path(sha)) for sha, size in sizes.items()],
+            batch_size=QUERY_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        blob_ids = {}
+        blob_variants = {}
+        hashes = list(sizes)
+        for start in range(0, len(hashes), QUERY_BATCH_SIZE):
+            rows = (
+                BuildBlob.objects
+                .filter(sha256__in=hashes[start:start + QUERY_BATCH_SIZE])
+                .values_list("sha256", "pk", "variants")
+            )
+            for sha, pk, blob_variant in rows:
+                blob_ids[sha] = pk
+                blob_variants[sha] = blob_variant
+        if variants:
+            BuildBlob.objects.bulk_update(
+                [BuildBlob(pk=blob_ids[sha], variants=value) for sha, value in variants.items()],
+                ["variants"],
+                batch_size=QUERY_BATCH_SIZE,
+            )
+            blob_variants.update(variants)
+
+        files = []
+        for path, sha, _, crc32 in entries:
+            content_type, encoding = describe_asset(path)
+            files.append(BuildFile(
+                build=build, path=path, blob_id=blob_ids[sha], crc32=crc32,
+                content_type=content_type, encoding=encoding,
+            ))
+        BuildFile.objects.bulk_create(files, batch_size=QUERY_BATCH_SIZE)
+        build.file_count = len(entries)
+        build.total_size = sum(size for _, _, size, _ in entries)
+        build.manifest = asset_manifest(
+            build.index_path,
+            (
+                (f.path, sha, size, f.content_type, f.encoding, blob_variants.get(sha))
+                for f, (_, sha, size, _) in zip(files, entries)
+            ),
+        )
+        build.save(update_fields=["file_count", "total_size", "manifest"])
+
+        game.current_build = build
+        game.web_build_path = web_build_path
+        game.is_web_playable = True
+        game.processing_error = ""
+        game.save(update_fields=["current_build", "web_build_path", "is_web_playable", "processing_error", "updated_at"])
+
+        older = GameBuild.objects.filter(game=game).exclude(pk=build.pk)
+        retained = list(older.order_by("-created_at", "-pk").values_list("pk", flat=True)[:keep_previous])
+        discarded = older.exclude(pk__in=retained)
+        discarded_blob_ids = list(
+            BuildFile.objects.filter(build__in=discarded).values_list("blob_id", flat=True).distinct()
+        )
+        discarded.delete()
+
+    if discarded_blob_ids:
+        # Solo se borran si nadie los reutilizó desde que empezó este build.
+        collect_garbage(blob_ids=discarded_blob_ids, referenced_before=build.created_at)
+    return build
+
+
+def asset_manifest(index_path: str, files) -> dict[str, list]:
+    """
+    Arma el manifiesto que consulta el proxy a partir de
+    (ruta en el ZIP, sha256, tamaño, Content-Type, Content-Encoding,
+    variantes comprimidas). Las claves son relativas a la carpeta del
+    index.html, igual que las URLs que pide el juego.
+    """
+    root = posixpath.dirname(index_path)
+    manifest = {}
+    for path, sha, size, content_type, encoding, variants in files:
+        key = posixpath.relpath(path, root) if root else path
+        manifest[key] = [sha, size, content_type, encoding]
+        if variants:
+            manifest[key].append(variants)
+    return manifest
+
+
+def get_manifest(build_id: int) -> dict[str, list]:
+    """
+    Manifiesto de un build, decodificado una sola vez por proceso (un build
+    publicado no cambia nunca). Los builds creados antes de existir el campo
+    `manifest` se completan la primera vez desde sus filas BuildFile.
+    """
+    with _manifests_lock:
+        manifest = _manifests.get(build_id)
+        if manifest is not None:
+            _manifests.move_to_end(build_id)
+            return manifest
+
+    row = GameBuild.objects.filter(pk=build_id).values_list("index_path", "manifest").first()
+    if row is None:
+        return {}
+    index_path, manifest = row
+    if not manifest:
+        rows = BuildFile.objects.filter(build_id=build_id).values_list(
+            "path", "blob__sha256", "blob__size", "content_type", "encoding", "blob__variants"
+        )
+        files = []
+        for path, sha, size, content_type, encoding, variants in rows:
+            if not content_type:
+                content_type, encoding = describe_asset(path)
+            files.append((path, sha, size, content_type, encoding, variants))
+        manifest = asset_manifest(index_path, files)
+        if manifest:
+            GameBuild.objects.filter(pk=build_id).update(manifest=manifest)
+
+    with _manifests_lock:
+        _manifests[build_id] = manifest
+        while len(_manifests) > MANIFEST_CACHE_SIZE:
+            _manifests.popitem(last=False)
+    return manifest
+
+
+def lookup_asset(build_id: int, asset_path: str) -> AssetEntry | None:
+    """
+    Busca en el manifiesto el archivo pedido por el navegador (una consulta
+    a un diccionario). Una ruta que no está en el manifiesto no existe: se
+    rechaza sin consultar el almacenamiento.
+    """
+    entry = get_manifest(build_id).get(posixpath.normpath(asset_path))
+    return AssetEntry(*entry) if entry else None
+
+
+def dedup_stats() -> dict:
+    """
+    Ahorro de espacio por deduplicación.
+
+    `logical_bytes` es lo que ocuparían los builds sin deduplicar (la suma
+    de todos los archivos de todos los manifiestos) y `stored_bytes` lo que
+    realmente ocupan los blobs.
+    """
+    logical = BuildFile.objects.aggregate(files=Count("pk"), bytes=Sum("blob__size"))
+    stored = BuildBlob.objects.aggregate(blobs=Count("pk"), bytes=Sum("size"))
+    logical_bytes = logical["bytes"] or 0
+    stored_bytes = stored["bytes"] or 0
+    return {
+        "builds": GameBuild.objects.count(),
+        "files": logical["files"],
+        "blobs": stored["blobs"],
+        "logical_bytes": logical_bytes,
+        "stored_bytes": stored_bytes,
+        "saved_bytes": logical_bytes - stored_bytes,
+        "ratio": logical_bytes / stored_bytes if stored_bytes else 0.0,
+    }
+
+
+def top_shared_blobs(limit: int = 10):
+    """Blobs referenciados por más archivos (típicamente runtimes de motores)."""
+    return (
+        BuildBlob.objects
+        .annotate(refs=Count("files"))
+        .filter(refs__gt=1)
+        .order_by("-refs", "-size")[:limit]
+    )
+
+
+def collect_garbage(grace_seconds: int = 3600, dry_run: bool = False,
+                    blob_ids=None, referenced_before=None) -> tuple[int, int]:
+    """
+    Elimina los blobs que ningún manifiesto referencia desde hace más de
+    `grace_seconds` (o desde `referenced_before`), opcionalmente limitado a
+    `blob_ids`. Devuelve (cantidad, bytes liberados).
+
+    Un build en curso (borrador sin BuildFile) puede reutilizar blobs que
+    todavía no figuran en ningún manifiesto: no se borra nada referenciado
+    después de que empezó el más antiguo. Los borradores de más de
+    GAME_BUILD_DRAFT_MAX_AGE segundos se dan por abandonados.
+    """
+    from .precompress import variant_path
+    from .services import _is_s3_storage
+
+    now = timezone.now()
+    cutoff = referenced_before or now - timedelta(seconds=grace_seconds)
+    draft_max_age = getattr(settings, "GAME_BUILD_DRAFT_MAX_AGE", 6 * 3600)
+    oldest_draft = (
+        GameBuild.objects
+        .filter(files__isnull=True, created_at__gte=now - timedelta(seconds=draft_max_age))
+        .aggregate(oldest=Min("created_at"))["oldest"]
+    )
+    if oldest_draft is not None:
+        cutoff = min(cutoff, oldest_draft)
+    orphans = BuildBlob.objects.filter(files__isnull=True, last_referenced_at__lt=cutoff)
+    if blob_ids is not None:
+        orphans = orphans.filter(pk__in=blob_ids)
+    if dry_run:
+        sizes = list(orphans.values_list("size", flat=True))
+        return len(sizes), sum(sizes)
+
+    # Primero las filas, bloqueadas y con las dos condiciones repetidas en el
+    # DELETE: un build que marca el blob (existing_blobs) antes o mientras
+    # tanto lo conserva. Después se borran solo los archivos de las filas que
+    # de verdad se eliminaron; si eso falla queda un archivo huérfano, nunca
+    # un manifiesto que apunte a un archivo borrado.
+    with transaction.atomic():
+        candidates = {
+            pk: (path, size, variants)
+            for pk, path, size, variants in (
+                orphans.select_for_update(of=("self",)).values_list("pk", "storage_path", "size", "variants")
+            )
+        }
+        if not candidates:
+            return 0, 0
+        BuildBlob.objects.filter(pk__in=list(candidates), files__isnull=True, last_referenced_at__lt=cutoff).delete()
+        kept = set(BuildBlob.objects.filter(pk__in=list(candidates)).values_list("pk", flat=True))
+    rows = [row for pk, row in candidates.items() if pk not in kept]
+    if not rows:
+        return 0, 0
+
+    paths = []
+    for path, _, variants in rows:
+        paths.append(path)
+        paths.extend(variant_path(path, encoding) for encoding in variants or {})
+    if _is_s3_storage():
+        from .uploads import supabase_uploader
+        with supabase_uploader() as uploader:
+            uploader.delete(paths)
+    else:
+        media_root = Path(settings.MEDIA_ROOT)
+        for path in paths:
+            (media_root / path).unlink(missing_ok=True)
+
+    freed = sum(size for _, size, _ in rows)
+    logger.info("Recolector de blobs: %s blobs eliminados (%s bytes).", len(rows), freed)
+    return len(rows), freed
@@ -0,0 +1,180 @@
+"""
+Cachés con espacio de nombres, versión y protección contra estampidas.
+
+La caché por defecto (CACHES en settings, elegida con CACHE_BACKEND) es
+compartida entre procesos: una tabla de la base de datos, archivos o Redis.
+Sobre ella, cada `CacheNamespace` guarda un valor por ámbito (por ejemplo
+el id de un usuario) bajo claves con formato fijo:
+
+    <namespace>:<ámbito>        -> (versión, vence_en, valor)
+    <namespace>:<ámbito>:ver    -> versión vigente del ámbito
+    <namespace>:<ámbito>:lock   -> recálculo en curso
+
+`invalidate(ámbito)` cambia la versión del ámbito: todos los procesos dejan
+de usar el valor guardado en la siguiente lectura, sin borrar nada más.
+Entrada y versión se leen juntas con get_many (un solo viaje a la caché).
+
+Contra estampidas, el valor se guarda más tiempo que su vigencia
+(`timeout` + `grace`). Cuando vence, un solo proceso lo recalcula (el que
+toma el lock con `cache.add`) y los demás siguen respondiendo con el
+anterior durante el período de gracia; si no hay ningún valor, esperan un
+momento al que recalcula antes de calcularlo ellos mismos.
+
+Cada espacio cuenta aciertos ("hit"), valores vencidos servidos mientras
+otro recalcula ("stale"), fallos ("miss") e invalidaciones. Se acumulan en
+memoria y cada STATS_FLUSH_INTERVAL segundos se suman a contadores
+compartidos en la misma caché (`<namespace>:stats:<evento>`); los muestra
+`python manage.py cache_stats`. Con la caché en base de datos o archivos
+el incremento no es atómico: los totales son aproximados.
+"""
+import atexit
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 10        # segundos; si quien recalcula muere, otro toma el lock
+WAIT_FOR_FILL = 0.5      # segundos que se espera a otro proceso cuando no hay valor
+WAIT_STEP = 0.05
+STATS_FLUSH_INTERVAL = 10
+STATS_EVENTS = ("hit", "stale", "miss", "invalidation")
+
+_registry = {}
+
+
+def namespaces() -> dict:
+    """{nombre: CacheNamespace} de los espacios creados en este proceso."""
+    return dict(_registry)
+
+
+class CacheNamespace:
+    """Valores cacheados por ámbito bajo un mismo prefijo."""
+
+    def __init__(self, name: str, timeout: int, grace: int | None = None):
+        self.name = name
+        self.timeout = timeout
+        self.grace = timeout if grace is None else grace
+        self._counts = Counter()
+        self._counts_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        _registry[name] = self
+
+    def key(self, scope) -> str:
+        return f"{self.name}:{scope}"
+
+    def _version_key(self, scope) -> str:
+        return f"{self.key(scope)}:ver"
+
+    def _lock_key(self, scope) -> str:
+        return f"{self.key(scope)}:lock"
+
+    def _read(self, scope):
+        """(versión vigente, entrada guardada o None), en un solo get_many."""
+        key, version_key = self.key(scope), self._version_key(scope)
+        found = cache.get_many([key, version_key])
+        version = found.get(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(version_key, version, timeout=None):
+                version = cache.get(version_key, version)
+        entry = found.get(key)
+        if entry is not None and entry[0] != version:
+            entry = None
+        return version, entry
+
+    def _store(self, scope, version, value) -> None:
+        entry = (version, time.time() + self.timeout, value)
+        cache.set(self.key(scope), entry, timeout=self.timeout + self.grace)
+
+    def get_or_compute(self, scope, compute):
+        """
+        Valor de `scope`, recalculado con `compute()` si no está o venció.
+        `compute` no debe devolver None (no se distingue de "no está").
+        """
+        version, entry = self._read(scope)
+        if entry is not None and entry[1] > time.time():
+            self._count("hit")
+            return entry[2]
+
+        lock_key = self._lock_key(scope)
+        if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            self._count("miss")
+            try:
+                value = compute()
+                self._store(scope, version, value)
+                return value
+            finally:
+                cache.delete(lock_key)
+
+        if entry is not None:
+            # Otro proceso está recalculando: el valor anterior sigue sirviendo.
+            self._count("stale")
+            return entry[2]
+        deadline = time.monotonic() + WAIT_FOR_FILL
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_STEP)
+            _, entry = self._read(scope)
+            if entry is not None:
+                self._count("hit")
+                return entry[2]
+        self._count("miss")
+        return compute()
+
+    def invalidate(self, scope) -> None:
+        """Descarta el valor de `scope` en todos los procesos."""
+        cache.set(self._version_key(scope), uuid.uuid4().hex, timeout=None)
+        self._count("invalidation")
+
+    def invalidate_many(self, scopes) -> None:
+        versions = {self._version_key(scope): uuid.uuid4().hex for scope in scopes}
+        cache.set_many(versions, timeout=None)
+        self._count("invalidation", len(versions))
+
+    def _stats_key(self, event: str) -> str:
+        return f"{self.name}:stats:{event}"
+
+    def _count(self, event: str, amount: int = 1) -> None:
+        with self._counts_lock:
+            self._counts[event] += amount
+            due = time.monotonic() - self._last_flush >= STATS_FLUSH_INTERVAL
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self) -> None:
+        """Suma los contadores de este proceso a los compartidos."""
+        with self._counts_lock:
+            batch, self._counts = self._counts, Counter()
+            self._last_flush = time.monotonic()
+        for event, amount in batch.items():
+            key = self._stats_key(event)
+            if not cache.add(key, amount, timeout=None):
+                try:
+                    cache.incr(key, amount)
+                except ValueError:
+                    # Se venció o se descartó entre add e incr.
+                    cache.set(key, amount, timeout=None)
+
+    def stats(self) -> dict:
+        """Totales compartidos por evento (incluye lo pendiente de este proceso) y tasa de aciertos."""
+        self.flush_stats()
+        found = cache.get_many([self._stats_key(event) for event in STATS_EVENTS])
+        totals = {event: found.get(self._stats_key(event), 0) for event in STATS_EVENTS}
+        reads = totals["hit"] + totals["stale"] + totals["miss"]
+        totals["hit_rate"] = (totals["hit"] + totals["stale"]) / reads if reads else 0.0
+        return totals
+
+    def reset_stats(self) -> None:
+        with self._counts_lock:
+            self._counts = Counter()
+        cache.delete_many([self._stats_key(event) for event in STATS_EVENTS])
+
+
+@atexit.register
+def _flush_stats_at_exit() -> None:
+    for namespace in namespaces().values():
+        try:
+            namespace.flush_stats()
+        except Exception:
+            pass
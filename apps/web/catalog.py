@@ -0,0 +1,107 @@
+"""
+Catálogo de la página de inicio: paginación por cursor (keyset) y caché de
+los fragmentos HTML ya renderizados.
+
+Cada página se pide con un cursor (created_at, pk) del último juego de la
+página anterior, así que el costo no crece con el número de página ni con
+el tamaño del catálogo (usa el índice idx_game_catalog). El HTML de cada
+página se guarda en caché bajo una versión global que se incrementa cuando
+un juego se aprueba, se edita o se destaca.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.template.loader import render_to_string
+
+from .models import Game
+
+VERSION_KEY = "catalog:version"
+# Campos que se ven en las tarjetas del catálogo o cambian qué juegos aparecen.
+# Los contadores (descargas, calificación) se refrescan al vencer la caché.
+CATALOG_FIELDS = {
+    "title", "short_description", "cover_image", "cover_variants", "cover_placeholder",
+    "is_approved", "is_featured", "created_at",
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no tiene el formato esperado."""
+
+
+def page_size() -> int:
+    return getattr(settings, "HOME_CATALOG_PAGE_SIZE", 24)
+
+
+def encode_cursor(game) -> str:
+    """Cursor opaco "<microsegundos desde epoch>-<pk>" (aritmética entera, sin redondeos)."""
+    return f"{(game.created_at - _EPOCH) // _MICROSECOND}-{game.pk}"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    micros, sep, pk = cursor.partition("-")
+    if not sep:
+        raise InvalidCursor(cursor)
+    try:
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def catalog_page(cursor: str | None = None) -> tuple[list[Game], str | None]:
+    """Devuelve (juegos de la página, cursor de la siguiente o None si es la última)."""
+    qs = (
+        Game.objects
+        .filter(is_approved=True)
+        .only("pk", "title", "short_description", "cover_image", "cover_variants", "cover_placeholder",
+              "downloads", "rating", "is_featured", "created_at")
+        .order_by("-created_at", "-pk")
+    )
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    size = page_size()
+    games = list(qs[:size + 1])
+    next_cursor = encode_cursor(games[size - 1]) if len(games) > size else None
+    return games[:size], next_cursor
+
+
+def catalog_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, timeout=None)
+    return version
+
+
+def invalidate_catalog() -> None:
+    """Descarta todas las páginas cacheadas del catálogo."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+
+
+def rendered_page(cursor: str | None = None) -> tuple[str, str | None, int]:
+    """
+    HTML de las tarjetas de una página del catálogo, desde la caché si está.
+    Devuelve (html, cursor siguiente, cantidad de juegos).
+    """
+    key = f"catalog:v{catalog_version()}:page:{cursor or 'first'}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    from .covers import attach_cover_pictures
+
+    games, next_cursor = catalog_page(cursor)
+    attach_cover_pictures(games)
+    html = render_to_string("web/home/_catalogo_cards.html", {"games": games})
+    result = (html, next_cursor, len(games))
+    cache.set(key, result, timeout=getattr(settings, "HOME_CATALOG_CACHE_TTL", 300))
+    return result
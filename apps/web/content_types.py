@@ -0,0 +1,100 @@
+"""
+Tabla única de tipos MIME de los archivos de builds web.
+
+La usan tanto el procesamiento del ZIP (al guardar el manifiesto del build)
+como el proxy de assets, para que subida y servicio nunca discrepen.
+"""
+import mimetypes
+from pathlib import PurePosixPath
+
+BUILD_MIME_MAP = {
+    ".html": "text/html; charset=utf-8",
+    ".htm":  "text/html; charset=utf-8",
+    ".js":   "application/javascript",
+    ".mjs":  "application/javascript",
+    ".css":  "text/css",
+    ".wasm": "application/wasm",
+    ".json": "application/json",
+    ".png":  "image/png",
+    ".jpg":  "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif":  "image/gif",
+    ".webp": "image/webp",
+    ".svg":  "image/svg+xml",
+    ".ico":  "image/x-icon",
+    ".mp3":  "audio/mpeg",
+    ".ogg":  "audio/ogg",
+    ".wav":  "audio/wav",
+    ".mp4":  "video/mp4",
+    ".webm": "video/webm",
+    ".txt":  "text/plain; charset=utf-8",
+    ".xml":  "application/xml",
+    ".ttf":  "font/ttf",
+    ".otf":  "font/otf",
+    ".woff": "font/woff",
+    ".woff2": "font/woff2",
+    # Datos binarios de motores (Unity .data/.unityweb, Godot .pck).
+    ".data": "application/octet-stream",
+    ".unityweb": "application/octet-stream",
+    ".pck":  "application/octet-stream",
+}
+
+# Sufijos de archivos que el juego ya trae comprimidos (p. ej. Unity: app.wasm.gz).
+PRECOMPRESSED_SUFFIXES = {
+    ".gz": "gzip",
+    ".br": "br",
+}
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+# Tipos que vale la pena precomprimir (los formatos de imagen, audio y video
+# ya vienen comprimidos).
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/wasm",
+    "application/xml",
+    "image/svg+xml",
+    "image/x-icon",
+    "font/ttf",
+    "font/otf",
+}
+# Binarios de motores que suelen comprimirse bien (.unityweb ya viene comprimido).
+COMPRESSIBLE_EXTENSIONS = {".data", ".pck"}
+
+
+def content_type_for(path: str) -> str:
+    """Content-Type de un archivo según su extensión."""
+    ext = PurePosixPath(path).suffix.lower()
+    content_type = BUILD_MIME_MAP.get(ext)
+    if not content_type:
+        content_type, _ = mimetypes.guess_type(path)
+    return content_type or DEFAULT_CONTENT_TYPE
+
+
+def describe_asset(path: str) -> tuple[str, str]:
+    """
+    Devuelve (Content-Type, Content-Encoding) de un archivo del build.
+
+    `app.wasm.gz` se sirve como application/wasm con Content-Encoding gzip,
+    siempre que la extensión interna sea conocida; un `.gz` suelto se sirve
+    tal cual, como descarga comprimida.
+    """
+    pure = PurePosixPath(path)
+    encoding = PRECOMPRESSED_SUFFIXES.get(pure.suffix.lower())
+    if encoding:
+        inner = pure.with_suffix("")
+        if inner.suffix.lower() in BUILD_MIME_MAP:
+            return BUILD_MIME_MAP[inner.suffix.lower()], encoding
+    return content_type_for(path), ""
+
+
+def is_compressible(path: str) -> bool:
+    """Indica si conviene generar variantes gzip/brotli de un archivo del build."""
+    content_type, encoding = describe_asset(path)
+    if encoding:
+        return False
+    if PurePosixPath(path).suffix.lower() in COMPRESSIBLE_EXTENSIONS:
+        return True
+    mime = content_type.split(";", 1)[0]
+    return mime.startswith("text/") or mime in COMPRESSIBLE_TYPES
@@ -0,0 +1,185 @@
+"""
+Contadores agrupados para Game (vistas y descargas).
+
+Cada partida abierta o descarga suma en memoria del proceso y los
+incrementos pendientes se escriben juntos: un solo UPDATE para todos los
+juegos afectados, cada GAME_COUNTER_FLUSH_INTERVAL segundos (aunque no
+lleguen más clics), al acumular GAME_COUNTER_MAX_PENDING incrementos y al
+terminar el proceso. Así un pico de tráfico tras un lanzamiento destacado
+no hace un UPDATE por petición sobre la misma fila (ni espera el bloqueo
+de la fila ni el viaje extra a la base de datos).
+
+Para mostrar los totales, `current(game)` suma al valor de la base de datos
+lo pendiente en este proceso; lo de los demás procesos aparece al escribirse,
+como mucho GAME_COUNTER_FLUSH_INTERVAL segundos después.
+
+Si el proceso muere de forma abrupta (SIGKILL) se pierden a lo sumo los
+incrementos del último intervalo (y nunca más de GAME_COUNTER_MAX_PENDING
+por contador).
+
+`WriteBuffer` es la parte común (buffer, timer, reintento y escritura al
+salir); la usan también los eventos de analytics.py.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Game
+
+logger = logging.getLogger(__name__)
+
+
+_buffers = []
+
+
+class WriteBuffer:
+    """
+    Escrituras acumuladas en memoria y guardadas en lote con `_write(batch)`.
+
+    Se guardan cada GAME_COUNTER_FLUSH_INTERVAL segundos (un timer cubre el
+    caso de que no lleguen más), al acumular GAME_COUNTER_MAX_PENDING y al
+    terminar el proceso. Si `_write` falla, el lote vuelve al buffer para el
+    próximo intento, sin pasar de 10 veces GAME_COUNTER_MAX_PENDING.
+
+    Por defecto el buffer es una lista; otros buffers redefinen `_empty`,
+    `_store`, `_size` y `_restore`.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self._pending = self._empty()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+        _buffers.append(self)
+
+    @property
+    def flush_interval(self) -> float:
+        return getattr(settings, "GAME_COUNTER_FLUSH_INTERVAL", 10)
+
+    @property
+    def max_pending(self) -> int:
+        return getattr(settings, "GAME_COUNTER_MAX_PENDING", 100)
+
+    def _empty(self):
+        return []
+
+    def _store(self, item) -> None:
+        self._pending.append(item)
+
+    def _size(self) -> int:
+        return len(self._pending)
+
+    def _restore(self, batch) -> None:
+        self._pending = (batch + self._pending)[-10 * self.max_pending:]
+
+    def _write(self, batch) -> int:
+        raise NotImplementedError
+
+    def add(self, item) -> None:
+        with self._lock:
+            self._store(item)
+            due = (
+                self._size() >= self.max_pending
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            if not due and self._timer is None:
+                # Si no llega nada más, que igual se escriba al cumplirse el intervalo.
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _flush_from_timer(self) -> None:
+        try:
+            self.flush()
+        finally:
+            # El hilo del timer termina aquí: con CONN_MAX_AGE, close_old_connections()
+            # dejaría abierta su conexión hasta que la cierre el servidor.
+            connection.close()
+
+    def flush(self) -> int:
+        """Escribe lo pendiente. Devuelve lo que informa `_write` (filas guardadas)."""
+        with self._lock:
+            batch = self._pending
+            self._pending = self._empty()
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not batch:
+            return 0
+
+        try:
+            return self._write(batch)
+        except Exception:
+            # Devolverlo al buffer para el próximo intento.
+            with self._lock:
+                self._restore(batch)
+            logger.exception("No se pudieron guardar los %s pendientes.", self.label)
+            return 0
+
+
+class BatchedCounter(WriteBuffer):
+    """Acumula incrementos de un campo entero de `model` y los escribe en lote."""
+
+    def __init__(self, model, field: str):
+        self.model = model
+        self.field = field
+        super().__init__(f"contadores de {field}")
+
+    def _empty(self) -> Counter:
+        return Counter()
+
+    def _store(self, item) -> None:
+        pk, amount = item
+        self._pending[pk] += amount
+
+    def _size(self) -> int:
+        return sum(self._pending.values())
+
+    def _restore(self, batch) -> None:
+        # Un Counter no crece con los reintentos: cada juego sigue siendo una entrada.
+        self._pending.update(batch)
+
+    def increment(self, pk: int, amount: int = 1) -> None:
+        self.add((pk, amount))
+
+    def pending(self, pk: int) -> int:
+        """Incrementos de `pk` que todavía no llegaron a la base de datos."""
+        with self._lock:
+            return self._pending.get(pk, 0)
+
+    def current(self, obj) -> int:
+        """Valor del campo en `obj` más los incrementos pendientes de este proceso."""
+        return (getattr(obj, self.field) or 0) + self.pending(obj.pk)
+
+    def _write(self, batch) -> int:
+        increment = Case(
+            *[When(pk=pk, then=Value(amount)) for pk, amount in batch.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        return self.model.objects.filter(pk__in=list(batch)).update(
+            **{self.field: F(self.field) + increment}
+        )
+
+
+download_counter = BatchedCounter(Game, "downloads")
+view_counter = BatchedCounter(Game, "views")
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    try:
+        for buffer in _buffers:
+            buffer.flush()
+    finally:
+        close_old_connections()
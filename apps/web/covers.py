@@ -0,0 +1,189 @@
+"""
+Variantes responsivas de las portadas de juegos.
+
+La portada se guarda tal como se subió (GameCoversStorage). Cuando se sube
+o se cambia, la señal de Game encola un trabajo "cover" en la cola de
+builds (jobs.py) y el worker `process_build_jobs` genera, fuera del request:
+
+- una versión por ancho de GAME_COVER_WIDTHS (sin agrandar la original) en
+  cada formato de GAME_COVER_FORMATS que este Pillow sepa escribir, con
+  nombre por contenido (variants/<aa>/<sha256>-<ancho>.<formato>) y caché
+  de un año;
+- un placeholder LQIP: una miniatura WebP de PLACEHOLDER_WIDTH píxeles en
+  data URI (unos cientos de bytes) que las tarjetas pintan de fondo, estirada
+  y borrosa, hasta que llega la imagen.
+
+Game.cover_variants guarda qué portada se procesó ("source") y los archivos
+generados; si no coincide con la portada actual (trabajo pendiente o juego
+anterior a esto) se usa la imagen original. `generate_cover_variants` procesa
+los juegos existentes.
+"""
+import base64
+import hashlib
+import io
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from .catalog import invalidate_catalog
+from .models import Game
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+PLACEHOLDER_WIDTH = 16
+MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+}
+SAVE_OPTIONS = {
+    "avif": {"format": "AVIF", "quality": 55, "speed": 6},
+    "webp": {"format": "WEBP", "quality": 78, "method": 6},
+}
+
+
+def cover_widths() -> tuple[int, ...]:
+    return tuple(sorted(getattr(settings, "GAME_COVER_WIDTHS", (240, 480, 720))))
+
+
+@lru_cache(maxsize=1)
+def cover_formats() -> tuple[str, ...]:
+    """Formatos configurados que este Pillow sabe escribir, del preferido al último."""
+    configured = getattr(settings, "GAME_COVER_FORMATS", ("avif", "webp"))
+    return tuple(fmt for fmt in configured if fmt in MIME_TYPES and features.check(fmt))
+
+
+def cover_sizes() -> str:
+    """Atributo `sizes` de las tarjetas del catálogo (ancho con el que se muestran)."""
+    return getattr(settings, "GAME_COVER_SIZES", "(max-width: 600px) 50vw, 260px")
+
+
+@lru_cache(maxsize=1)
+def variants_storage():
+    """El storage de las portadas; en S3, con Cache-Control de larga duración en cada objeto."""
+    storage = Game._meta.get_field("cover_image").storage
+    if isinstance(storage, S3Boto3Storage):
+        return type(storage)(object_parameters={**storage.object_parameters, "CacheControl": CACHE_CONTROL})
+    return storage
+
+
+def variant_name(digest: str, width: int, fmt: str) -> str:
+    return f"variants/{digest[:2]}/{digest}-{width}.{fmt}"
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    output = io.BytesIO()
+    image.save(output, **SAVE_OPTIONS[fmt])
+    return output.getvalue()
+
+
+def _resize(image: Image.Image, width: int) -> Image.Image:
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def make_placeholder(image: Image.Image) -> str:
+    """LQIP: la portada reducida a PLACEHOLDER_WIDTH píxeles de ancho, como data URI WebP."""
+    tiny = _resize(image, min(PLACEHOLDER_WIDTH, image.width))
+    output = io.BytesIO()
+    tiny.save(output, format="WEBP", quality=40)
+    return f"data:image/webp;base64,{base64.b64encode(output.getvalue()).decode('ascii')}"
+
+
+def render_variants(data: bytes) -> tuple[dict, str]:
+    """
+    Genera y guarda las variantes de la imagen `data`. Devuelve (variantes,
+    placeholder); las variantes llevan el sha256, el tamaño original y los
+    archivos como {formato: {ancho: nombre}}.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    storage = variants_storage()
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        widths = [width for width in cover_widths() if width <= image.width] or [image.width]
+        files = {fmt: {} for fmt in cover_formats()}
+        for width in widths:
+            resized = _resize(image, width) if width != image.width else image
+            for fmt in files:
+                files[fmt][str(width)] = storage.save(variant_name(digest, width, fmt), ContentFile(_encode(resized, fmt)))
+
+        variants = {
+            "sha256": digest,
+            "width": image.width,
+            "height": image.height,
+            "files": files,
+        }
+        return variants, make_placeholder(image)
+
+
+def process_cover(game_id: int) -> tuple[bool, str]:
+    """
+    Genera las variantes de la portada actual de un juego (lo ejecuta el
+    worker de la cola, ver jobs.py). Mismo contrato que process_game_upload:
+    devuelve (ok, mensaje) para errores definitivos y deja propagar los
+    transitorios (red, S3) para que la cola reintente.
+    """
+    game = Game.objects.filter(pk=game_id).only("pk", "cover_image", "cover_variants").first()
+    if game is None:
+        return False, f"Juego {game_id} no encontrado."
+    source = game.cover_image.name
+    if not source or game.cover_variants.get("source") == source:
+        return True, ""
+
+    with game.cover_image.open("rb") as cover_file:
+        data = cover_file.read()
+    try:
+        variants, placeholder = render_variants(data)
+    except (Image.UnidentifiedImageError, Image.DecompressionBombError, SyntaxError) as exc:
+        logger.warning("Portada de %s inválida: %s", game_id, exc)
+        return False, "La portada no es una imagen válida."
+
+    variants["source"] = source
+    # Solo si la portada no cambió mientras se procesaba (si cambió, ya hay otro trabajo encolado).
+    updated = Game.objects.filter(pk=game_id, cover_image=source).update(
+        cover_variants=variants,
+        cover_placeholder=placeholder,
+    )
+    if updated:
+        # update() no emite post_save: las tarjetas cacheadas deben mostrar las variantes.
+        invalidate_catalog()
+    return True, ""
+
+
+def needs_variants(game) -> bool:
+    return bool(game.cover_image.name) and (game.cover_variants or {}).get("source") != game.cover_image.name
+
+
+def cover_picture(game) -> dict:
+    """
+    Datos del <picture> de la portada: `src` (la original, de respaldo),
+    `sources` (un srcset por formato), `sizes` y `placeholder`.
+    """
+    src = game.cover_image.url if game.cover_image else ""
+    if needs_variants(game):
+        return {"src": src, "sources": [], "sizes": "", "placeholder": ""}
+
+    storage = variants_storage()
+    sources = []
+    for fmt, files in game.cover_variants.get("files", {}).items():
+        if fmt not in MIME_TYPES or not files:
+            continue
+        srcset = ", ".join(
+            f"{storage.url(name)} {width}w"
+            for width, name in sorted(files.items(), key=lambda item: int(item[0]))
+        )
+        sources.append({"type": MIME_TYPES[fmt], "srcset": srcset})
+    return {"src": src, "sources": sources, "sizes": cover_sizes(), "placeholder": game.cover_placeholder}
+
+
+def attach_cover_pictures(games) -> None:
+    """Agrega `cover_picture` a cada juego (no consulta la base de datos)."""
+    for game in games:
+        game.cover_picture = cover_picture(game)
@@ -0,0 +1,274 @@
+"""
+Cola persistente de procesamiento de builds (modelo BuildJob).
+
+Además de los ZIP, la cola procesa las portadas (trabajos "cover", ver
+covers.py): generar sus variantes tampoco debe bloquear el request.
+
+Reemplaza los hilos daemon que se lanzaban por cada subida: los trabajos
+quedan en la base de datos (PostgreSQL o SQLite, sin broker externo) y los
+consume un pool acotado de hilos en un proceso aparte:
+
+    python manage.py process_build_jobs --workers 2
+
+El worker debe correr en la misma máquina que el servidor web, porque los
+ZIP recién subidos se guardan en MEDIA_ROOT/games/temp.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .catalog import invalidate_catalog
+from .covers import process_cover
+from .models import BuildJob, Game
+from .services import process_game_upload
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_build_job(game_id: int, temp_path: str | None = None) -> BuildJob:
+    """Encola el procesamiento del ZIP de un juego y lo marca como en procesamiento."""
+    job = BuildJob.objects.create(game_id=game_id, temp_path=temp_path or "")
+    Game.objects.filter(pk=game_id).update(is_processing=True, processing_error="")
+    return job
+
+
+def enqueue_cover_job(game_id: int) -> BuildJob:
+    """Encola la generación de las variantes de la portada (una pendiente por juego alcanza)."""
+    pending = BuildJob.objects.filter(
+        game_id=game_id, kind=BuildJob.KIND_COVER, state=BuildJob.STATE_PENDING
+    ).first()
+    return pending or BuildJob.objects.create(game_id=game_id, kind=BuildJob.KIND_COVER)
+
+
+def claim_next_job(worker_id: str) -> BuildJob | None:
+    """
+    Toma el siguiente trabajo pendiente.
+
+    El reclamo es un UPDATE condicional (state=pending -> running), así que
+    dos workers nunca se quedan con el mismo trabajo, tanto en PostgreSQL
+    como en SQLite (que no soporta SELECT ... FOR UPDATE SKIP LOCKED).
+    """
+    now = timezone.now()
+    candidates = list(
+        BuildJob.objects
+        .filter(state=BuildJob.STATE_PENDING, available_at__lte=now)
+        .order_by("available_at", "pk")
+        .values_list("pk", flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = BuildJob.objects.filter(pk=pk, state=BuildJob.STATE_PENDING).update(
+            state=BuildJob.STATE_RUNNING,
+            worker=worker_id,
+            attempts=F("attempts") + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return BuildJob.objects.get(pk=pk)
+    return None
+
+
+def _finish_game(game_id: int, ok: bool, error_message: str = "") -> None:
+    if ok:
+        Game.objects.filter(pk=game_id).update(is_processing=False)
+    else:
+        Game.objects.filter(pk=game_id).update(
+            is_processing=False,
+            processing_error=error_message[:255],
+            is_approved=False,
+        )
+        # update() no emite post_save: el juego despublicado sale del catálogo.
+        invalidate_catalog()
+
+
+def run_build_job(job: BuildJob) -> None:
+    """Ejecuta un trabajo ya reclamado y registra el resultado."""
+    max_attempts = getattr(settings, "BUILD_JOB_MAX_ATTEMPTS", 3)
+
+    try:
+        if job.kind == BuildJob.KIND_COVER:
+            ok, error_message = process_cover(job.game_id)
+        else:
+            ok, error_message = process_game_upload(job.game_id, job.temp_path or None)
+    except Exception as exc:
+        # Error transitorio: reintentar con backoff mientras queden intentos.
+        error_message = f"Error al procesar el archivo: {str(exc)[:200]}"
+        if job.attempts < max_attempts:
+            delay = getattr(settings, "BUILD_JOB_RETRY_DELAY", 30) * (2 ** (job.attempts - 1))
+            BuildJob.objects.filter(pk=job.pk).update(
+                state=BuildJob.STATE_PENDING,
+                last_error=error_message,
+                available_at=timezone.now() + timedelta(seconds=delay),
+            )
+            logger.warning(
+                "%s %s: intento %s falló, reintento en %ss: %s",
+                job.get_kind_display(), job.game_id, job.attempts, delay, exc,
+            )
+            return
+        ok = False
+
+    BuildJob.objects.filter(pk=job.pk).update(
+        state=BuildJob.STATE_DONE if ok else BuildJob.STATE_FAILED,
+        last_error="" if ok else error_message[:255],
+        finished_at=timezone.now(),
+    )
+    if job.kind == BuildJob.KIND_BUILD:
+        # Una portada que falla no despublica el juego: se sigue usando la original.
+        _finish_game(job.game_id, ok, error_message)
+    if not ok:
+        logger.error("%s %s falló: %s", job.get_kind_display(), job.game_id, error_message)
+
+
+def recover_stale_jobs() -> int:
+    """
+    Recupera trabajos interrumpidos (worker reciclado, deploy, caída).
+
+    - Trabajos `running` sin latido reciente vuelven a `pending` (o pasan a
+      `failed` si ya agotaron sus intentos).
+    - Juegos que quedaron con is_processing=True sin ningún trabajo activo
+      (por ejemplo, de los antiguos hilos daemon) se vuelven a encolar.
+
+    Devuelve cuántos trabajos se recuperaron.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, "BUILD_JOB_STALE_AFTER", 300))
+    max_attempts = getattr(settings, "BUILD_JOB_MAX_ATTEMPTS", 3)
+    stale = BuildJob.objects.filter(state=BuildJob.STATE_RUNNING, heartbeat_at__lt=stale_before)
+
+    recovered = stale.filter(attempts__lt=max_attempts).update(
+        state=BuildJob.STATE_PENDING,
+        last_error="Trabajo interrumpido; reintentando.",
+        available_at=now,
+    )
+    for pk, game_id, kind in list(stale.values_list("pk", "game_id", "kind")):
+        # UPDATE condicional: si otro worker ya lo dio por fallido, no se repite.
+        failed = stale.filter(pk=pk).update(
+            state=BuildJob.STATE_FAILED,
+            last_error="Trabajo interrumpido demasiadas veces.",
+            finished_at=now,
+        )
+        if failed and kind == BuildJob.KIND_BUILD:
+            _finish_game(game_id, False, "El procesamiento se interrumpió. Vuelve a subir el archivo.")
+
+    active = BuildJob.objects.filter(
+        kind=BuildJob.KIND_BUILD, state__in=[BuildJob.STATE_PENDING, BuildJob.STATE_RUNNING]
+    )
+    orphans = Game.objects.filter(is_processing=True).exclude(pk__in=active.values("game_id"))
+    for game_id, game_file in list(orphans.values_list("pk", "game_file")):
+        # Se toma el juego con un UPDATE condicional antes de encolarlo: si
+        # varios workers recuperan a la vez, solo uno crea el trabajo.
+        if not orphans.filter(pk=game_id).update(is_processing=False):
+            continue
+        if game_file:
+            enqueue_build_job(game_id)
+            recovered += 1
+        else:
+            _finish_game(game_id, False, "El procesamiento se interrumpió. Vuelve a subir el archivo.")
+
+    if recovered:
+        logger.warning("Cola de builds: %s trabajos recuperados.", recovered)
+    return recovered
+
+
+def queue_stats() -> dict:
+    """
+    Profundidad y latencia de la cola: trabajos pendientes/en ejecución,
+    antigüedad del pendiente más viejo, y espera/duración media de los
+    últimos 100 trabajos iniciados (en segundos).
+    """
+    now = timezone.now()
+    pending = BuildJob.objects.filter(state=BuildJob.STATE_PENDING)
+    oldest = pending.order_by("created_at").values_list("created_at", flat=True).first()
+
+    recent = list(
+        BuildJob.objects
+        .filter(started_at__isnull=False)
+        .order_by("-started_at")
+        .values_list("created_at", "started_at", "finished_at")[:100]
+    )
+    waits = [(started - created).total_seconds() for created, started, _ in recent]
+    runs = [(finished - started).total_seconds() for _, started, finished in recent if finished]
+
+    return {
+        "pending": pending.count(),
+        "running": BuildJob.objects.filter(state=BuildJob.STATE_RUNNING).count(),
+        "failed_24h": BuildJob.objects.filter(
+            state=BuildJob.STATE_FAILED, finished_at__gte=now - timedelta(hours=24)
+        ).count(),
+        "oldest_pending_age": (now - oldest).total_seconds() if oldest else 0.0,
+        "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+        "avg_run": sum(runs) / len(runs) if runs else 0.0,
+    }
+
+
+class BuildQueueWorker:
+    """
+    Bucle del worker: reclama trabajos hasta llenar su pool de hilos, envía
+    latidos de los trabajos en curso y recupera trabajos huérfanos.
+    SIGTERM/SIGINT detienen la toma de trabajos y esperan a los que corren.
+    """
+
+    def __init__(self, workers: int | None = None, poll_interval: float = 2.0):
+        self.workers = max(1, workers or getattr(settings, "BUILD_QUEUE_WORKERS", 2))
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._running: set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self, *args) -> None:
+        self._stop.set()
+
+    def _execute(self, job: BuildJob) -> None:
+        close_old_connections()
+        try:
+            run_build_job(job)
+        except Exception:
+            logger.exception("Build %s: error inesperado en el worker.", job.game_id)
+        finally:
+            with self._lock:
+                self._running.discard(job.pk)
+            close_old_connections()
+
+    def _heartbeat(self) -> None:
+        with self._lock:
+            running = list(self._running)
+        if running:
+            BuildJob.objects.filter(pk__in=running, state=BuildJob.STATE_RUNNING).update(heartbeat_at=timezone.now())
+
+    def run(self, once: bool = False) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info("Worker de builds %s iniciado con %s hilos.", self.worker_id, self.workers)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="build-job") as pool:
+            while not self._stop.is_set():
+                recover_stale_jobs()
+                self._heartbeat()
+
+                claimed_any = False
+                while len(self._running) < self.workers:
+                    job = claim_next_job(self.worker_id)
+                    if job is None:
+                        break
+                    claimed_any = True
+                    with self._lock:
+                        self._running.add(job.pk)
+                    pool.submit(self._execute, job)
+
+                if once and not claimed_any and not self._running:
+                    break
+                self._stop.wait(self.poll_interval)
+
+        close_old_connections()
+        logger.info("Worker de builds %s detenido.", self.worker_id)
@@ -0,0 +1,107 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import FileResponse
+from django.test import RequestFactory
+
+from apps.web.sendfile import MODE_NGINX, sendfile_response
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _drain(sock, total):
+    """Lee y descarta `total` bytes (hace de cliente)."""
+    remaining = total
+    while remaining > 0:
+        data = sock.recv(min(CHUNK_SIZE, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+
+
+def _python_stream(path, sock, size):
+    """Camino actual: FileResponse iterado en Python, bloque por bloque."""
+    response = FileResponse(open(path, "rb"))
+    for chunk in response.streaming_content:
+        sock.sendall(chunk)
+    response.close()
+
+
+def _os_sendfile(path, sock, size):
+    """Lo que hace wsgi.file_wrapper de Gunicorn: el kernel copia archivo -> socket."""
+    with open(path, "rb") as fileobj:
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(sock.fileno(), fileobj.fileno(), offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+
+class Command(BaseCommand):
+    help = 'Compara la entrega de archivos grandes: streaming en Python, os.sendfile y X-Accel-Redirect'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=200, help='Tamaño del archivo de prueba.')
+        parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por modo.')
+        parser.add_argument('--file', help='Usar un archivo existente de MEDIA_ROOT en vez de generar uno.')
+
+    def handle(self, *args, **options):
+        tmp = None
+        path = options['file']
+        if not path:
+            # Dentro de MEDIA_ROOT, que es lo único que expone la location interna de Nginx.
+            os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+            tmp = tempfile.NamedTemporaryFile(dir=settings.MEDIA_ROOT, prefix='bench-', suffix='.zip', delete=False)
+            block = os.urandom(CHUNK_SIZE)
+            for _ in range(options['size_mb']):
+                tmp.write(block)
+            tmp.close()
+            path = tmp.name
+        size = os.path.getsize(path)
+        self.stdout.write(f"Archivo: {path} ({size / 1_048_576:.0f} MB), {options['repeat']} repeticiones\n")
+
+        try:
+            for label, sender in (('Python (FileResponse)', _python_stream), ('os.sendfile', _os_sendfile)):
+                self._report(label, size, [self._transfer(sender, path, size) for _ in range(options['repeat'])])
+            self._report('X-Accel-Redirect', size, [self._accel(path) for _ in range(options['repeat'])], headers_only=True)
+        finally:
+            if tmp is not None:
+                os.unlink(tmp.name)
+
+    def _transfer(self, sender, path, size):
+        server, client = socket.socketpair()
+        reader = threading.Thread(target=_drain, args=(client, size))
+        reader.start()
+        cpu = time.thread_time()
+        started = time.perf_counter()
+        sender(path, server, size)
+        server.shutdown(socket.SHUT_WR)
+        reader.join()
+        elapsed = time.perf_counter() - started
+        # CPU del hilo que atiende la petición (el lector que hace de cliente no cuenta).
+        worker_cpu = time.thread_time() - cpu
+        server.close()
+        client.close()
+        return elapsed, worker_cpu
+
+    def _accel(self, path):
+        request = RequestFactory().get('/juegos/1/descargar/')
+        cpu = time.thread_time()
+        started = time.perf_counter()
+        sendfile_response(request, path, 'application/zip', attachment='archivo.zip', mode=MODE_NGINX)
+        return time.perf_counter() - started, time.thread_time() - cpu
+
+    def _report(self, label, size, samples, headers_only=False):
+        elapsed = min(sample[0] for sample in samples)
+        cpu = min(sample[1] for sample in samples)
+        if headers_only:
+            detail = 'el proxy envía los bytes; Django solo arma encabezados'
+        else:
+            detail = f"{size / 1_048_576 / elapsed:8.0f} MB/s"
+        self.stdout.write(f"{label:<24} {elapsed * 1000:9.1f} ms  CPU del worker {cpu * 1000:8.1f} ms  {detail}")
@@ -0,0 +1,102 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from apps.web.models import Game
+from apps.web.search import rebuild_search_vectors, search_games, uses_full_text
+
+WORDS = [
+    'aventura', 'acción', 'castillo', 'oscuro', 'dragón', 'espacial', 'nave', 'zombi', 'ciudad',
+    'carreras', 'autos', 'bosque', 'mágico', 'guerrero', 'pirata', 'isla', 'tesoro', 'robot',
+    'laberinto', 'misterio', 'fútbol', 'estrategia', 'reino', 'batalla', 'héroe', 'planeta',
+    'granja', 'cocina', 'música', 'ninja', 'samurái', 'desierto', 'océano', 'volcán', 'invierno',
+]
+QUERIES = [
+    ('aventura', None),
+    ('dragon', None),
+    ('accion espacial', None),
+    ('"castillo oscuro"', None),
+    ('carreras -autos', None),
+    ('heroes', 'rpg'),
+    ('zombis', 'terror'),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de la búsqueda de juegos sobre un catálogo sintético (se descarta al terminar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=100_000, help='Juegos sintéticos a generar.')
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por consulta.')
+
+    def handle(self, *args, **options):
+        engine = 'tsvector + GIN' if uses_full_text() else 'fallback icontains (sin índice)'
+        self.stdout.write(f"Motor: {connection.vendor}, búsqueda: {engine}")
+        try:
+            with transaction.atomic():
+                self._populate(options['games'])
+                self._run(options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Datos sintéticos descartados.')
+
+    def _populate(self, count):
+        rng = random.Random(42)
+        user = get_user_model().objects.create(username='__benchmark_search__')
+        genres = [key for key, _ in Game.GENRE_CHOICES]
+        started = time.perf_counter()
+        batch = []
+        for i in range(count):
+            title = ' '.join(rng.sample(WORDS, 3)).capitalize()
+            batch.append(Game(
+                title=title,
+                short_description=' '.join(rng.sample(WORDS, 8)),
+                description=' '.join(rng.choices(WORDS, k=60)),
+                genre=rng.choice(genres),
+                cover_image='bench.png',
+                uploaded_by=user,
+                is_approved=True,
+            ))
+            if len(batch) == 5000:
+                Game.objects.bulk_create(batch)
+                batch = []
+        Game.objects.bulk_create(batch)
+        rebuild_search_vectors()
+        if uses_full_text():
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE web_game')
+        self.stdout.write(f"{count} juegos generados e indexados en {time.perf_counter() - started:.1f}s\n")
+
+    def _time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+    def _run(self, repeat):
+        self.stdout.write(f"{'consulta':<28}{'género':<10}{'p50 ms':>10}{'p95 ms':>10}{'icontains p50':>16}")
+        for query, genre in QUERIES:
+            p50, p95 = self._time(lambda: list(search_games(query, genre)[:24]), repeat)
+
+            def naive():
+                qs = Game.objects.filter(
+                    Q(title__icontains=query) | Q(short_description__icontains=query) | Q(description__icontains=query)
+                )
+                if genre:
+                    qs = qs.filter(genre=genre)
+                return list(qs.order_by('-created_at')[:24])
+
+            naive_p50, _ = self._time(naive, max(3, repeat // 4))
+            self.stdout.write(f"{query:<28}{genre or '-':<10}{p50:>10.1f}{p95:>10.1f}{naive_p50:>16.1f}")
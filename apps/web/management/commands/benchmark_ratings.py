@@ -0,0 +1,107 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, IntegrityError, close_old_connections
+
+from apps.web.models import Game, GameRating
+from apps.web.ratings import RatingError, submit_rating
+
+USERNAME_PREFIX = '__benchmark_rating_'
+
+
+def legacy_submit(game_id, user, value):
+    """Camino anterior de GamePlayView.post: exists(), create() y promedio móvil en Python desde el objeto leído."""
+    game = Game.objects.get(pk=game_id)
+    if GameRating.objects.filter(game=game, user=user).exists():
+        raise RatingError('duplicada')
+    GameRating.objects.create(game=game, user=user, value=value)
+    votes_before = game.rating_votes
+    total_before = game.rating * votes_before
+    game.rating = ((total_before + Decimal(value)) / Decimal(votes_before + 1)).quantize(
+        Decimal('0.1'), rounding=ROUND_HALF_UP
+    )
+    game.rating_votes = votes_before + 1
+    game.save(update_fields=['rating', 'rating_votes'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara con votos simultáneos el cálculo anterior de calificaciones y el atómico '
+        '(crea datos temporales y los borra al terminar)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=200, help='Usuarios que califican cada juego.')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=2, help='Envíos simultáneos por usuario (los extra son duplicados).')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        owner = User.objects.create(username=f'{USERNAME_PREFIX}owner__')
+        try:
+            voters = User.objects.bulk_create(
+                [User(username=f'{USERNAME_PREFIX}{i}__') for i in range(options['voters'])]
+            )
+            # bulk_create no devuelve pk en todos los motores.
+            voters = list(User.objects.filter(username__in=[voter.username for voter in voters]))
+            rng = random.Random(42)
+            votes = [(voter, rng.randint(1, 5)) for voter in voters]
+
+            self.stdout.write(
+                f"{'camino':<10}{'tiempo s':>10}{'votos/s':>10}{'aceptados':>11}{'duplic.':>9}"
+                f"{'errores':>9}{'rating_votes':>14}{'filas':>7}{'promedio':>10}{'exacto':>8}"
+            )
+            for label, submit in (('anterior', legacy_submit), ('atómico', submit_rating)):
+                game = Game.objects.create(
+                    title=f'Benchmark calificaciones ({label})',
+                    short_description='Benchmark',
+                    description='Benchmark',
+                    cover_image='bench.png',
+                    uploaded_by=owner,
+                )
+                self._run(label, submit, game, votes, options['threads'], options['attempts'])
+        finally:
+            # Los juegos y sus calificaciones se borran en cascada.
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def _run(self, label, submit, game, votes, threads, attempts):
+        outcomes = {'ok': 0, 'duplicate': 0, 'error': 0}
+        lock = threading.Lock()
+
+        def vote(user, value):
+            try:
+                submit(game.pk, user, value)
+                outcome = 'ok'
+            except RatingError:
+                outcome = 'duplicate'
+            except (IntegrityError, DatabaseError):
+                # En el camino anterior, dos envíos del mismo usuario pasan el exists() y uno choca con la restricción.
+                outcome = 'error'
+            finally:
+                close_old_connections()
+            with lock:
+                outcomes[outcome] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+            for user, value in votes:
+                for _ in range(max(attempts, 1)):
+                    pool.submit(vote, user, value)
+        elapsed = time.perf_counter() - started
+
+        game.refresh_from_db(fields=['rating', 'rating_votes'])
+        values = list(GameRating.objects.filter(game=game).values_list('value', flat=True))
+        exact = (
+            (Decimal(sum(values)) / len(values)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+            if values else Decimal('0')
+        )
+        self.stdout.write(
+            f"{label:<10}{elapsed:>10.2f}{outcomes['ok'] / elapsed:>10.0f}{outcomes['ok']:>11}"
+            f"{outcomes['duplicate']:>9}{outcomes['error']:>9}{game.rating_votes:>14}{len(values):>7}"
+            f"{game.rating:>10}{exact:>8}"
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from apps.web.build_store import collect_garbage, dedup_stats, top_shared_blobs
+
+
+def _mb(num_bytes):
+    return f"{num_bytes / 1_048_576:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = 'Reporta cuánto espacio ahorra la deduplicación de builds y limpia blobs huérfanos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gc', action='store_true', help='Elimina los blobs que ningún build usa.')
+        parser.add_argument('--grace', type=int, default=3600, help='Segundos mínimos sin referencias antes de borrar.')
+        parser.add_argument('--dry-run', action='store_true', help='Con --gc, solo muestra qué se borraría.')
+
+    def handle(self, *args, **options):
+        stats = dedup_stats()
+        self.stdout.write(f"Builds:              {stats['builds']}")
+        self.stdout.write(f"Archivos (lógicos):  {stats['files']}  ({_mb(stats['logical_bytes'])})")
+        self.stdout.write(f"Blobs (almacenados): {stats['blobs']}  ({_mb(stats['stored_bytes'])})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Ahorro:              {_mb(stats['saved_bytes'])}  (x{stats['ratio']:.2f})"
+        ))
+
+        shared = list(top_shared_blobs())
+        if shared:
+            self.stdout.write('\nBlobs más compartidos:')
+            for blob in shared:
+                self.stdout.write(f"  {blob.sha256[:12]}  {_mb(blob.size):>10}  {blob.refs} referencias")
+
+        if options['gc']:
+            count, freed = collect_garbage(grace_seconds=options['grace'], dry_run=options['dry_run'])
+            verb = 'Se borrarían' if options['dry_run'] else 'Eliminados'
+            self.stdout.write(self.style.WARNING(f"\n{verb} {count} blobs huérfanos ({_mb(freed)})."))
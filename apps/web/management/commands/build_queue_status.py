@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.web.jobs import queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Muestra la profundidad y la latencia de la cola de builds'
+
+    def handle(self, *args, **kwargs):
+        stats = queue_stats()
+        self.stdout.write(f"Pendientes:            {stats['pending']}")
+        self.stdout.write(f"En ejecución:          {stats['running']}")
+        self.stdout.write(f"Fallidos (24h):        {stats['failed_24h']}")
+        self.stdout.write(f"Pendiente más antiguo: {stats['oldest_pending_age']:.1f}s")
+        self.stdout.write(f"Espera media:          {stats['avg_wait']:.1f}s")
+        self.stdout.write(f"Duración media:        {stats['avg_run']:.1f}s")
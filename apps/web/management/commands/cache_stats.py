@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.web.caching import namespaces
+
+
+class Command(BaseCommand):
+    help = 'Muestra aciertos, fallos e invalidaciones de las cachés con espacio de nombres'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Pone los contadores en cero después de mostrarlos.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'Caché':<16} {'Aciertos':>10} {'Vencidos':>10} {'Fallos':>10} {'Invalid.':>10} {'% acierto':>10}")
+        for name, namespace in sorted(namespaces().items()):
+            stats = namespace.stats()
+            self.stdout.write(
+                f"{name:<16} {stats['hit']:>10} {stats['stale']:>10} {stats['miss']:>10} "
+                f"{stats['invalidation']:>10} {stats['hit_rate'] * 100:>9.1f}%"
+            )
+            if options['reset']:
+                namespace.reset_stats()
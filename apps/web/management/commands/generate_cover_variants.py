@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.web.covers import needs_variants, process_cover
+from apps.web.jobs import enqueue_cover_job
+from apps.web.models import Game
+
+
+def _process(game_id):
+    close_old_connections()
+    try:
+        return process_cover(game_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Genera las variantes responsivas y el placeholder de las portadas que no los tienen'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Portadas procesándose a la vez.')
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help='En vez de procesarlas aquí, encolarlas para el worker `process_build_jobs`.',
+        )
+
+    def handle(self, *args, **options):
+        games = Game.objects.exclude(cover_image='').only('pk', 'cover_image', 'cover_variants')
+        pending = [game.pk for game in games.iterator() if needs_variants(game)]
+        if not pending:
+            self.stdout.write('Todas las portadas tienen sus variantes.')
+            return
+
+        if options['enqueue']:
+            for game_id in pending:
+                enqueue_cover_job(game_id)
+            self.stdout.write(self.style.SUCCESS(f'{len(pending)} portadas encoladas.'))
+            return
+
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1), thread_name_prefix='cover') as pool:
+            futures = {pool.submit(_process, game_id): game_id for game_id in pending}
+            for future in as_completed(futures):
+                try:
+                    ok, error_message = future.result()
+                except Exception as exc:
+                    ok, error_message = False, str(exc)
+                if ok:
+                    done += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f'Juego {futures[future]}: {error_message}')
+        self.stdout.write(self.style.SUCCESS(f'{done} portadas procesadas, {failed} con errores.'))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.web.jobs import BuildQueueWorker
+
+
+class Command(BaseCommand):
+    help = 'Worker de la cola de builds: extrae y publica los ZIP de juegos subidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'BUILD_QUEUE_WORKERS', 2),
+            help='Cantidad máxima de builds procesándose a la vez.',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=2.0,
+            help='Segundos entre consultas a la cola.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Procesa lo pendiente y termina (útil para cron).',
+        )
+
+    def handle(self, *args, **options):
+        worker = BuildQueueWorker(workers=options['workers'], poll_interval=options['poll'])
+        self.stdout.write(f'Worker {worker.worker_id} procesando la cola con {worker.workers} hilos...')
+        worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS('Worker detenido.'))
@@ -0,0 +1,39 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.web.rankings import BOARDS, rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las clasificaciones de juegos (tendencia, mejor calificados, más jugados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Segundos entre cálculos; 0 calcula una vez y termina (para cron).',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if not interval:
+            self._rebuild()
+            return
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+        while not stop.is_set():
+            close_old_connections()
+            self._rebuild()
+            stop.wait(interval)
+        self.stdout.write(self.style.SUCCESS('Detenido.'))
+
+    def _rebuild(self):
+        started = time.perf_counter()
+        counts = rebuild_rankings()
+        summary = ', '.join(f'{BOARDS[board]}: {count}' for board, count in counts.items())
+        self.stdout.write(f'Clasificaciones recalculadas en {time.perf_counter() - started:.2f}s ({summary} filas).')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.web.search import rebuild_search_vectors, uses_full_text
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el vector de búsqueda de todos los juegos (solo PostgreSQL)'
+
+    def handle(self, *args, **options):
+        if not uses_full_text():
+            self.stdout.write(self.style.WARNING('La base de datos no es PostgreSQL: la búsqueda usa el fallback sin índice.'))
+            return
+        updated = rebuild_search_vectors()
+        self.stdout.write(self.style.SUCCESS(f'Vectores de búsqueda recalculados: {updated} juegos.'))
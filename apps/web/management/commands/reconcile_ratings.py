@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.web.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la suma, los votos y el promedio de cada juego desde sus calificaciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--game', type=int, action='append', dest='games', help='Solo este juego (repetible).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Juegos por UPDATE.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta los juegos desfasados.')
+
+    def handle(self, *args, **options):
+        stale = reconcile_ratings(options['games'], dry_run=options['dry_run'], batch_size=options['batch_size'])
+        if options['dry_run']:
+            self.stdout.write(f'{stale} juegos con calificaciones desfasadas.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{stale} juegos corregidos.'))
@@ -0,0 +1,53 @@
+import signal
+import threading
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.web.analytics import prune_events, rollup_events
+
+
+class Command(BaseCommand):
+    help = 'Resume los eventos de juegos en estadísticas por día y borra los que superan la retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Recalcula desde este día (AAAA-MM-DD) en vez de desde el último resumido.')
+        parser.add_argument('--no-prune', action='store_true', help='No borra eventos viejos.')
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Segundos entre ejecuciones; 0 ejecuta una vez y termina (para cron).',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since debe tener el formato AAAA-MM-DD.')
+
+        interval = options['interval']
+        if not interval:
+            self._run(since, not options['no_prune'])
+            return
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+        while not stop.is_set():
+            close_old_connections()
+            self._run(since, not options['no_prune'])
+            since = None
+            stop.wait(interval)
+        self.stdout.write(self.style.SUCCESS('Detenido.'))
+
+    def _run(self, since, prune):
+        started = time.perf_counter()
+        rows = rollup_events(since)
+        pruned = prune_events() if prune else 0
+        self.stdout.write(
+            f'{rows} filas diarias actualizadas, {pruned} eventos borrados '
+            f'({time.perf_counter() - started:.2f}s).'
+        )
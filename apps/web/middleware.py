@@ -0,0 +1,166 @@
+"""
+Perfilado de consultas SQL por request (opcional, para desarrollo y tests).
+
+Con QUERY_PROFILER=True, QueryProfilerMiddleware envuelve la ejecución de
+consultas de cada conexión (`connection.execute_wrapper`) durante el
+request y registra:
+
+- cantidad de consultas y tiempo total en la base de datos;
+- consultas repetidas por huella (el SQL con los literales y las listas
+  IN normalizados): la misma huella muchas veces suele ser un N+1, por
+  ejemplo un avatar o un perfil resuelto por cada amigo;
+- consultas idénticas (mismo SQL y mismos parámetros), que sobran siempre.
+
+Las sentencias de transacción (BEGIN, SAVEPOINT...) y las de la tabla de
+DatabaseCache se cuentan aparte: no son de la vista, no se marcan como N+1
+ni cuentan para el presupuesto.
+
+Cada respuesta lleva un encabezado `Server-Timing` (db y app) que muestran
+las herramientas de desarrollo del navegador, y se registra una línea en el
+logger "apps.web.queries" (warning si hay N+1 o se pasa del presupuesto).
+
+Presupuestos: QUERY_BUDGETS = {"<namespace:nombre de la vista>": máximo}
+y QUERY_BUDGET_DEFAULT para las demás. Con QUERY_PROFILER_STRICT=True,
+pasarse lanza QueryBudgetExceeded: en los tests el cliente la propaga y el
+test falla.
+
+Sin QUERY_PROFILER el middleware se descarta al arrancar (MiddlewareNotUsed)
+y no agrega ningún costo.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("apps.web.queries")
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*%s\s*,?)+\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+_TRANSACTION = re.compile(r"^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE SAVEPOINT)\b", re.IGNORECASE)
+
+
+class QueryBudgetExceeded(Exception):
+    """Una vista hizo más consultas que su presupuesto (solo con QUERY_PROFILER_STRICT)."""
+
+
+def fingerprint(sql: str) -> str:
+    """SQL sin los valores concretos: agrupa las consultas que solo cambian de parámetros."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def cache_tables() -> set[str]:
+    """Tablas de las cachés configuradas con DatabaseCache."""
+    return {
+        options["LOCATION"]
+        for options in settings.CACHES.values()
+        if options.get("BACKEND") == "django.core.cache.backends.db.DatabaseCache"
+    }
+
+
+class QueryProfile:
+    """execute_wrapper que cuenta y cronometra las consultas de un request."""
+
+    def __init__(self, ignored_tables=()):
+        self.count = 0
+        self.overhead = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.identical = Counter()
+        self._ignored_tables = tuple(f'"{table}"' for table in ignored_tables)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            if _TRANSACTION.match(sql) or any(table in sql for table in self._ignored_tables):
+                self.overhead += 1
+            else:
+                self.fingerprints[fingerprint(sql)] += 1
+                self.identical[(sql, repr(params))] += 1
+
+    @property
+    def view_count(self) -> int:
+        """Consultas propias de la vista (sin transacciones ni caché)."""
+        return self.count - self.overhead
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Huellas ejecutadas al menos `threshold` veces, de la más repetida a la menos."""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+    def duplicates(self) -> int:
+        """Consultas idénticas a una anterior del mismo request."""
+        return sum(count - 1 for count in self.identical.values())
+
+
+def query_budget(view_name: str) -> int | None:
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    return budgets.get(view_name, getattr(settings, "QUERY_BUDGET_DEFAULT", None))
+
+
+class QueryProfilerMiddleware:
+    """Cuenta las consultas de cada request; ver el docstring del módulo."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_PROFILER", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.ignored_tables = cache_tables()
+
+    def __call__(self, request):
+        profile = QueryProfile(ignored_tables=self.ignored_tables)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view_name = (match.view_name if match else "") or request.path
+        self._add_server_timing(response, profile, elapsed)
+        self._report(request, view_name, profile)
+        return response
+
+    @staticmethod
+    def _add_server_timing(response, profile, elapsed) -> None:
+        timing = (
+            f'db;dur={profile.duration * 1000:.1f};desc="{profile.view_count}+{profile.overhead} consultas", '
+            f"app;dur={elapsed * 1000:.1f}"
+        )
+        existing = response.get("Server-Timing")
+        response["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+
+    def _report(self, request, view_name, profile) -> None:
+        threshold = getattr(settings, "QUERY_PROFILER_REPEAT_THRESHOLD", 5)
+        repeated = profile.repeated(threshold)
+        budget = query_budget(view_name)
+        over_budget = budget is not None and profile.view_count > budget
+
+        summary = (
+            f"{request.method} {request.path} ({view_name}): {profile.view_count} consultas "
+            f"(+{profile.overhead} de transacción y caché), {profile.duration * 1000:.1f} ms en la base de datos, "
+            f"{profile.duplicates()} idénticas"
+        )
+        if budget is not None:
+            summary += f", presupuesto {budget}"
+        if repeated or over_budget:
+            details = "".join(f"\n  {count}x {sql[:300]}" for sql, count in repeated[:5])
+            logger.warning("%s%s%s", summary, " (posible N+1)" if repeated else "", details)
+        else:
+            logger.info("%s", summary)
+
+        if over_budget and getattr(settings, "QUERY_PROFILER_STRICT", False):
+            raise QueryBudgetExceeded(f"{view_name} hizo {profile.view_count} consultas (presupuesto: {budget}).")
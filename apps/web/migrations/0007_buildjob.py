@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0006_game_is_processing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BuildJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('temp_path', models.CharField(blank=True, default='', help_text='Ruta local del ZIP recién subido (vacía si ya está en el almacenamiento).', max_length=500, verbose_name='ZIP temporal')),
+                ('state', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En ejecución'), ('done', 'Completado'), ('failed', 'Fallido')], default='pending', max_length=10, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('last_error', models.CharField(blank=True, default='', max_length=255, verbose_name='Último error')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='Worker')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponible desde')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Encolado')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Último latido')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='build_jobs', to='web.game', verbose_name='Juego')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de build',
+                'verbose_name_plural': 'Trabajos de build',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['state', 'available_at'], name='idx_buildjob_state_available')],
+            },
+        ),
+    ]
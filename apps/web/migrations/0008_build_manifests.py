@@ -0,0 +1,65 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0007_buildjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BuildBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('storage_path', models.CharField(max_length=255, verbose_name='Ruta en el almacenamiento')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_referenced_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Se actualiza cada vez que un build reutiliza el blob (protege del recolector).', verbose_name='Última referencia')),
+            ],
+            options={
+                'verbose_name': 'Blob de build',
+                'verbose_name_plural': 'Blobs de build',
+            },
+        ),
+        migrations.CreateModel(
+            name='GameBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index_path', models.CharField(help_text='Ruta del index.html dentro del ZIP.', max_length=500, verbose_name='index.html')),
+                ('file_count', models.PositiveIntegerField(default=0, verbose_name='Archivos')),
+                ('total_size', models.BigIntegerField(default=0, verbose_name='Tamaño total (bytes)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='builds', to='web.game', verbose_name='Juego')),
+            ],
+            options={
+                'verbose_name': 'Build de juego',
+                'verbose_name_plural': 'Builds de juegos',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='current_build',
+            field=models.ForeignKey(blank=True, help_text='Manifiesto del build que se sirve actualmente.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='web.gamebuild', verbose_name='Build publicado'),
+        ),
+        migrations.CreateModel(
+            name='BuildFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, verbose_name='Ruta')),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='files', to='web.buildblob', verbose_name='Blob')),
+                ('build', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='web.gamebuild', verbose_name='Build')),
+            ],
+            options={
+                'verbose_name': 'Archivo de build',
+                'verbose_name_plural': 'Archivos de build',
+                'constraints': [models.UniqueConstraint(fields=('build', 'path'), name='unique_build_file_path')],
+            },
+        ),
+    ]
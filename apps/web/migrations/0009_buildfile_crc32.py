@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0008_build_manifests'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buildfile',
+            name='crc32',
+            field=models.PositiveBigIntegerField(blank=True, help_text='CRC32 del ZipInfo; junto con el tamaño detecta archivos sin cambios al re-subir.', null=True, verbose_name='CRC32'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0009_buildfile_crc32'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buildfile',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Content-Type'),
+        ),
+        migrations.AddField(
+            model_name='buildfile',
+            name='encoding',
+            field=models.CharField(blank=True, help_text='gzip o br si el juego trae el archivo ya comprimido (p. ej. app.wasm.gz).', max_length=10, verbose_name='Content-Encoding'),
+        ),
+        migrations.AddField(
+            model_name='gamebuild',
+            name='manifest',
+            field=models.JSONField(blank=True, default=dict, help_text='{ruta relativa al index.html: [sha256, tamaño, Content-Type, Content-Encoding]}; lo usa el proxy de assets.', verbose_name='Manifiesto de assets'),
+        ),
+    ]
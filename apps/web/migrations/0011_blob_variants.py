@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0010_build_asset_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buildblob',
+            name='variants',
+            field=models.JSONField(blank=True, help_text='{encoding: tamaño} de las copias .gz/.br junto al blob; vacío si no convenía comprimir.', null=True, verbose_name='Variantes comprimidas'),
+        ),
+        migrations.AlterField(
+            model_name='gamebuild',
+            name='manifest',
+            field=models.JSONField(blank=True, default=dict, help_text='{ruta relativa al index.html: [sha256, tamaño, Content-Type, Content-Encoding, {variantes}]}; lo usa el proxy de assets.', verbose_name='Manifiesto de assets'),
+        ),
+    ]
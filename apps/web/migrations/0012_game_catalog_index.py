@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0011_blob_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['is_approved', '-created_at', '-id'], name='idx_game_catalog'),
+        ),
+    ]
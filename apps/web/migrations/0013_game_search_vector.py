@@ -0,0 +1,65 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:23
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Configuración de texto en español que además ignora acentos ("accion" = "acción").
+SEARCH_SETUP_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'sudaplay_es') THEN
+            CREATE TEXT SEARCH CONFIGURATION sudaplay_es (COPY = spanish);
+            ALTER TEXT SEARCH CONFIGURATION sudaplay_es
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+        END IF;
+    END
+    $$
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_game_search ON web_game USING gin (search_vector)",
+    """
+    UPDATE web_game SET search_vector =
+        setweight(to_tsvector('sudaplay_es', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('sudaplay_es', coalesce(short_description, '')), 'B')
+        || setweight(to_tsvector('sudaplay_es', coalesce(genre, '')), 'C')
+        || setweight(to_tsvector('sudaplay_es', coalesce(description, '')), 'D')
+    """,
+]
+
+SEARCH_TEARDOWN_SQL = [
+    "DROP INDEX IF EXISTS idx_game_search",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS sudaplay_es",
+]
+
+
+def setup_search(apps, schema_editor):
+    # El índice GIN y la configuración de texto solo existen en PostgreSQL;
+    # en SQLite la búsqueda usa el fallback de apps/web/search.py.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in SEARCH_SETUP_SQL:
+        schema_editor.execute(statement)
+
+
+def teardown_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in SEARCH_TEARDOWN_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0012_game_catalog_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Vector de búsqueda de texto completo (PostgreSQL); ver apps/web/search.py.', null=True),
+        ),
+        migrations.RunPython(setup_search, teardown_search),
+    ]
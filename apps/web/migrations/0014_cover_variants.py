@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0013_game_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buildjob',
+            name='kind',
+            field=models.CharField(choices=[('build', 'Build'), ('cover', 'Portada')], default='build', help_text='Build: extraer el ZIP. Portada: generar sus variantes (apps/web/covers.py).', max_length=10, verbose_name='Tipo'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='cover_placeholder',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Miniatura borrosa (data URI) que se pinta mientras carga la portada.', verbose_name='Placeholder de portada'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='cover_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Anchos y formatos generados de la portada; ver apps/web/covers.py.', verbose_name='Variantes de portada'),
+        ),
+    ]
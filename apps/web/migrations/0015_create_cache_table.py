@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-17 15:10
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Solo hace algo si CACHES usa DatabaseCache (CACHE_BACKEND=database); es idempotente.
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0014_cover_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-17 18:40
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    # Suma, cantidad y promedio desde las calificaciones guardadas (corrige promedios móviles desfasados).
+    Game = apps.get_model('web', 'Game')
+    GameRating = apps.get_model('web', 'GameRating')
+    totals = {
+        row['game']: row
+        for row in GameRating.objects.order_by().values('game').annotate(total=Sum('value'), votes=Count('pk'))
+    }
+    games = list(Game.objects.only('pk', 'rating', 'rating_votes', 'rating_sum'))
+    for game in games:
+        row = totals.get(game.pk, {'total': 0, 'votes': 0})
+        game.rating_sum = row['total']
+        game.rating_votes = row['votes']
+        game.rating = (
+            (Decimal(row['total']) / row['votes']).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+            if row['votes'] else Decimal('0')
+        )
+    Game.objects.bulk_update(games, ['rating', 'rating_votes', 'rating_sum'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0015_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Suma de calificaciones'),
+        ),
+        migrations.AlterField(
+            model_name='game',
+            name='rating',
+            field=models.DecimalField(decimal_places=1, default=0, help_text='Promedio redondeado, derivado de rating_sum / rating_votes (ver apps/web/ratings.py).', max_digits=2, verbose_name='Calificación'),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0016_game_rating_sum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameTrendState',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='web.game', verbose_name='Juego')),
+                ('views', models.IntegerField(default=0, verbose_name='Vistas')),
+                ('downloads', models.IntegerField(default=0, verbose_name='Descargas')),
+                ('rating_votes', models.PositiveIntegerField(default=0, verbose_name='Votos')),
+                ('score', models.FloatField(default=0, verbose_name='Puntaje')),
+                ('updated_at', models.DateTimeField(verbose_name='Calculado')),
+            ],
+            options={
+                'verbose_name': 'Estado de tendencia',
+                'verbose_name_plural': 'Estados de tendencia',
+            },
+        ),
+        migrations.CreateModel(
+            name='GameRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('trending', 'Tendencia'), ('top_rated', 'Mejor calificados'), ('most_played', 'Más jugados')], max_length=20, verbose_name='Clasificación')),
+                ('genre', models.CharField(blank=True, default='', help_text='Vacío: todos los géneros.', max_length=100, verbose_name='Género')),
+                ('position', models.PositiveIntegerField(verbose_name='Posición')),
+                ('score', models.FloatField(verbose_name='Puntaje')),
+                ('computed_at', models.DateTimeField(verbose_name='Calculado')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='web.game', verbose_name='Juego')),
+            ],
+            options={
+                'verbose_name': 'Posición en clasificación',
+                'verbose_name_plural': 'Clasificaciones',
+                'ordering': ['board', 'genre', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('board', 'genre', 'position'), name='uniq_ranking_position')],
+            },
+        ),
+    ]
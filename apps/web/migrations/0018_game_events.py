@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0017_game_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Partida'), (2, 'Descarga'), (3, 'Calificación')], verbose_name='Tipo')),
+                ('value', models.PositiveSmallIntegerField(default=0, help_text='Estrellas, en las calificaciones.', verbose_name='Valor')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='web.game', verbose_name='Juego')),
+            ],
+            options={
+                'verbose_name': 'Evento de juego',
+                'verbose_name_plural': 'Eventos de juegos',
+            },
+        ),
+        migrations.CreateModel(
+            name='GameDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Partidas')),
+                ('downloads', models.PositiveIntegerField(default=0, verbose_name='Descargas')),
+                ('ratings', models.PositiveIntegerField(default=0, verbose_name='Calificaciones')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Suma de calificaciones')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='web.game', verbose_name='Juego')),
+            ],
+            options={
+                'verbose_name': 'Estadística diaria',
+                'verbose_name_plural': 'Estadísticas diarias',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='idx_game_daily_stats_day')],
+                'constraints': [models.UniqueConstraint(fields=('game', 'day'), name='uniq_game_daily_stats')],
+            },
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.utils import timezone
 
 from .storage_backends import GameCoversStorage, GameFilesStorage
 
@@ -32,6 +34,20 @@ class Game(models.Model):
         storage=GameCoversStorage(),
         verbose_name="Imagen de portada"
     )
+    cover_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes de portada",
+        help_text="Anchos y formatos generados de la portada; ver apps/web/covers.py.",
+    )
+    cover_placeholder = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Placeholder de portada",
+        help_text="Miniatura borrosa (data URI) que se pinta mientras carga la portada.",
+    )
     genre = models.CharField(max_length=100, choices=GENRE_CHOICES, verbose_name="Género")
     game_file = models.FileField(
         storage=GameFilesStorage(),
@@ -48,8 +64,15 @@ class Game(models.Model):
     )
     downloads = models.IntegerField(default=0, verbose_name="Descargas")
     views = models.IntegerField(default=0, verbose_name="Vistas")
-    rating = models.DecimalField(max_digits=2, decimal_places=1, default=0, verbose_name="Calificación")
+    rating = models.DecimalField(
+        max_digits=2,
+        decimal_places=1,
+        default=0,
+        verbose_name="Calificación",
+        help_text="Promedio redondeado, derivado de rating_sum / rating_votes (ver apps/web/ratings.py).",
+    )
     rating_votes = models.PositiveIntegerField(default=0, verbose_name="Total de votos")
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Suma de calificaciones")
     is_web_playable = models.BooleanField(default=False, verbose_name="Jugable en web")
     web_build_path = models.CharField(max_length=500, blank=True, default="", verbose_name="Ruta web del build")
     is_processing = models.BooleanField(
@@ -64,12 +87,27 @@ class Game(models.Model):
         verbose_name="Error de procesamiento",
     )
 
+    current_build = models.ForeignKey(
+        "GameBuild",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        verbose_name="Build publicado",
+        help_text="Manifiesto del build que se sirve actualmente.",
+    )
+
     is_approved = models.BooleanField(
         default=False,
         verbose_name="Aprobado",
         help_text="Solo juegos aprobados son visibles públicamente",
     )
     is_featured = models.BooleanField(default=False, verbose_name="Destacado")
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Vector de búsqueda de texto completo (PostgreSQL); ver apps/web/search.py.",
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
     uploaded_by = models.ForeignKey(
@@ -83,6 +121,10 @@ class Game(models.Model):
         verbose_name = "Juego"
         verbose_name_plural = "Juegos"
         ordering = ["-created_at"]
+        indexes = [
+            # Paginación por cursor del catálogo (apps/web/catalog.py).
+            models.Index(fields=["is_approved", "-created_at", "-id"], name="idx_game_catalog"),
+        ]
 
     def __str__(self):
         return self.title
@@ -108,4 +150,271 @@ class GameRating(models.Model):
         return f"{self.user_id}:{self.game_id}={self.value}"
 
 
+class BuildJob(models.Model):
+    """
+    Trabajo de procesamiento de un juego (cola persistente en la base de datos):
+    extraer un ZIP subido o generar las variantes de su portada.
+
+    Lo consume el comando `process_build_jobs`; no requiere Redis ni Celery.
+    """
+    STATE_PENDING = "pending"
+    STATE_RUNNING = "running"
+    STATE_DONE = "done"
+    STATE_FAILED = "failed"
+    STATE_CHOICES = [
+        (STATE_PENDING, "Pendiente"),
+        (STATE_RUNNING, "En ejecución"),
+        (STATE_DONE, "Completado"),
+        (STATE_FAILED, "Fallido"),
+    ]
+    KIND_BUILD = "build"
+    KIND_COVER = "cover"
+    KIND_CHOICES = [
+        (KIND_BUILD, "Build"),
+        (KIND_COVER, "Portada"),
+    ]
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="build_jobs", verbose_name="Juego")
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES,
+        default=KIND_BUILD,
+        verbose_name="Tipo",
+        help_text="Build: extraer el ZIP. Portada: generar sus variantes (apps/web/covers.py).",
+    )
+    temp_path = models.CharField(
+        max_length=500,
+        blank=True,
+        default="",
+        verbose_name="ZIP temporal",
+        help_text="Ruta local del ZIP recién subido (vacía si ya está en el almacenamiento).",
+    )
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_PENDING, verbose_name="Estado")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    last_error = models.CharField(max_length=255, blank=True, default="", verbose_name="Último error")
+    worker = models.CharField(max_length=100, blank=True, default="", verbose_name="Worker")
+    available_at = models.DateTimeField(default=timezone.now, verbose_name="Disponible desde")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Encolado")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Inicio")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Último latido")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+
+    class Meta:
+        verbose_name = "Trabajo de build"
+        verbose_name_plural = "Trabajos de build"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["state", "available_at"], name="idx_buildjob_state_available"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.game_id} ({self.state})"
+
+
+class BuildBlob(models.Model):
+    """
+    Contenido único de un archivo de build, direccionado por su SHA-256.
+
+    Varios builds (re-subidas, juegos con el mismo motor) apuntan al mismo
+    blob, así que cada contenido se almacena y se sube una sola vez.
+    """
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    size = models.BigIntegerField(verbose_name="Tamaño (bytes)")
+    storage_path = models.CharField(max_length=255, verbose_name="Ruta en el almacenamiento")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_referenced_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Última referencia",
+        help_text="Se actualiza cada vez que un build reutiliza el blob (protege del recolector).",
+    )
+    variants = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name="Variantes comprimidas",
+        help_text="{encoding: tamaño} de las copias .gz/.br junto al blob; vacío si no convenía comprimir.",
+    )
+
+    class Meta:
+        verbose_name = "Blob de build"
+        verbose_name_plural = "Blobs de build"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} B)"
+
+
+class GameBuild(models.Model):
+    """
+    Manifiesto de una versión del build web de un juego.
+
+    Se crea como borrador al empezar el procesamiento y se publica de forma
+    atómica apuntando Game.current_build a él; el build anterior se conserva
+    un tiempo para los jugadores que todavía lo tienen cargado.
+    """
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="builds", verbose_name="Juego")
+    index_path = models.CharField(max_length=500, verbose_name="index.html", help_text="Ruta del index.html dentro del ZIP.")
+    file_count = models.PositiveIntegerField(default=0, verbose_name="Archivos")
+    total_size = models.BigIntegerField(default=0, verbose_name="Tamaño total (bytes)")
+    manifest = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Manifiesto de assets",
+        help_text="{ruta relativa al index.html: [sha256, tamaño, Content-Type, Content-Encoding, {variantes}]}; lo usa el proxy de assets.",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Build de juego"
+        verbose_name_plural = "Builds de juegos"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Build {self.pk} de {self.game_id}"
+
 
+class BuildFile(models.Model):
+    """Entrada del manifiesto: ruta dentro del ZIP -> blob con su contenido."""
+    build = models.ForeignKey(GameBuild, on_delete=models.CASCADE, related_name="files", verbose_name="Build")
+    path = models.CharField(max_length=500, verbose_name="Ruta")
+    blob = models.ForeignKey(BuildBlob, on_delete=models.PROTECT, related_name="files", verbose_name="Blob")
+    crc32 = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="CRC32",
+        help_text="CRC32 del ZipInfo; junto con el tamaño detecta archivos sin cambios al re-subir.",
+    )
+    content_type = models.CharField(max_length=100, blank=True, verbose_name="Content-Type")
+    encoding = models.CharField(
+        max_length=10,
+        blank=True,
+        verbose_name="Content-Encoding",
+        help_text="gzip o br si el juego trae el archivo ya comprimido (p. ej. app.wasm.gz).",
+    )
+
+    class Meta:
+        verbose_name = "Archivo de build"
+        verbose_name_plural = "Archivos de build"
+        constraints = [
+            models.UniqueConstraint(fields=["build", "path"], name="unique_build_file_path"),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+class GameRanking(models.Model):
+    """
+    Posición de un juego en una clasificación precalculada (apps/web/rankings.py).
+
+    El comando `rebuild_rankings` reemplaza las filas de cada clasificación
+    periódicamente; la portada y la API leen una página por (board, genre,
+    position) sin ordenar la tabla de juegos.
+    """
+    BOARD_TRENDING = "trending"
+    BOARD_TOP_RATED = "top_rated"
+    BOARD_MOST_PLAYED = "most_played"
+    BOARD_CHOICES = [
+        (BOARD_TRENDING, "Tendencia"),
+        (BOARD_TOP_RATED, "Mejor calificados"),
+        (BOARD_MOST_PLAYED, "Más jugados"),
+    ]
+
+    board = models.CharField(max_length=20, choices=BOARD_CHOICES, verbose_name="Clasificación")
+    genre = models.CharField(
+        max_length=100,
+        blank=True,
+        default="",
+        verbose_name="Género",
+        help_text="Vacío: todos los géneros.",
+    )
+    position = models.PositiveIntegerField(verbose_name="Posición")
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="+", verbose_name="Juego")
+    score = models.FloatField(verbose_name="Puntaje")
+    computed_at = models.DateTimeField(verbose_name="Calculado")
+
+    class Meta:
+        verbose_name = "Posición en clasificación"
+        verbose_name_plural = "Clasificaciones"
+        ordering = ["board", "genre", "position"]
+        constraints = [
+            # También es el índice con el que se lee cada página.
+            models.UniqueConstraint(fields=["board", "genre", "position"], name="uniq_ranking_position"),
+        ]
+
+    def __str__(self):
+        return f"{self.board}/{self.genre or '*'} #{self.position}: {self.game_id}"
+
+
+class GameTrendState(models.Model):
+    """
+    Puntaje de tendencia de un juego y los contadores que tenía en el último
+    cálculo: cada `rebuild_rankings` suma la actividad nueva (la diferencia)
+    al puntaje anterior, reducido según el tiempo transcurrido.
+    """
+    game = models.OneToOneField(Game, on_delete=models.CASCADE, primary_key=True, related_name="+", verbose_name="Juego")
+    views = models.IntegerField(default=0, verbose_name="Vistas")
+    downloads = models.IntegerField(default=0, verbose_name="Descargas")
+    rating_votes = models.PositiveIntegerField(default=0, verbose_name="Votos")
+    score = models.FloatField(default=0, verbose_name="Puntaje")
+    updated_at = models.DateTimeField(verbose_name="Calculado")
+
+    class Meta:
+        verbose_name = "Estado de tendencia"
+        verbose_name_plural = "Estados de tendencia"
+
+    def __str__(self):
+        return f"{self.game_id}: {self.score:.2f}"
+
+
+class GameEvent(models.Model):
+    """
+    Evento crudo de un juego (partida abierta, descarga o calificación).
+
+    Solo se agregan filas, en lote desde el request (apps/web/analytics.py);
+    `rollup_game_events` las resume en GameDailyStats y borra las que
+    superan GAME_EVENT_RETENTION_DAYS.
+    """
+    KIND_VIEW = 1
+    KIND_DOWNLOAD = 2
+    KIND_RATING = 3
+    KIND_CHOICES = [
+        (KIND_VIEW, "Partida"),
+        (KIND_DOWNLOAD, "Descarga"),
+        (KIND_RATING, "Calificación"),
+    ]
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="+", verbose_name="Juego")
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES, verbose_name="Tipo")
+    value = models.PositiveSmallIntegerField(default=0, verbose_name="Valor", help_text="Estrellas, en las calificaciones.")
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Fecha")
+
+    class Meta:
+        verbose_name = "Evento de juego"
+        verbose_name_plural = "Eventos de juegos"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.game_id} {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class GameDailyStats(models.Model):
+    """Totales de un juego en un día (hora local), calculados desde GameEvent."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="daily_stats", verbose_name="Juego")
+    day = models.DateField(verbose_name="Día")
+    views = models.PositiveIntegerField(default=0, verbose_name="Partidas")
+    downloads = models.PositiveIntegerField(default=0, verbose_name="Descargas")
+    ratings = models.PositiveIntegerField(default=0, verbose_name="Calificaciones")
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Suma de calificaciones")
+
+    class Meta:
+        verbose_name = "Estadística diaria"
+        verbose_name_plural = "Estadísticas diarias"
+        ordering = ["-day"]
+        constraints = [
+            # También es el índice de las series de un juego.
+            models.UniqueConstraint(fields=["game", "day"], name="uniq_game_daily_stats"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="idx_game_daily_stats_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.game_id} {self.day}"
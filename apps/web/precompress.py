@@ -0,0 +1,126 @@
+"""
+Variantes precomprimidas (gzip y brotli) de los archivos de los builds.
+
+Se generan una sola vez al procesar el ZIP, por blob: como el blob es
+direccionado por contenido, sus variantes viven junto a él
+(games/blobs/<aa>/<sha256>.gz y .br) y se comparten entre todos los builds
+que lo usan. El proxy de assets elige la mejor según `Accept-Encoding`.
+
+Brotli es opcional: sin el paquete `Brotli` instalado solo se genera gzip.
+"""
+import logging
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from django.conf import settings
+
+from .content_types import PRECOMPRESSED_SUFFIXES, is_compressible
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+# Una variante que no ahorra al menos el 10% no compensa el costo de servirla.
+MAX_RATIO = 0.9
+
+VARIANT_SUFFIXES = {encoding: suffix for suffix, encoding in PRECOMPRESSED_SUFFIXES.items()}
+
+
+def variant_path(storage_path: str, encoding: str) -> str:
+    """Ruta de la variante `encoding` de un blob."""
+    return f"{storage_path}{VARIANT_SUFFIXES[encoding]}"
+
+
+def enabled() -> bool:
+    return getattr(settings, "GAME_BUILD_PRECOMPRESS", True)
+
+
+def should_precompress(path: str, size: int) -> bool:
+    """Indica si un archivo del build merece variantes comprimidas."""
+    return (
+        enabled()
+        and size >= getattr(settings, "GAME_BUILD_PRECOMPRESS_MIN_SIZE", 1024)
+        and is_compressible(path)
+    )
+
+
+def _compressors() -> dict:
+    compressors = {"gzip": zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)}
+    if brotli is not None:
+        compressors["br"] = brotli.Compressor(
+            quality=getattr(settings, "GAME_BUILD_BROTLI_QUALITY", 9)
+        )
+    return compressors
+
+
+def compress_variants(opener: Callable[[], BinaryIO], size: int, workdir) -> dict[str, tuple[Path, int]]:
+    """
+    Lee el archivo una sola vez y lo comprime en todos los formatos a la vez.
+
+    Devuelve {encoding: (archivo temporal en `workdir`, tamaño)} solo con las
+    variantes que realmente ahorran bytes; las demás se descartan.
+    """
+    compressors = _compressors()
+    outputs = {
+        encoding: tempfile.NamedTemporaryFile(dir=workdir, delete=False, suffix=VARIANT_SUFFIXES[encoding])
+        for encoding in compressors
+    }
+    try:
+        with opener() as source:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                for encoding, compressor in compressors.items():
+                    outputs[encoding].write(
+                        compressor.process(chunk) if encoding == "br" else compressor.compress(chunk)
+                    )
+        for encoding, compressor in compressors.items():
+            outputs[encoding].write(compressor.finish() if encoding == "br" else compressor.flush())
+    finally:
+        for output in outputs.values():
+            output.close()
+
+    variants = {}
+    for encoding, output in outputs.items():
+        path = Path(output.name)
+        compressed = path.stat().st_size
+        if compressed <= size * MAX_RATIO:
+            variants[encoding] = (path, compressed)
+        else:
+            path.unlink()
+    return variants
+
+
+def compress_many(tasks: dict[str, tuple[Callable[[], BinaryIO], int]], workdir,
+                  workers: int | None = None) -> dict[str, dict[str, tuple[Path, int]]]:
+    """
+    Comprime varios blobs en paralelo (zlib y brotli liberan el GIL).
+    `tasks` es {sha256: (opener, tamaño)}; devuelve {sha256: variantes}.
+    """
+    if not tasks:
+        return {}
+    Path(workdir).mkdir(parents=True, exist_ok=True)
+    workers = max(1, workers or getattr(settings, "GAME_BUILD_UPLOAD_WORKERS", 8))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="build-compress") as pool:
+        futures = {
+            sha: pool.submit(compress_variants, opener, size, workdir)
+            for sha, (opener, size) in tasks.items()
+        }
+        results = {sha: future.result() for sha, future in futures.items()}
+
+    saved = sum(
+        size - min(compressed for _, compressed in results[sha].values())
+        for sha, (_, size) in tasks.items() if results[sha]
+    )
+    logger.info("Precompresión: %s blobs procesados, %s bytes ahorrados por descarga completa.", len(tasks), saved)
+    return results
+
+
+def sizes(variants: dict[str, tuple[Path, int]]) -> dict[str, int]:
+    """{encoding: tamaño}, el formato que se guarda en BuildBlob.variants."""
+    return {encoding: size for encoding, (_, size) in variants.items()}
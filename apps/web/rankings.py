@@ -0,0 +1,195 @@
+"""
+Clasificaciones precalculadas de juegos (modelo GameRanking).
+
+`python manage.py rebuild_rankings` (con cron, o con `--interval` como
+proceso aparte) recorre una vez los juegos aprobados y guarda las primeras
+RANKING_SIZE posiciones de cada clasificación, en total y por género:
+
+- trending: actividad reciente con decaimiento exponencial. Cada cálculo
+  suma al puntaje anterior, reducido a la mitad cada
+  RANKING_TRENDING_HALF_LIFE segundos, las vistas, descargas y votos nuevos
+  desde el cálculo anterior (GameTrendState guarda los contadores de
+  entonces). La primera vez la actividad nueva es todo el historial.
+- top_rated: promedio bayesiano, (suma + m * C) / (votos + m), con C el
+  promedio de todo el catálogo y m = RANKING_MIN_VOTES: pocos votos pesan
+  poco frente a la media.
+- most_played: vistas + descargas.
+
+Las páginas se leen por rango de posición con el índice
+uniq_ranking_position: el costo es el de la página, no el del catálogo. Las
+vistas y descargas aún sin escribir (counters.py) entran en el cálculo
+siguiente.
+"""
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .caching import CacheNamespace
+from .models import Game, GameRanking, GameTrendState
+
+BOARDS = dict(GameRanking.BOARD_CHOICES)
+# Peso de cada evento en el puntaje de tendencia.
+TREND_WEIGHTS = {"views": 1.0, "downloads": 3.0, "rating_votes": 5.0}
+
+# Listas de la portada; `rebuild_rankings` las invalida.
+HOME_RANKINGS = CacheNamespace("rankings", timeout=getattr(settings, "RANKING_CACHE_TTL", 900))
+
+
+def ranking_size() -> int:
+    return getattr(settings, "RANKING_SIZE", 100)
+
+
+def trending_half_life() -> float:
+    return getattr(settings, "RANKING_TRENDING_HALF_LIFE", 24 * 3600)
+
+
+def min_votes() -> int:
+    return getattr(settings, "RANKING_MIN_VOTES", 5)
+
+
+def _trend_scores(games, now) -> tuple[dict, list, list]:
+    """({pk: puntaje}, estados nuevos, estados a actualizar)."""
+    states = GameTrendState.objects.in_bulk([game[0] for game in games])
+    half_life = trending_half_life()
+    scores, created, updated = {}, [], []
+    for pk, _, views, downloads, votes, _ in games:
+        state = states.get(pk)
+        if state is None:
+            state = GameTrendState(game_id=pk, updated_at=now)
+            created.append(state)
+        else:
+            updated.append(state)
+        elapsed = max((now - state.updated_at).total_seconds(), 0)
+        current = {"views": views, "downloads": downloads, "rating_votes": votes}
+        # max(0, ...): un contador corregido hacia abajo no resta puntaje.
+        activity = sum(weight * max(current[field] - getattr(state, field), 0) for field, weight in TREND_WEIGHTS.items())
+        state.score = state.score * 0.5 ** (elapsed / half_life) + activity
+        state.views, state.downloads, state.rating_votes = views, downloads, votes
+        state.updated_at = now
+        if state.score > 0:
+            scores[pk] = state.score
+    return scores, created, updated
+
+
+def _bayesian_scores(games) -> dict:
+    rated = [(pk, total, votes) for pk, _, _, _, votes, total in games if votes]
+    if not rated:
+        return {}
+    mean = sum(total for _, total, _ in rated) / sum(votes for _, _, votes in rated)
+    m = min_votes()
+    return {pk: (total + m * mean) / (votes + m) for pk, total, votes in rated}
+
+
+def _play_scores(games) -> dict:
+    return {pk: views + downloads for pk, _, views, downloads, _, _ in games if views + downloads}
+
+
+def _top(scores, pks, size):
+    # Empates: primero el juego más nuevo (pk mayor).
+    return heapq.nlargest(size, ((scores[pk], pk) for pk in pks if pk in scores))
+
+
+def rebuild_rankings() -> dict:
+    """Recalcula y reemplaza todas las clasificaciones. Devuelve {board: filas guardadas}."""
+    now = timezone.now()
+    games = list(
+        Game.objects.filter(is_approved=True)
+        .order_by()
+        .values_list("pk", "genre", "views", "downloads", "rating_votes", "rating_sum")
+    )
+    by_genre = defaultdict(list)
+    for game in games:
+        by_genre[game[1]].append(game[0])
+    all_pks = [game[0] for game in games]
+
+    trend, created, updated = _trend_scores(games, now)
+    boards = {
+        GameRanking.BOARD_TRENDING: trend,
+        GameRanking.BOARD_TOP_RATED: _bayesian_scores(games),
+        GameRanking.BOARD_MOST_PLAYED: _play_scores(games),
+    }
+
+    size = ranking_size()
+    rows = []
+    counts = {}
+    for board, scores in boards.items():
+        before = len(rows)
+        for genre, pks in [("", all_pks), *by_genre.items()]:
+            rows.extend(
+                GameRanking(board=board, genre=genre, position=position, game_id=pk, score=score, computed_at=now)
+                for position, (score, pk) in enumerate(_top(scores, pks, size), start=1)
+            )
+        counts[board] = len(rows) - before
+
+    # Los lectores ven la clasificación anterior o la nueva, nunca una mezcla.
+    with transaction.atomic():
+        GameRanking.objects.all().delete()
+        GameRanking.objects.bulk_create(rows, batch_size=500)
+        GameTrendState.objects.bulk_create(created, batch_size=500)
+        GameTrendState.objects.bulk_update(
+            updated, ["views", "downloads", "rating_votes", "score", "updated_at"], batch_size=500
+        )
+        transaction.on_commit(lambda: HOME_RANKINGS.invalidate("home"))
+    return counts
+
+
+def ranking_page(board: str, genre: str = "", page: int = 1, size: int = 24) -> tuple[list, bool]:
+    """
+    (juegos de la página con `ranking_position` y `ranking_score`, hay
+    siguiente). Lee solo las posiciones de la página; los juegos que dejaron
+    de estar aprobados desde el último cálculo se omiten.
+    """
+    first = (page - 1) * size + 1
+    entries = list(
+        GameRanking.objects
+        .filter(board=board, genre=genre, position__gte=first, position__lte=first + size)
+        .select_related("game")
+        .only(
+            "position", "score", "game__id", "game__title", "game__short_description", "game__genre",
+            "game__cover_image", "game__cover_variants", "game__cover_placeholder", "game__downloads",
+            "game__views", "game__rating", "game__rating_votes", "game__is_featured", "game__is_approved",
+        )
+        .order_by("position")
+    )
+    has_next = len(entries) > size
+    games = []
+    for entry in entries[:size]:
+        if not entry.game.is_approved:
+            continue
+        entry.game.ranking_position = entry.position
+        entry.game.ranking_score = entry.score
+        games.append(entry.game)
+    return games, has_next
+
+
+def home_rankings() -> list[dict]:
+    """Las primeras posiciones de cada clasificación para la portada (cacheadas)."""
+    return HOME_RANKINGS.get_or_compute("home", _home_rankings)
+
+
+def _home_rankings() -> list[dict]:
+    size = getattr(settings, "HOME_RANKING_SIZE", 5)
+    lists = []
+    for board, label in BOARDS.items():
+        games, _ = ranking_page(board, size=size)
+        lists.append({
+            "board": board,
+            "label": label,
+            "url": reverse("web:game_rankings", args=[board]),
+            "games": [
+                {
+                    "position": game.ranking_position,
+                    "title": game.title,
+                    "url": reverse("web:game_detail", args=[game.pk]),
+                    "rating": str(game.rating),
+                    "rating_votes": game.rating_votes,
+                    "plays": game.views + game.downloads,
+                }
+                for game in games
+            ],
+        })
+    return lists
@@ -0,0 +1,80 @@
+"""
+Calificaciones de juegos.
+
+Game guarda la suma (`rating_sum`) y la cantidad (`rating_votes`) de las
+calificaciones; `rating` es el promedio a un decimal que muestran las
+tarjetas, y siempre se deriva de suma / cantidad (no de un promedio móvil
+redondeado, que acumula error voto a voto).
+
+Calificar es una sola transacción, sin leer antes ni bloquear la fila:
+
+1. INSERT del GameRating: la restricción unique_game_user_rating rechaza
+   el segundo voto del mismo usuario aunque lleguen a la vez.
+2. UPDATE de suma, cantidad y promedio con expresiones F: la base de datos
+   parte del valor vigente de la fila, así que los votos simultáneos no se
+   pisan.
+
+`reconcile_ratings` recalcula los agregados desde GameRating.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+from .analytics import event_log
+from .models import Game, GameEvent, GameRating
+
+
+class RatingError(Exception):
+    """Calificación rechazada; el mensaje se muestra al usuario."""
+
+
+def average_expression(total, votes):
+    """Promedio a un decimal calculado en SQL (0 sin votos)."""
+    average = Round(Cast(total, FloatField()) / Cast(NullIf(votes, Value(0)), FloatField()), 1)
+    return Coalesce(Cast(average, DecimalField(max_digits=2, decimal_places=1)), Value(0), output_field=DecimalField())
+
+
+def submit_rating(game_id: int, user, value: int) -> None:
+    """
+    Registra la calificación (ya validada, de 1 a 5) de `user` y actualiza
+    los agregados del juego en la misma transacción.
+    """
+    try:
+        with transaction.atomic():
+            GameRating.objects.create(game_id=game_id, user=user, value=value)
+            Game.objects.filter(pk=game_id).update(
+                rating_sum=F("rating_sum") + value,
+                rating_votes=F("rating_votes") + 1,
+                rating=average_expression(F("rating_sum") + value, F("rating_votes") + 1),
+            )
+    except IntegrityError:
+        raise RatingError("Ya calificaste este juego. Solo se permite una calificación por usuario.")
+    event_log.record(game_id, GameEvent.KIND_RATING, value)
+
+
+def reconcile_ratings(game_ids=None, dry_run: bool = False, batch_size: int = 1000) -> int:
+    """
+    Recalcula suma, cantidad y promedio desde GameRating (de todos los juegos
+    o de `game_ids`), con un UPDATE por lote de juegos desfasados. Devuelve
+    cuántos juegos estaban desfasados; con `dry_run` solo los cuenta.
+    """
+    ratings = GameRating.objects.filter(game=OuterRef("pk")).order_by().values("game")
+    actual_sum = Coalesce(Subquery(ratings.annotate(total=Sum("value")).values("total")), 0)
+    actual_votes = Coalesce(Subquery(ratings.annotate(votes=Count("pk")).values("votes")), 0)
+
+    games = Game.objects.all() if game_ids is None else Game.objects.filter(pk__in=game_ids)
+    stale = list(
+        games.annotate(actual_sum=actual_sum, actual_votes=actual_votes)
+        .exclude(rating_sum=F("actual_sum"), rating_votes=F("actual_votes"), rating=average_expression(F("actual_sum"), F("actual_votes")))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    if dry_run:
+        return len(stale)
+    for start in range(0, len(stale), batch_size):
+        Game.objects.filter(pk__in=stale[start:start + batch_size]).update(
+            rating_sum=Cast(actual_sum, IntegerField()),
+            rating_votes=Cast(actual_votes, IntegerField()),
+            rating=average_expression(actual_sum, actual_votes),
+        )
+    return len(stale)
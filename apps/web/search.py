@@ -0,0 +1,91 @@
+"""
+Búsqueda de juegos del catálogo.
+
+En PostgreSQL usa la columna Game.search_vector (tsvector con índice GIN
+idx_game_search) con la configuración de texto GAME_SEARCH_CONFIG: español
+con stemming y sin acentos (unaccent), creada por la migración 0013. Los
+pesos son: título A, descripción corta B, género C, descripción D. El
+vector se recalcula con una señal cuando cambia alguno de esos campos.
+
+En otros motores (SQLite en desarrollo y tests) se usa un fallback con
+`icontains` por término, ordenando primero las coincidencias en el título.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from .models import Game
+
+# Campos que alimentan el vector de búsqueda.
+SEARCH_FIELDS = {"title", "short_description", "description", "genre"}
+MAX_QUERY_LENGTH = 100
+
+
+def search_config() -> str:
+    return getattr(settings, "GAME_SEARCH_CONFIG", "sudaplay_es")
+
+
+def uses_full_text() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def game_search_vector(genre_label: str | None = None):
+    """Expresión SearchVector ponderada de un juego."""
+    config = search_config()
+    genre = Value(genre_label) if genre_label is not None else F("genre")
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("short_description", weight="B", config=config)
+        + SearchVector(genre, weight="C", config=config)
+        + SearchVector("description", weight="D", config=config)
+    )
+
+
+def update_search_vector(game: Game) -> None:
+    """Recalcula el vector de un juego (solo PostgreSQL)."""
+    if uses_full_text():
+        Game.objects.filter(pk=game.pk).update(search_vector=game_search_vector(game.get_genre_display()))
+
+
+def rebuild_search_vectors() -> int:
+    """Recalcula el vector de todos los juegos con un solo UPDATE. Devuelve las filas."""
+    if not uses_full_text():
+        return 0
+    return Game.objects.update(search_vector=game_search_vector())
+
+
+def search_games(query: str, genre: str | None = None):
+    """
+    QuerySet de juegos aprobados que coinciden con `query`, ordenados por
+    relevancia. Acepta la sintaxis de búsqueda web ("frase exacta", -excluir, or).
+    """
+    query = (query or "").strip()[:MAX_QUERY_LENGTH]
+    qs = Game.objects.filter(is_approved=True).only(
+        "pk", "title", "short_description", "cover_image", "cover_variants", "cover_placeholder",
+        "downloads", "rating", "is_featured", "genre", "created_at",
+    )
+    if genre:
+        qs = qs.filter(genre=genre)
+    if not query:
+        return qs.order_by("-created_at", "-pk")
+
+    if uses_full_text():
+        search_query = SearchQuery(query, search_type="websearch", config=search_config())
+        return (
+            qs.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", "-created_at", "-pk")
+        )
+
+    # Fallback: todos los términos deben aparecer en algún campo.
+    for term in query.split():
+        qs = qs.filter(
+            Q(title__icontains=term)
+            | Q(short_description__icontains=term)
+            | Q(description__icontains=term)
+            | Q(genre__icontains=term)
+        )
+    return qs.annotate(
+        rank=Case(When(title__icontains=query, then=Value(1)), default=Value(0), output_field=IntegerField())
+    ).order_by("-rank", "-created_at", "-pk")
@@ -0,0 +1,69 @@
+"""
+Entrega de archivos locales (builds y ZIPs descargables) sin copiar los
+bytes dentro de un worker de Python.
+
+Django solo valida permisos y arma los encabezados; la transferencia la
+hace el proxy delantero o el kernel, según GAME_FILE_SENDFILE_MODE:
+
+- "" (por defecto): FileResponse. Gunicorn lo entrega con
+  `wsgi.file_wrapper`, que usa os.sendfile() en los workers síncronos.
+- "nginx": encabezado X-Accel-Redirect hacia GAME_FILE_SENDFILE_URL, una
+  `location internal` de Nginx con `alias` a MEDIA_ROOT.
+- "xsendfile": encabezado X-Sendfile con la ruta absoluta (Apache
+  mod_xsendfile, lighttpd).
+
+Solo aplica al almacenamiento local; con Supabase los archivos no están
+en el disco del servidor.
+"""
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import content_disposition_header
+
+from .asset_cache import file_response
+
+MODE_NGINX = "nginx"
+MODE_XSENDFILE = "xsendfile"
+
+
+def sendfile_mode() -> str:
+    return getattr(settings, "GAME_FILE_SENDFILE_MODE", "")
+
+
+def internal_url(path: Path) -> str:
+    """URL interna de Nginx para un archivo dentro de MEDIA_ROOT."""
+    prefix = getattr(settings, "GAME_FILE_SENDFILE_URL", "/protected-media/")
+    relative = Path(path).resolve().relative_to(Path(settings.MEDIA_ROOT).resolve())
+    return f"{prefix.rstrip('/')}/{quote(relative.as_posix())}"
+
+
+def sendfile_response(request, path: Path, content_type: str, etag: str | None = None,
+                      attachment: str | None = None, mode: str | None = None, filename: str | None = None):
+    """
+    Responde con el archivo local `path`.
+
+    `attachment` es el nombre de descarga (Content-Disposition); sin él, el
+    archivo se sirve en línea (con el nombre `filename`, si se da) y, en modo
+    por defecto, respeta `Range`.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise Http404("El archivo no está disponible en el servidor.")
+    mode = sendfile_mode() if mode is None else mode
+
+    if mode == MODE_NGINX:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = internal_url(path)
+    elif mode == MODE_XSENDFILE:
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = str(path.resolve())
+    elif attachment:
+        return FileResponse(path.open("rb"), as_attachment=True, filename=attachment, content_type=content_type)
+    else:
+        return file_response(request, path, content_type, etag, filename=filename)
+
+    if attachment:
+        response["Content-Disposition"] = content_disposition_header(True, attachment)
+    return response
@@ -3,88 +3,65 @@ Procesamiento de archivos ZIP subidos como juegos web.
 
 Soporta tanto almacenamiento LOCAL (media/) como almacenamiento S3/Supabase.
 """
-import io
+import functools
 import logging
-import mimetypes
+import tempfile
 import threading
 import zipfile
-import requests
+import zlib
 
 from django.conf import settings
 from django.core.files.base import ContentFile
 
+from .content_types import content_type_for
+
 logger = logging.getLogger(__name__)
 
+# Contenido del ZIP dañado: error definitivo. Los demás errores de E/S o del
+# almacenamiento son transitorios y se propagan para que la cola reintente.
+CORRUPT_ZIP_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError)
+
 
-def process_uploaded_web_build_async(game_id: int, temp_path: str | None = None) -> None:
+def process_game_upload(game_id: int, temp_path: str | None = None) -> tuple[bool, str]:
     """
-    Lanza el procesamiento del ZIP en un hilo de fondo.
+    Procesa un ZIP recién subido (lo ejecuta un worker de la cola, ver jobs.py).
 
     Si se proporciona `temp_path`, el ZIP fue guardado localmente (para evitar
-    bloquear el request HTTP). El worker lo sube a Supabase S3 y lo procesa.
+    bloquear el request HTTP) y primero se sube a Supabase S3.
     Si `temp_path` es None, asume que game.game_file ya apunta a S3.
 
-    Django responde al usuario en < 1 segundo; todo el trabajo pesado
-    (subida a S3 + extracción + subida de archivos) ocurre aquí.
+    Devuelve (ok, mensaje) para errores definitivos (ZIP inválido, sin
+    index.html...). Los errores transitorios (red, S3) se propagan como
+    excepción para que la cola reintente; el ZIP temporal solo se borra
+    cuando ya quedó guardado en S3.
     """
-    def _worker():
-        import os
-        from .models import Game
-        from django.core.files.base import File
+    import os
+    from .models import Game
+    from django.core.files.base import File
 
+    try:
+        game = Game.objects.get(pk=game_id)
+    except Game.DoesNotExist:
+        return False, f"Juego {game_id} no encontrado."
+
+    # --- Paso 1: subir el ZIP a Supabase S3 si viene de almacenamiento temporal ---
+    if temp_path and os.path.exists(temp_path):
+        from .storage_backends import GameFilesStorage
+        s3_storage = GameFilesStorage()
+        filename = os.path.basename(temp_path)
+        with open(temp_path, "rb") as f:
+            s3_name = s3_storage.save(filename, File(f))
+        # Actualizar el campo game_file apuntando al objeto en S3
+        Game.objects.filter(pk=game_id).update(game_file=s3_name)
+        game.refresh_from_db()
+        # Limpiar el archivo temporal local
         try:
-            game = Game.objects.get(pk=game_id)
-        except Game.DoesNotExist:
-            logger.error("process_async: Game %s no encontrado.", game_id)
-            return
-
-        # --- Paso 1: subir el ZIP a Supabase S3 si viene de almacenamiento temporal ---
-        if temp_path and os.path.exists(temp_path):
-            try:
-                from .storage_backends import GameFilesStorage
-                s3_storage = GameFilesStorage()
-                filename = os.path.basename(temp_path)
-                with open(temp_path, "rb") as f:
-                    s3_name = s3_storage.save(filename, File(f))
-                # Actualizar el campo game_file apuntando al objeto en S3
-                Game.objects.filter(pk=game_id).update(game_file=s3_name)
-                game.refresh_from_db()
-            except Exception as exc:
-                logger.error("process_async Game %s: error subiendo ZIP a S3: %s", game_id, exc)
-                try:
-                    Game.objects.filter(pk=game_id).update(
-                        is_processing=False,
-                        processing_error=f"Error al subir archivo: {str(exc)[:200]}",
-                        is_approved=False,
-                    )
-                except Exception:
-                    pass
-                return
-            finally:
-                # Limpiar el archivo temporal local
-                try:
-                    os.remove(temp_path)
-                except OSError:
-                    pass
-
-        # --- Paso 2: extraer el ZIP y subir cada archivo (ya existente en S3) ---
-        ok, error_message = process_uploaded_web_build(game)
+            os.remove(temp_path)
+        except OSError:
+            pass
 
-        try:
-            if ok:
-                Game.objects.filter(pk=game_id).update(is_processing=False)
-            else:
-                Game.objects.filter(pk=game_id).update(
-                    is_processing=False,
-                    processing_error=error_message[:255],
-                    is_approved=False,
-                )
-                logger.error("process_async Game %s falló: %s", game_id, error_message)
-        except Exception:
-            pass  # La migración puede no estar aplicada aún
-
-    thread = threading.Thread(target=_worker, daemon=True, name=f"zip-{game_id}")
-    thread.start()
+    # --- Paso 2: extraer el ZIP y subir cada archivo (ya existente en S3) ---
+    return process_uploaded_web_build(game)
 
 
 def _find_index_html_in_zip(zip_file: zipfile.ZipFile) -> str | None:
@@ -127,116 +104,143 @@ def _supabase_public_url(path: str) -> str:
 def _process_s3(game) -> tuple[bool, str]:
     """
     Procesa un ZIP almacenado en Supabase S3:
-    1. Lee el ZIP desde S3 en memoria.
-    2. Extrae TODOS los archivos y los sube a games/builds/<id>/ en S3.
-    3. Actualiza web_build_path con la URL PÚBLICA (object/public) del index.html.
+    1. Abre el ZIP desde S3 (se descarga a un archivo temporal en disco, no a RAM).
+    2. Compara cada entrada con el manifiesto del build publicado (CRC32 +
+       tamaño del ZipInfo): las que no cambiaron se reutilizan sin leerlas.
+    3. Calcula el SHA-256 de las nuevas/modificadas y sube en paralelo SOLO el
+       contenido que aún no existe en games/blobs/ (ver build_store y uploads),
+       junto con sus variantes .gz/.br si es comprimible (ver precompress).
+    4. Publica el manifiesto de forma atómica; el proxy de assets lo usa para
+       resolver cada ruta a su blob.
 
     Requisito: el bucket de Supabase debe ser PÚBLICO.
     """
-    from django.core.files.storage import default_storage
-
-    # 1. Leer el ZIP desde S3
-    try:
-        with game.game_file.open("rb") as f:
-            zip_bytes = f.read()
-    except Exception as exc:
-        return False, f"No se pudo leer el archivo desde el almacenamiento: {exc}"
+    from .build_store import (
+        blob_path, blobs_without_variants, existing_blobs, hash_zip_entry, previous_manifest,
+        publish_build, unchanged_sha,
+    )
+    from .models import GameBuild
+    from .precompress import compress_many, should_precompress, sizes, variant_path
+    from .uploads import BuildUploadError, UploadJob, supabase_uploader, zip_entry_opener
+
+    # 1. Abrir el ZIP desde S3. Con AWS_S3_MAX_MEMORY_SIZE el objeto se vuelca a
+    # disco en lugar de quedarse entero en memoria; ZipFile lee solo lo necesario.
+    # Un error de lectura del almacenamiento se propaga: la cola reintenta.
+    zip_handle = game.game_file.open("rb")
 
     # 2. Abrir el ZIP y verificar que tiene index.html
     try:
-        zf = zipfile.ZipFile(io.BytesIO(zip_bytes))
-    except zipfile.BadZipFile:
+        zf = zipfile.ZipFile(zip_handle)
+    except CORRUPT_ZIP_ERRORS:
+        zip_handle.close()
         return False, "El archivo no es un ZIP válido."
-    except Exception as exc:
-        return False, f"No se pudo abrir el ZIP: {exc}"
-
-    index_entry = _find_index_html_in_zip(zf)
-    if not index_entry:
-        return False, "El ZIP debe contener un archivo index.html."
-
-    # 3. Extraer y subir cada archivo a games/builds/<game.id>/ en Supabase
-    build_prefix = f"games/builds/{game.id}/"
-    index_s3_path = None
-    
-    # ⚠️ FIX URGENCE: La API S3 de Supabase ignora el ContentType y fuerza text/plain.
-    # Usamos la API REST nativa de Supabase Storage directamente.
-    supabase_url = settings.SUPABASE_URL.rstrip("/")
-    bucket_name = settings.AWS_STORAGE_BUCKET_NAME
-    
-    # Intentar obtener la clave de servicio (Service Role Key) que ignora RLS.
-    # Si no existe, usamos la anónima, pero requeriría RLS configurado a público para INSERT.
-    from decouple import config
-    api_key = config("SUPABASE_SERVICE_ROLE_KEY", default=getattr(settings, "SUPABASE_KEY", ""))
-    
-    api_url_base = f"{supabase_url}/storage/v1/object/{bucket_name}"
-    headers_base = {
-        "apikey": api_key,
-        "Authorization": f"Bearer {api_key}"
-    }
+    except Exception:
+        zip_handle.close()
+        raise
 
+    build = None
     try:
-        for item in zf.infolist():
-            if item.is_dir() or item.filename.startswith("__MACOSX"):
+        index_entry = _find_index_html_in_zip(zf)
+        if not index_entry:
+            return False, "El ZIP debe contener un archivo index.html."
+
+        members = [
+            item for item in zf.infolist()
+            if not item.is_dir() and not item.filename.startswith("__MACOSX")
+        ]
+        previous = previous_manifest(game.current_build)
+        build = GameBuild.objects.create(game=game, index_path=index_entry)
+
+        # 3. Delta contra el build anterior; hash solo de lo que cambió.
+        entries = []
+        changed = []
+        try:
+            for item in members:
+                sha = unchanged_sha(previous, item)
+                if sha is None:
+                    sha = hash_zip_entry(zf, item)
+                    changed.append((item, sha))
+                entries.append((item.filename, sha, item.file_size, item.CRC))
+        except CORRUPT_ZIP_ERRORS as exc:
+            build.delete()
+            return False, f"No se pudo leer el contenido del ZIP: {exc}"
+        except Exception:
+            build.delete()
+            raise
+        stored = existing_blobs(sha for _, sha, _, _ in entries)
+
+        open_lock = threading.Lock()
+        jobs = {}
+        for item, sha in changed:
+            if sha not in stored and sha not in jobs:
+                jobs[sha] = UploadJob(
+                    dest_path=blob_path(sha),
+                    content_type=content_type_for(item.filename),
+                    size=item.file_size,
+                    opener=zip_entry_opener(zf, item, open_lock),
+                )
+
+        # Variantes gzip/brotli de los blobs nuevos y de los ya almacenados que
+        # todavía no las tienen; se comprimen una sola vez por contenido.
+        missing_variants = blobs_without_variants(stored)
+        to_compress = {}
+        for item, (path, sha, size, _) in zip(members, entries):
+            if sha in to_compress or (sha not in jobs and sha not in missing_variants):
                 continue
+            if should_precompress(path, size):
+                to_compress[sha] = (zip_entry_opener(zf, item, open_lock), size)
 
-            dest_path = build_prefix + item.filename
-
-            with zf.open(item) as file_content:
-                data = file_content.read()
-                
-                # Adivinar o forzar Content-Type
-                content_type, _ = mimetypes.guess_type(item.filename)
-                ext = item.filename.lower()
-                if ext.endswith('.html') or ext.endswith('.htm'):
-                    content_type = 'text/html'
-                elif ext.endswith('.js'):
-                    content_type = 'application/javascript'
-                elif ext.endswith('.css'):
-                    content_type = 'text/css'
-                elif ext.endswith('.wasm'):
-                    content_type = 'application/wasm'
-                elif ext.endswith('.json'):
-                    content_type = 'application/json'
-                elif ext.endswith('.png'):
-                    content_type = 'image/png'
-                elif ext.endswith('.jpg') or ext.endswith('.jpeg'):
-                    content_type = 'image/jpeg'
-                
-                if not content_type:
-                    content_type = 'application/octet-stream'
-
-                # Subida via API REST nativa de Supabase
-                upload_url = f"{api_url_base}/{dest_path}"
-                headers = headers_base.copy()
-                headers["Content-Type"] = content_type
-                
-                # Usar requests para hacer un POST/PUT directo a Supabase
-                resp = requests.post(upload_url, headers=headers, data=data)
-                
-                # Si falla por "Duplicate", hacer un PUT para sobreescribir
-                if resp.status_code == 400 and b"Duplicate" in resp.content:
-                    resp = requests.put(upload_url, headers=headers, data=data)
-                    
-                resp.raise_for_status()
-
-            if item.filename == index_entry:
-                index_s3_path = dest_path
-
-    except Exception as exc:
-        return False, f"Error al subir archivos extraídos a Supabase: {exc}"
+        with tempfile.TemporaryDirectory(prefix="build-variants-") as workdir:
+            try:
+                compressed = compress_many(to_compress, workdir)
+            except CORRUPT_ZIP_ERRORS as exc:
+                build.delete()
+                return False, f"No se pudieron comprimir los archivos del build: {exc}"
+            except Exception:
+                build.delete()
+                raise
+
+            upload_jobs = list(jobs.values())
+            for sha, found in compressed.items():
+                for encoding, (variant_file, variant_size) in found.items():
+                    dest_path = variant_path(blob_path(sha), encoding)
+                    upload_jobs.append(UploadJob(
+                        dest_path=dest_path,
+                        content_type=content_type_for(dest_path),
+                        size=variant_size,
+                        opener=functools.partial(open, variant_file, "rb"),
+                    ))
+
+            # ⚠️ FIX URGENCE: La API S3 de Supabase ignora el ContentType y fuerza text/plain.
+            # El uploader usa la API REST nativa de Supabase Storage directamente.
+            # Solo los rechazos definitivos (4xx, contenido ilegible) fallan el build;
+            # red caída o 5xx tras los reintentos se propagan para que la cola reintente.
+            try:
+                with supabase_uploader() as uploader:
+                    report = uploader.upload_all(upload_jobs)
+            except (BuildUploadError, *CORRUPT_ZIP_ERRORS) as exc:
+                build.delete()
+                return False, f"Error al subir archivos extraídos a Supabase: {exc}"
+            except Exception:
+                build.delete()
+                raise
     finally:
         zf.close()
-
-    if not index_s3_path:
-        return False, "No se pudo localizar el index.html tras la extracción."
-
-    # 4. Construir la URL PÚBLICA de Supabase (NO la URL del endpoint S3)
-    index_url = _supabase_public_url(index_s3_path)
-
-    game.web_build_path = index_url
-    game.is_web_playable = True
-    game.processing_error = ""
-    game.save(update_fields=["web_build_path", "is_web_playable", "processing_error", "updated_at"])
+        zip_handle.close()
+
+    removed = len(set(previous) - {item.filename for item in members})
+    logger.info(
+        "Build del juego %s subido: %s; %s sin cambios, %s nuevos o modificados "
+        "(%s ya almacenados), %s eliminados, %s blobs precomprimidos.",
+        game.id, report.summary(), len(entries) - len(changed), len(changed),
+        len(changed) - len(jobs), removed, len(to_compress),
+    )
+
+    # 4. Publicar el manifiesto. web_build_path es la URL PÚBLICA de Supabase
+    # (NO la URL del endpoint S3) del blob del index.html.
+    index_sha = next(sha for path, sha, _, _ in entries if path == index_entry)
+    variants = {sha: sizes(found) for sha, found in compressed.items()}
+    publish_build(build, _supabase_public_url(blob_path(index_sha)), entries, variants=variants)
 
     return True, ""
 
@@ -244,45 +248,116 @@ def _process_s3(game) -> tuple[bool, str]:
 def _process_local(game) -> tuple[bool, str]:
     """
     Procesa un ZIP almacenado localmente (desarrollo sin S3).
-    Extrae los archivos en media/games/builds/<id>/ y sirve el index.html.
+    Guarda cada archivo una sola vez en media/games/blobs/ y arma una carpeta
+    por versión, media/games/builds/<id>/<build>/, con enlaces duros a esos
+    blobs. Los archivos sin cambios (CRC32 + tamaño) no se descomprimen.
+    Las carpetas de versiones descartadas se borran tras publicar la nueva.
+    Las variantes .gz/.br quedan junto a cada archivo comprimible, para que
+    el servidor web (gzip_static/brotli_static) las sirva directamente.
     """
     from pathlib import Path
+    import os
     import shutil
+    from .build_store import (
+        BLOB_PREFIX, blob_path, blobs_without_variants, existing_blobs, link_blob, previous_manifest,
+        publish_build, store_local_blob, unchanged_sha,
+    )
+    from .models import GameBuild
+    from .precompress import VARIANT_SUFFIXES, compress_many, should_precompress, sizes, variant_path
 
     source_path = Path(game.game_file.path)
     if source_path.suffix.lower() != ".zip":
         return False, "Solo se permite ZIP para jugar dentro de la plataforma."
 
-    build_dir = Path(settings.MEDIA_ROOT) / "games" / "builds" / str(game.id)
-    if build_dir.exists():
-        shutil.rmtree(build_dir, ignore_errors=True)
+    media_root = Path(settings.MEDIA_ROOT)
+    game_dir = media_root / "games" / "builds" / str(game.id)
+    previous = previous_manifest(game.current_build)
+    build = GameBuild.objects.create(game=game)
+    build_dir = game_dir / str(build.pk)
     build_dir.mkdir(parents=True, exist_ok=True)
 
+    def _discard():
+        shutil.rmtree(build_dir, ignore_errors=True)
+        build.delete()
+
+    def _abort(message):
+        _discard()
+        return False, message
+
+    entries = []
     try:
         with zipfile.ZipFile(source_path, "r") as zip_file:
             build_dir_resolved = build_dir.resolve()
             for member in zip_file.infolist():
                 member_path = (build_dir_resolved / member.filename).resolve()
                 if not str(member_path).startswith(str(build_dir_resolved)):
-                    shutil.rmtree(build_dir, ignore_errors=True)
-                    return False, "El archivo ZIP contiene rutas no permitidas."
-            zip_file.extractall(build_dir)
-    except Exception as exc:
-        shutil.rmtree(build_dir, ignore_errors=True)
-        return False, f"No se pudo extraer el ZIP: {exc}"
-
-    candidates = [p for p in build_dir.rglob("index.html") if p.is_file()]
-    if not candidates:
-        shutil.rmtree(build_dir, ignore_errors=True)
-        return False, "El ZIP debe contener un archivo index.html."
+                    return _abort("El archivo ZIP contiene rutas no permitidas.")
 
-    index_path = sorted(candidates, key=lambda p: (len(p.parts), len(str(p))))[0]
-    relative_index = index_path.relative_to(Path(settings.MEDIA_ROOT)).as_posix()
+            index_entry = _find_index_html_in_zip(zip_file)
+            if not index_entry:
+                return _abort("El ZIP debe contener un archivo index.html.")
 
-    game.web_build_path = relative_index
-    game.is_web_playable = True
-    game.processing_error = ""
-    game.save(update_fields=["web_build_path", "is_web_playable", "processing_error", "updated_at"])
+            for member in zip_file.infolist():
+                if member.is_dir() or member.filename.startswith("__MACOSX"):
+                    continue
+                sha = unchanged_sha(previous, member)
+                blob_file = media_root / blob_path(sha) if sha else None
+                if blob_file is None or not blob_file.exists():
+                    sha, blob_file = store_local_blob(zip_file, member)
+                target = build_dir / member.filename
+                target.parent.mkdir(parents=True, exist_ok=True)
+                link_blob(blob_file, target)
+                entries.append((member.filename, sha, member.file_size, member.CRC))
+    except CORRUPT_ZIP_ERRORS as exc:
+        return _abort(f"No se pudo extraer el ZIP: {exc}")
+    except Exception:
+        _discard()
+        raise
+
+    known = existing_blobs(sha for _, sha, _, _ in entries)
+    missing_variants = blobs_without_variants(known)
+    to_compress = {}
+    for path, sha, size, _ in entries:
+        if sha in to_compress or (sha in known and sha not in missing_variants):
+            continue
+        if should_precompress(path, size):
+            to_compress[sha] = (functools.partial(open, media_root / blob_path(sha), "rb"), size)
+    try:
+        compressed = compress_many(to_compress, media_root / BLOB_PREFIX / "tmp")
+    except CORRUPT_ZIP_ERRORS as exc:
+        return _abort(f"No se pudieron comprimir los archivos del build: {exc}")
+    except Exception:
+        _discard()
+        raise
+    for sha, found in compressed.items():
+        for encoding, (variant_file, _) in found.items():
+            os.replace(variant_file, media_root / variant_path(blob_path(sha), encoding))
+
+    build.index_path = index_entry
+    build.save(update_fields=["index_path"])
+    relative_index = (build_dir / index_entry).relative_to(media_root).as_posix()
+    variants = {sha: sizes(found) for sha, found in compressed.items()}
+    publish_build(build, relative_index, entries, variants=variants)
+
+    # Enlazar las variantes junto a cada archivo (app.js -> app.js.gz), salvo
+    # que el ZIP ya traiga un archivo con ese nombre.
+    blob_variants = {entry[0]: entry[4] for entry in build.manifest.values() if len(entry) > 4}
+    for path, sha, _, _ in entries:
+        for encoding in blob_variants.get(sha, {}):
+            variant_file = media_root / variant_path(blob_path(sha), encoding)
+            sibling = build_dir / f"{path}{VARIANT_SUFFIXES[encoding]}"
+            if variant_file.exists() and not sibling.exists():
+                link_blob(variant_file, sibling)
+
+    # Borrar las carpetas que ya no corresponden a ninguna versión conservada
+    # (incluye archivos del formato anterior, extraídos directo en builds/<id>/).
+    kept = {str(pk) for pk in GameBuild.objects.filter(game=game).values_list("pk", flat=True)}
+    for child in game_dir.iterdir():
+        if child.name not in kept:
+            if child.is_dir():
+                shutil.rmtree(child, ignore_errors=True)
+            else:
+                child.unlink(missing_ok=True)
 
     return True, ""
 
@@ -0,0 +1,41 @@
+"""Senales especificas de la app web."""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import CATALOG_FIELDS, invalidate_catalog
+from .covers import needs_variants
+from .jobs import enqueue_cover_job
+from .models import Game
+from .search import SEARCH_FIELDS, update_search_vector
+
+
+@receiver(post_save, sender=Game)
+def invalidate_catalog_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Invalida el catálogo cacheado si cambió algo visible en sus tarjetas."""
+    if update_fields is not None and not CATALOG_FIELDS.intersection(update_fields):
+        return
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Game)
+def update_search_vector_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Mantiene al día Game.search_vector cuando cambia un campo buscable."""
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    update_search_vector(instance)
+
+
+@receiver(post_save, sender=Game)
+def enqueue_cover_variants_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Encola las variantes de la portada si es nueva o cambió (las genera el worker)."""
+    if update_fields is not None and "cover_image" not in update_fields:
+        return
+    if needs_variants(instance):
+        game_id = instance.pk
+        transaction.on_commit(lambda: enqueue_cover_job(game_id))
+
+
+@receiver(post_delete, sender=Game)
+def invalidate_catalog_on_delete(sender, instance, **kwargs):
+    invalidate_catalog()
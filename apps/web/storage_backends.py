@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
 
 
 def _supabase_public_url(location: str, name: str) -> str:
@@ -28,6 +29,19 @@ class GameFilesStorage(S3Boto3Storage):
     def url(self, name):
         return _supabase_public_url(self.location, name)
 
+    def presigned_url(self, name, expire, filename=None):
+        """
+        URL firmada de corta duración por la API S3 de Supabase (funciona
+        aunque el bucket no sea público). Con `filename`, el navegador la
+        descarga con ese nombre.
+        """
+        params = {"Bucket": self.bucket.name, "Key": self._normalize_name(clean_name(name))}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        return self.connection.meta.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=expire
+        )
+
 
 class GameCoversStorage(S3Boto3Storage):
     """
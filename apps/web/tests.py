@@ -1,3 +1,293 @@
-from django.test import TestCase
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.login.models import UserProfile
+
+from .analytics import event_log
+from .counters import download_counter, view_counter
+from . import jobs
+from .middleware import fingerprint
+from .models import BuildJob, Game, GameRanking, GameRating
+from .ratings import RatingError, reconcile_ratings, submit_rating
+
+
+class FingerprintTests(TestCase):
+    """Huellas de SQL del perfilador de consultas (middleware.py)."""
+
+    def test_in_list_collapses_to_one_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "t"."id" IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM "t" WHERE "t"."id" IN (%s)'),
+        )
+        self.assertEqual(fingerprint('SELECT * FROM "t" WHERE "id" in (%s,%s)'), 'SELECT * FROM "t" WHERE "id" IN (...)')
+
+    def test_strings_are_normalized(self):
+        self.assertEqual(fingerprint("SELECT 1 FROM \"t\" WHERE \"name\" = 'ana'"), 'SELECT ? FROM "t" WHERE "name" = ?')
+        self.assertEqual(fingerprint("WHERE \"name\" = 'o''brien'"), 'WHERE "name" = ?')
+
+    def test_numbers_are_normalized(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" = 42 AND "score" > -1.5 LIMIT 21'),
+            'SELECT * FROM "t" WHERE "id" = ? AND "score" > ? LIMIT ?',
+        )
+
+    def test_digits_in_identifiers_are_kept(self):
+        self.assertEqual(fingerprint('SELECT "t2"."col1" FROM "t2"'), 'SELECT "t2"."col1" FROM "t2"')
+
+    def test_whitespace_is_collapsed(self):
+        self.assertEqual(fingerprint('  SELECT *\n   FROM "t"  '), 'SELECT * FROM "t"')
+
+
+@override_settings(GAME_COUNTER_FLUSH_INTERVAL=3600, GAME_COUNTER_MAX_PENDING=10_000)
+class RatingTests(TestCase):
+    """Agregados de calificación: suma, cantidad y promedio (ratings.py y migración 0016)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create no dispara post_save: el perfil de chat.Perfil no hace falta aquí.
+        cls.ana, cls.beto, cls.carla = User.objects.bulk_create([
+            User(username='ana'), User(username='beto'), User(username='carla'),
+        ])
+        cls.game = Game.objects.create(
+            title='Juego de prueba',
+            short_description='Corto',
+            description='Descripción',
+            cover_image='covers/prueba.png',
+            genre='accion',
+            uploaded_by=cls.ana,
+            is_approved=True,
+        )
+
+    def tearDown(self):
+        event_log.flush()
+
+    def aggregates(self):
+        game = Game.objects.get(pk=self.game.pk)
+        return game.rating_sum, game.rating_votes, game.rating
+
+    def test_first_vote(self):
+        submit_rating(self.game.pk, self.beto, 4)
+        self.assertEqual(self.aggregates(), (4, 1, Decimal('4.0')))
+        self.assertTrue(GameRating.objects.filter(game=self.game, user=self.beto, value=4).exists())
+
+    def test_average_from_sum_and_votes(self):
+        for user, value in ((self.ana, 5), (self.beto, 4), (self.carla, 4)):
+            submit_rating(self.game.pk, user, value)
+        self.assertEqual(self.aggregates(), (13, 3, Decimal('4.3')))
+
+    def test_second_vote_of_same_user_is_rejected(self):
+        submit_rating(self.game.pk, self.beto, 2)
+        with self.assertRaises(RatingError):
+            submit_rating(self.game.pk, self.beto, 5)
+        self.assertEqual(self.aggregates(), (2, 1, Decimal('2.0')))
+        self.assertEqual(GameRating.objects.filter(game=self.game).count(), 1)
+
+    def test_changed_vote_is_reconciled(self):
+        submit_rating(self.game.pk, self.ana, 5)
+        submit_rating(self.game.pk, self.beto, 1)
+        # Un cambio fuera de submit_rating (por ejemplo, desde el admin) desfasa los agregados.
+        GameRating.objects.filter(game=self.game, user=self.beto).update(value=4)
+        self.assertEqual(reconcile_ratings(dry_run=True), 1)
+        self.assertEqual(self.aggregates(), (6, 2, Decimal('3.0')))
+
+        self.assertEqual(reconcile_ratings(), 1)
+        self.assertEqual(self.aggregates(), (9, 2, Decimal('4.5')))
+        self.assertEqual(reconcile_ratings(), 0)
+
+    def test_migration_backfill(self):
+        GameRating.objects.bulk_create([
+            GameRating(game=self.game, user=self.beto, value=3),
+            GameRating(game=self.game, user=self.carla, value=4),
+        ])
+        # Promedio móvil desfasado, como antes de la migración.
+        Game.objects.filter(pk=self.game.pk).update(rating=Decimal('2.0'), rating_votes=5, rating_sum=0)
+        migration = importlib.import_module('apps.web.migrations.0016_game_rating_sum')
+        migration.backfill_rating_aggregates(apps, None)
+        self.assertEqual(self.aggregates(), (7, 2, Decimal('3.5')))
+
+
+@override_settings(BUILD_JOB_MAX_ATTEMPTS=3, BUILD_JOB_RETRY_DELAY=30, BUILD_JOB_STALE_AFTER=300)
+class BuildJobQueueTests(TestCase):
+    """Cola de builds (jobs.py): reclamo, reintentos y recuperación de trabajos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create no dispara post_save: el perfil de chat.Perfil no hace falta aquí.
+        (cls.user,) = User.objects.bulk_create([User(username='ana')])
+        cls.game = Game.objects.create(
+            title='Juego de prueba',
+            short_description='Corto',
+            description='Descripción',
+            cover_image='covers/prueba.png',
+            game_file='games/prueba.zip',
+            genre='accion',
+            uploaded_by=cls.user,
+            is_approved=True,
+        )
+
+    def test_claim_is_exclusive(self):
+        first = jobs.enqueue_build_job(self.game.pk)
+        second = jobs.enqueue_build_job(self.game.pk)
+
+        claimed = [jobs.claim_next_job('worker-a'), jobs.claim_next_job('worker-b'), jobs.claim_next_job('worker-c')]
+        self.assertEqual([job.pk for job in claimed[:2]], [first.pk, second.pk])
+        self.assertIsNone(claimed[2])
+        self.assertEqual(
+            list(BuildJob.objects.order_by('pk').values_list('state', 'worker', 'attempts')),
+            [(BuildJob.STATE_RUNNING, 'worker-a', 1), (BuildJob.STATE_RUNNING, 'worker-b', 1)],
+        )
+
+    def test_claim_skips_job_taken_by_another_worker(self):
+        job = jobs.enqueue_build_job(self.game.pk)
+        update = QuerySet.update
+
+        def other_worker_wins(queryset, **kwargs):
+            # Otro worker lo reclama entre la lectura de candidatos y este UPDATE.
+            update(BuildJob.objects.filter(pk=job.pk), state=BuildJob.STATE_RUNNING, worker='worker-b')
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=other_worker_wins):
+            self.assertIsNone(jobs.claim_next_job('worker-a'))
+        self.assertEqual(BuildJob.objects.get(pk=job.pk).worker, 'worker-b')
+
+    def test_transient_error_retries_with_backoff(self):
+        jobs.enqueue_build_job(self.game.pk)
+        with mock.patch.object(jobs, 'process_game_upload', side_effect=OSError('sin conexión')):
+            for attempt in (1, 2):
+                job = jobs.claim_next_job('worker-a')
+                started = timezone.now()
+                jobs.run_build_job(job)
+                job.refresh_from_db()
+                self.assertEqual((job.state, job.attempts), (BuildJob.STATE_PENDING, attempt))
+                self.assertIn('sin conexión', job.last_error)
+                delay = (job.available_at - started).total_seconds()
+                self.assertAlmostEqual(delay, 30 * 2 ** (attempt - 1), delta=5)
+                BuildJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+
+            job = jobs.claim_next_job('worker-a')
+            jobs.run_build_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (BuildJob.STATE_FAILED, 3))
+        game = Game.objects.get(pk=self.game.pk)
+        self.assertFalse(game.is_processing)
+        self.assertFalse(game.is_approved)
+        self.assertIn('sin conexión', game.processing_error)
+
+    def test_stale_jobs_are_recovered_or_failed(self):
+        jobs.enqueue_build_job(self.game.pk)
+        job = jobs.claim_next_job('worker-a')
+        stale_at = timezone.now() - timedelta(seconds=600)
+        BuildJob.objects.filter(pk=job.pk).update(heartbeat_at=stale_at)
+
+        self.assertEqual(jobs.recover_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (BuildJob.STATE_PENDING, 1))
+
+        BuildJob.objects.filter(pk=job.pk).update(state=BuildJob.STATE_RUNNING, attempts=3, heartbeat_at=stale_at)
+        self.assertEqual(jobs.recover_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.state, BuildJob.STATE_FAILED)
+        game = Game.objects.get(pk=self.game.pk)
+        self.assertFalse(game.is_processing)
+        self.assertIn('interrumpió', game.processing_error)
+
+    def test_orphan_game_is_enqueued_once(self):
+        Game.objects.filter(pk=self.game.pk).update(is_processing=True)
+        enqueue = jobs.enqueue_build_job
+
+        def enqueue_while_another_worker_recovers(game_id, temp_path=None):
+            # Otro worker corre la recuperación justo después de que este tomó el juego.
+            self.assertEqual(jobs.recover_stale_jobs(), 0)
+            return enqueue(game_id, temp_path)
+
+        with mock.patch.object(jobs, 'enqueue_build_job', side_effect=enqueue_while_another_worker_recovers):
+            self.assertEqual(jobs.recover_stale_jobs(), 1)
+        self.assertEqual(jobs.recover_stale_jobs(), 0)
+
+        self.assertEqual(BuildJob.objects.filter(game=self.game, state=BuildJob.STATE_PENDING).count(), 1)
+        self.assertTrue(Game.objects.get(pk=self.game.pk).is_processing)
+
+
+@override_settings(
+    QUERY_PROFILER=True,
+    QUERY_PROFILER_STRICT=True,
+    # Los contadores y eventos solo se escriben en tearDown, fuera del request medido.
+    GAME_COUNTER_FLUSH_INTERVAL=3600,
+    GAME_COUNTER_MAX_PENDING=10_000,
+)
+class QueryBudgetTests(TestCase):
+    """
+    Cada vista de QUERY_BUDGETS, con caché fría, dentro de su presupuesto: con
+    QUERY_PROFILER_STRICT el middleware lanza QueryBudgetExceeded y el test falla.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create no dispara post_save: el perfil de chat.Perfil no hace falta aquí.
+        cls.user, cls.other = User.objects.bulk_create([
+            User(username='ana', email='ana@example.com'),
+            User(username='beto', email='beto@example.com'),
+        ])
+        for user in (cls.user, cls.other):
+            UserProfile.objects.create(user=user, avatar='')
+        cls.game = Game.objects.create(
+            title='Juego de prueba',
+            short_description='Corto',
+            description='Descripción',
+            cover_image='covers/prueba.png',
+            genre='accion',
+            uploaded_by=cls.user,
+            is_approved=True,
+        )
+        GameRanking.objects.create(
+            board=GameRanking.BOARD_TRENDING, genre='', position=1, game=cls.game, score=1.0, computed_at=timezone.now(),
+        )
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        for buffer in (view_counter, download_counter, event_log):
+            buffer.flush()
+
+    def budget_urls(self):
+        return {
+            'web:home': reverse('web:home'),
+            'web:catalog_page': reverse('web:catalog_page'),
+            'web:game_search': reverse('web:game_search') + '?q=juego',
+            'web:game_rankings': reverse('web:game_rankings', args=[GameRanking.BOARD_TRENDING]),
+            'web:game_detail': reverse('web:game_detail', args=[self.game.pk]),
+            'web:game_play': reverse('web:game_play', args=[self.game.pk]),
+            'web:my_games': reverse('web:my_games'),
+            'login:profile': reverse('login:profile'),
+            'login:player_profile': reverse('login:player_profile', args=[self.other.username]),
+            'login:notifications_api': reverse('login:notifications_api'),
+            'login:search_players': reverse('login:search_players') + '?q=be',
+            'chat:inbox': reverse('chat:inbox'),
+        }
+
+    def test_every_budgeted_view_is_covered(self):
+        self.assertEqual(set(self.budget_urls()), set(settings.QUERY_BUDGETS))
+
+    def test_views_stay_within_budget(self):
+        for view_name, url in self.budget_urls().items():
+            with self.subTest(view=view_name):
+                for cache in caches.all():
+                    cache.clear()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Server-Timing', response)
@@ -0,0 +1,239 @@
+"""
+Motor de subida paralela de archivos de builds web a Supabase Storage.
+
+Usa una sesión HTTP compartida (pool de conexiones keep-alive), un número
+acotado de hilos y reintentos con backoff exponencial por archivo. Las
+entradas del ZIP se leen en streaming directamente desde el archivo, sin
+cargar el ZIP completo ni cada archivo entero en memoria.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import BinaryIO, Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Códigos HTTP que vale la pena reintentar (errores transitorios del servidor).
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class BuildUploadError(Exception):
+    """Error definitivo al subir un archivo del build: el servidor lo rechazó (4xx)."""
+
+
+class UploadUnavailableError(Exception):
+    """
+    Error transitorio (red, 5xx, 429) que persistió tras todos los reintentos.
+    No es culpa del build: quien llama debe dejarlo propagar para que la
+    cola vuelva a intentar más tarde.
+    """
+
+
+@dataclass
+class UploadJob:
+    """
+    Un archivo a subir.
+
+    `opener` devuelve un objeto binario NUEVO en cada llamada, de modo que un
+    reintento pueda volver a leer el contenido desde el principio.
+    """
+    dest_path: str
+    content_type: str
+    size: int
+    opener: Callable[[], BinaryIO]
+
+
+@dataclass
+class UploadReport:
+    """Resumen de rendimiento de la subida de un build."""
+    files: int = 0
+    bytes: int = 0
+    retries: int = 0
+    workers: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes por segundo."""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.files} archivos, {self.bytes / 1_048_576:.1f} MB en {self.elapsed:.2f}s "
+            f"({self.throughput / 1_048_576:.2f} MB/s, {self.workers} hilos, {self.retries} reintentos)"
+        )
+
+
+class _SizedStream:
+    """
+    Envuelve un archivo binario exponiendo `__len__` para que `requests`
+    envíe Content-Length sin intentar hacer seek hasta el final (lo que en un
+    miembro comprimido del ZIP obligaría a descomprimirlo dos veces).
+    """
+
+    def __init__(self, fileobj: BinaryIO, size: int):
+        self._fileobj = fileobj
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def read(self, size: int = -1) -> bytes:
+        return self._fileobj.read(size)
+
+    def __iter__(self):
+        while True:
+            chunk = self._fileobj.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def zip_entry_opener(zip_file, info, lock: threading.Lock) -> Callable[[], BinaryIO]:
+    """
+    Devuelve un `opener` para un miembro del ZIP.
+
+    `ZipFile.open` no es completamente seguro entre hilos (el contador de
+    referencias del archivo subyacente no está protegido), así que la
+    apertura se serializa con `lock`; las lecturas posteriores ya usan el
+    candado interno del ZipFile.
+    """
+    def _open():
+        with lock:
+            return zip_file.open(info)
+    return _open
+
+
+class SupabaseBuildUploader:
+    """
+    Sube archivos a Supabase Storage usando su API REST nativa.
+
+    La API S3 de Supabase ignora el ContentType y fuerza text/plain, por eso
+    se usa /storage/v1/object/<bucket>/<path> con la Service Role Key.
+    """
+
+    def __init__(self, api_url_base: str, api_key: str, workers: int | None = None,
+                 retries: int | None = None, backoff: float | None = None, timeout: float = 60):
+        self.api_url_base = api_url_base.rstrip("/")
+        self.workers = max(1, workers or getattr(settings, "GAME_BUILD_UPLOAD_WORKERS", 8))
+        self.retries = max(0, retries if retries is not None else getattr(settings, "GAME_BUILD_UPLOAD_RETRIES", 3))
+        self.backoff = backoff if backoff is not None else getattr(settings, "GAME_BUILD_UPLOAD_BACKOFF", 0.5)
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "apikey": api_key,
+            "Authorization": f"Bearer {api_key}",
+            # Sobrescribe si el objeto ya existe (evita el POST fallido + PUT).
+            "x-upsert": "true",
+        })
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def upload_all(self, jobs: list[UploadJob]) -> UploadReport:
+        """
+        Sube todos los `jobs` en paralelo y devuelve el reporte.
+        Lanza BuildUploadError si el servidor rechaza un archivo y
+        UploadUnavailableError si un archivo agota sus reintentos.
+        """
+        report = UploadReport(workers=self.workers)
+        started = time.monotonic()
+        lock = threading.Lock()
+
+        def _run(job: UploadJob) -> None:
+            retries = self._upload_one(job)
+            with lock:
+                report.files += 1
+                report.bytes += job.size
+                report.retries += retries
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="build-upload") as pool:
+            futures = [pool.submit(_run, job) for job in jobs]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                for pending in futures:
+                    pending.cancel()
+                raise
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def delete(self, paths: list[str], batch_size: int = 1000) -> None:
+        """Borra objetos del bucket en lotes (DELETE /object/<bucket> con prefixes)."""
+        for start in range(0, len(paths), batch_size):
+            resp = self.session.delete(
+                self.api_url_base,
+                json={"prefixes": paths[start:start + batch_size]},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+
+    def _upload_one(self, job: UploadJob) -> int:
+        """Sube un archivo con reintentos. Devuelve cuántos reintentos necesitó."""
+        url = f"{self.api_url_base}/{job.dest_path}"
+        headers = {"Content-Type": job.content_type}
+        last_error = ""
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                with job.opener() as fileobj:
+                    resp = self.session.post(
+                        url, headers=headers, data=_SizedStream(fileobj, job.size), timeout=self.timeout
+                    )
+                    # Compatibilidad: si el servidor no respeta x-upsert, sobrescribir con PUT.
+                    if resp.status_code == 400 and b"Duplicate" in resp.content:
+                        with job.opener() as retry_obj:
+                            resp = self.session.put(
+                                url, headers=headers, data=_SizedStream(retry_obj, job.size), timeout=self.timeout
+                            )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                last_error = str(exc)
+                logger.warning("Subida de %s falló (intento %s): %s", job.dest_path, attempt + 1, exc)
+                continue
+
+            if resp.status_code in RETRYABLE_STATUS:
+                last_error = f"HTTP {resp.status_code}"
+                logger.warning("Subida de %s devolvió %s (intento %s)", job.dest_path, resp.status_code, attempt + 1)
+                continue
+
+            try:
+                resp.raise_for_status()
+            except requests.HTTPError as exc:
+                raise BuildUploadError(f"{job.dest_path}: {exc}") from exc
+            return attempt
+
+        raise UploadUnavailableError(f"{job.dest_path}: {last_error}")
+
+
+def supabase_uploader(**kwargs) -> SupabaseBuildUploader:
+    """Crea un uploader contra el bucket configurado en settings."""
+    # Intentar obtener la clave de servicio (Service Role Key) que ignora RLS.
+    # Si no existe, usamos la anónima, pero requeriría RLS configurado a público para INSERT.
+    from decouple import config
+    api_key = config("SUPABASE_SERVICE_ROLE_KEY", default=getattr(settings, "SUPABASE_KEY", ""))
+    supabase_url = settings.SUPABASE_URL.rstrip("/")
+    api_url_base = f"{supabase_url}/storage/v1/object/{settings.AWS_STORAGE_BUCKET_NAME}"
+    return SupabaseBuildUploader(api_url_base, api_key, **kwargs)
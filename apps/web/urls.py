@@ -9,6 +9,9 @@ app_name = 'web'
 urlpatterns = [
     # Catalogo principal de juegos.
     path('', views.HomeView.as_view(), name='home'),
+    path('juegos/catalogo/', views.CatalogPageView.as_view(), name='catalog_page'),
+    path('juegos/buscar/', views.GameSearchView.as_view(), name='game_search'),
+    path('juegos/rankings/<str:board>/', views.GameRankingView.as_view(), name='game_rankings'),
     path('juegos/acerca-de/', views.AboutView.as_view(), name='about'),
     path('juegos/normas/', views.NormasView.as_view(), name='normas'),
     path('juegos/sonido/configuraciones-avanzadas/', views.AdvancedAudioSettingsView.as_view(), name='advanced_audio_settings'),
@@ -19,4 +22,5 @@ urlpatterns = [
     path('juegos/<int:pk>/descargar/', views.GameDownloadView.as_view(), name='game_download'),
     path('juegos/<int:pk>/jugar/', views.GamePlayView.as_view(), name='game_play'),
     path('juegos/<int:pk>/asset/<path:asset_path>', views.GameAssetProxyView.as_view(), name='game_asset'),
+    path('juegos/<int:pk>/build/<int:build_id>/<path:asset_path>', views.GameAssetProxyView.as_view(), name='game_build_asset'),
 ]
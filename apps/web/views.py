@@ -9,19 +9,61 @@ Mejores prácticas:
 from django.conf import settings
 from django.contrib import messages
 from django.shortcuts import redirect
-from django.http import FileResponse, Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.views import View
 from django.views.generic import TemplateView
 from django.views.generic import DetailView
 from django.views.generic.edit import CreateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
-from django.db.models import F, Q
-from decimal import Decimal, ROUND_HALF_UP
+from django.urls import reverse, reverse_lazy
+from django.db.models import Q
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
+import posixpath
+from pathlib import Path
+from urllib.parse import urlencode
 
 from .forms import GameForm
-from .models import Game, GameRating
-from .services import process_uploaded_web_build_async
+from .models import Game, GameBuild, GameEvent, GameRating
+from .analytics import daily_series, event_log, game_totals, with_bar_heights
+from .asset_cache import (
+    accepted_encodings, can_decode, decode_stream, file_response as asset_file_response,
+    get_asset_cache, negotiate_encoding, read_span, upstream_session,
+)
+from .build_store import lookup_asset
+from .catalog import InvalidCursor, rendered_page
+from .search import search_games
+from .content_types import content_type_for
+from .counters import download_counter, view_counter
+from .covers import attach_cover_pictures
+from .precompress import variant_path
+from .rankings import BOARDS, home_rankings, ranking_page, ranking_size
+from .ratings import RatingError, submit_rating
+from .jobs import enqueue_build_job
+from .sendfile import sendfile_response
+from .services import _is_s3_storage, _supabase_public_url
+
+
+def _embedded_play_url(game) -> str:
+    """URL del index.html del build para el iframe."""
+    # Con manifiesto, la URL incluye la versión del build para que un jugador
+    # con la versión anterior cargada no reciba assets de la nueva. La vista
+    # valida la aprobación y sirve desde Supabase (proxy, corrige Content-Type)
+    # o desde el disco local (sendfile / X-Accel-Redirect).
+    if game.current_build_id:
+        return reverse("web:game_build_asset", kwargs={
+            "pk": game.pk,
+            "build_id": game.current_build_id,
+            "asset_path": posixpath.basename(game.current_build.index_path),
+        })
+
+    path = game.web_build_path
+    if not path.startswith("http"):
+        # Builds locales antiguos, extraídos directo en MEDIA.
+        return f"{settings.MEDIA_URL}{path}"
+    return reverse("web:game_asset", kwargs={"pk": game.pk, "asset_path": "index.html"})
 
 
 class HomeView(TemplateView):
@@ -36,17 +78,150 @@ class HomeView(TemplateView):
         context = super().get_context_data(**kwargs)
         context['user'] = self.request.user
         context['username'] = self.request.user.username
-        context["games"] = (
-            Game.objects
-            .filter(is_approved=True)
-            .select_related('uploaded_by')
-            .only('pk', 'title', 'short_description', 'cover_image',
-                  'downloads', 'rating', 'is_featured', 'uploaded_by')
-        )
+        # Primera página del catálogo (HTML cacheado); el resto llega por scroll infinito.
+        html, next_cursor, count = rendered_page()
+        context["catalog_html"] = mark_safe(html) if count else ""
+        context["catalog_next"] = next_cursor
+        context["rankings"] = [ranking for ranking in home_rankings() if ranking["games"]]
         context["show_post_login_welcome"] = self.request.session.pop("show_post_login_welcome", False)
         return context
 
 
+class CatalogPageView(View):
+    """
+    API de scroll infinito del catálogo: devuelve el HTML de las tarjetas de
+    la página que sigue a `cursor` y la URL de la siguiente.
+    """
+
+    def get(self, request, *args, **kwargs):
+        cursor = request.GET.get("cursor") or None
+        try:
+            html, next_cursor, count = rendered_page(cursor)
+        except InvalidCursor:
+            return JsonResponse({"error": "Cursor inválido."}, status=400)
+
+        next_url = ""
+        if next_cursor:
+            next_url = f"{reverse('web:catalog_page')}?{urlencode({'cursor': next_cursor})}"
+        return JsonResponse({
+            "html": html,
+            "count": count,
+            "next_cursor": next_cursor,
+            "next_url": next_url,
+        })
+
+
+class GameSearchView(View):
+    """
+    API de búsqueda del catálogo: ?q=<texto>&genero=<clave>&page=<n>.
+    Devuelve los juegos por relevancia, como datos y como HTML de tarjetas.
+    """
+    page_size = 24
+    max_page = 50
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get("q", "")
+        genre = request.GET.get("genero") or None
+        if genre and genre not in dict(Game.GENRE_CHOICES):
+            return JsonResponse({"error": "Género inválido."}, status=400)
+        try:
+            page = min(max(int(request.GET.get("page", 1)), 1), self.max_page)
+        except ValueError:
+            page = 1
+
+        offset = (page - 1) * self.page_size
+        games = list(search_games(query, genre)[offset:offset + self.page_size + 1])
+        has_next = len(games) > self.page_size and page < self.max_page
+        games = games[:self.page_size]
+        attach_cover_pictures(games)
+        next_url = ""
+        if has_next:
+            params = {"q": query, "page": page + 1}
+            if genre:
+                params["genero"] = genre
+            next_url = f"{reverse('web:game_search')}?{urlencode(params)}"
+
+        return JsonResponse({
+            "query": query,
+            "genre": genre,
+            "page": page,
+            "has_next": has_next,
+            "next_url": next_url,
+            "count": len(games),
+            "results": [
+                {
+                    "id": game.pk,
+                    "title": game.title,
+                    "short_description": game.short_description,
+                    "genre": game.genre,
+                    "rating": str(game.rating),
+                    "downloads": game.downloads,
+                    "cover_url": game.cover_image.url if game.cover_image else "",
+                    "url": reverse("web:game_detail", args=[game.pk]),
+                }
+                for game in games
+            ],
+            "html": render_to_string("web/home/_catalogo_cards.html", {"games": games}),
+        })
+
+
+class GameRankingView(View):
+    """
+    API de clasificaciones precalculadas (apps/web/rankings.py):
+    /juegos/rankings/<trending|top_rated|most_played>/?genero=<clave>&page=<n>.
+    """
+    page_size = 24
+
+    def get(self, request, board, *args, **kwargs):
+        if board not in BOARDS:
+            return JsonResponse({"error": "Clasificación inválida."}, status=404)
+        genre = request.GET.get("genero") or ""
+        if genre and genre not in dict(Game.GENRE_CHOICES):
+            return JsonResponse({"error": "Género inválido."}, status=400)
+        max_page = max(1, -(-ranking_size() // self.page_size))
+        try:
+            page = min(max(int(request.GET.get("page", 1)), 1), max_page)
+        except ValueError:
+            page = 1
+
+        games, has_next = ranking_page(board, genre, page, self.page_size)
+        attach_cover_pictures(games)
+        next_url = ""
+        if has_next:
+            params = {"page": page + 1}
+            if genre:
+                params["genero"] = genre
+            next_url = f"{reverse('web:game_rankings', args=[board])}?{urlencode(params)}"
+
+        return JsonResponse({
+            "board": board,
+            "label": BOARDS[board],
+            "genre": genre or None,
+            "page": page,
+            "has_next": has_next,
+            "next_url": next_url,
+            "count": len(games),
+            "results": [
+                {
+                    "position": game.ranking_position,
+                    "score": round(game.ranking_score, 3),
+                    "id": game.pk,
+                    "title": game.title,
+                    "short_description": game.short_description,
+                    "genre": game.genre,
+                    "rating": str(game.rating),
+                    "rating_votes": game.rating_votes,
+                    "views": game.views,
+                    "downloads": game.downloads,
+                    "cover_url": game.cover_image.url if game.cover_image else "",
+                    "url": reverse("web:game_detail", args=[game.pk]),
+                }
+                for game in games
+            ],
+            "html": render_to_string("web/home/_catalogo_cards.html", {"games": games}),
+        })
+
+
 class AboutView(TemplateView):
     """
     Vista para la pagina Acerca de.
@@ -94,15 +269,9 @@ class GameCreateView(LoginRequiredMixin, CreateView):
             temp_path = None
             self.object = form.save()
 
-        # Marcar como en procesamiento si la migración ya fue aplicada
         if temp_path:
-            try:
-                self.object.__class__.objects.filter(pk=self.object.pk).update(is_processing=True)
-            except Exception:
-                pass
-
-        if temp_path:
-            process_uploaded_web_build_async(self.object.pk, temp_path=temp_path)
+            # Encolar el procesamiento; lo toma el worker `process_build_jobs`.
+            enqueue_build_job(self.object.pk, temp_path=temp_path)
             messages.success(
                 self.request,
                 "¡Juego recibido! Estamos procesando el archivo ZIP, en unos momentos estará listo para jugar."
@@ -122,7 +291,19 @@ class MyGamesView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["games"] = Game.objects.filter(uploaded_by=self.request.user)
+        games = list(Game.objects.filter(uploaded_by=self.request.user))
+        # Series por día desde GameDailyStats (ver analytics.py), no desde los eventos crudos.
+        days = getattr(settings, "ANALYTICS_DASHBOARD_DAYS", 30)
+        recent = game_totals(games, days)
+        for game in games:
+            game.recent_stats = recent.get(game.pk)
+        series = with_bar_heights(daily_series(games, days)) if games else []
+        context["games"] = games
+        context["stats_days"] = days
+        context["stats_series"] = series
+        context["stats_totals"] = {
+            field: sum(point[field] for point in series) for field in ("views", "downloads", "ratings")
+        }
         return context
 
 
@@ -132,9 +313,11 @@ class GameDetailView(DetailView):
     context_object_name = "game"
 
     def get_queryset(self):
+        # uploaded_by: el template muestra el creador.
+        qs = Game.objects.select_related("current_build", "uploaded_by").defer("current_build__manifest")
         if self.request.user.is_authenticated:
-            return Game.objects.filter(Q(is_approved=True) | Q(uploaded_by=self.request.user)).distinct()
-        return Game.objects.filter(is_approved=True)
+            return qs.filter(Q(is_approved=True) | Q(uploaded_by=self.request.user)).distinct()
+        return qs.filter(is_approved=True)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -144,18 +327,15 @@ class GameDetailView(DetailView):
 
         if game.is_approved:
             if game.is_web_playable and game.web_build_path:
-                path = game.web_build_path
-                if path.startswith("http"):
-                    # URL de Supabase: usar el proxy Django para corregir Content-Type
-                    from django.urls import reverse
-                    play_url = reverse("web:game_asset", kwargs={"pk": game.pk, "asset_path": "index.html"})
-                else:
-                    play_url = f"{settings.MEDIA_URL}{path}"
+                play_url = _embedded_play_url(game)
                 play_mode = "embedded"
             elif game.external_url:
                 play_url = game.external_url
                 play_mode = "external"
 
+        # Totales casi en tiempo real: lo guardado más lo pendiente en este proceso.
+        context["views_total"] = view_counter.current(game)
+        context["downloads_total"] = download_counter.current(game)
         context["play_url"] = play_url
         context["play_mode"] = play_mode
         context["can_play"] = play_mode in ("embedded", "external")
@@ -169,12 +349,13 @@ class GamePlayView(DetailView):
     context_object_name = "game"
 
     def get_queryset(self):
-        return Game.objects.filter(is_approved=True)
+        return Game.objects.filter(is_approved=True).select_related("current_build").defer("current_build__manifest")
 
     def get(self, request, *args, **kwargs):
         response = super().get(request, *args, **kwargs)
-        Game.objects.filter(pk=self.object.pk).update(views=F("views") + 1)
-        self.object.refresh_from_db(fields=["views"])
+        # Se escribe en lote (ver counters.py): sin UPDATE ni relectura por visita.
+        view_counter.increment(self.object.pk)
+        event_log.record(self.object.pk, GameEvent.KIND_VIEW)
         return response
 
     def post(self, request, *args, **kwargs):
@@ -193,21 +374,13 @@ class GamePlayView(DetailView):
             messages.error(request, "La calificación debe estar entre 1 y 5.")
             return redirect("web:game_play", pk=self.object.pk)
 
-        if GameRating.objects.filter(game=self.object, user=request.user).exists():
-            messages.warning(request, "Ya calificaste este juego. Solo se permite una calificación por usuario.")
+        try:
+            # Insert + UPDATE atómico de suma y cantidad (ver ratings.py).
+            submit_rating(self.object.pk, request.user, rating_value)
+        except RatingError as exc:
+            messages.warning(request, str(exc))
             return redirect("web:game_play", pk=self.object.pk)
 
-        GameRating.objects.create(game=self.object, user=request.user, value=rating_value)
-
-        votes_before = self.object.rating_votes
-        total_before = self.object.rating * votes_before
-        votes_after = votes_before + 1
-        avg_after = (total_before + Decimal(rating_value)) / Decimal(votes_after)
-        avg_after = avg_after.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP)
-        self.object.rating = avg_after
-        self.object.rating_votes = votes_after
-        self.object.save(update_fields=["rating", "rating_votes"])
-
         messages.success(request, "Gracias por calificar este juego.")
         return redirect("web:game_play", pk=self.object.pk)
 
@@ -218,13 +391,7 @@ class GamePlayView(DetailView):
         play_mode = "unavailable"
 
         if game.is_web_playable and game.web_build_path:
-            path = game.web_build_path
-            if path.startswith("http"):
-                # URL de Supabase: usar el proxy Django para corregir Content-Type
-                from django.urls import reverse
-                play_url = reverse("web:game_asset", kwargs={"pk": game.pk, "asset_path": "index.html"})
-            else:
-                play_url = f"{settings.MEDIA_URL}{path}"
+            play_url = _embedded_play_url(game)
             play_mode = "embedded"
         elif game.external_url:
             play_url = game.external_url
@@ -244,8 +411,14 @@ class GamePlayView(DetailView):
 class GameDownloadView(LoginRequiredMixin, View):
     """
     Descarga del archivo ZIP del juego como archivo.zip.
+
+    Tras validar permisos, con Supabase se redirige al navegador a la URL
+    pública o a una URL firmada de corta duración (GAME_DOWNLOAD_MODE), de
+    modo que ningún worker de Django transfiere el ZIP. Las descargas se
+    cuentan en lote (ver counters.py).
     """
     login_url = "login:login"
+    download_name = "archivo.zip"
 
     def get_queryset(self, request):
         return Game.objects.filter(Q(is_approved=True) | Q(uploaded_by=request.user)).distinct()
@@ -259,12 +432,36 @@ class GameDownloadView(LoginRequiredMixin, View):
             raise Http404("Este juego no tiene archivo descargable.")
 
         try:
-            file_handle = game.game_file.open("rb")
-        except FileNotFoundError:
-            raise Http404("El archivo no está disponible en el servidor.")
+            local_path = game.game_file.path
+        except NotImplementedError:
+            local_path = None  # Supabase: el archivo no está en el disco del servidor.
+
+        mode = getattr(settings, "GAME_DOWNLOAD_MODE", "public")
+        if local_path:
+            # Django solo valida permisos; los bytes los envía Nginx o el kernel.
+            response = sendfile_response(request, local_path, "application/zip", attachment=self.download_name)
+        elif mode in ("public", "presigned"):
+            response = HttpResponseRedirect(self._redirect_url(game, mode))
+            # Cada clic debe volver a pasar por aquí para contarse.
+            response["Cache-Control"] = "private, no-store"
+        else:
+            try:
+                file_handle = game.game_file.open("rb")
+            except FileNotFoundError:
+                raise Http404("El archivo no está disponible en el servidor.")
+            response = FileResponse(file_handle, as_attachment=True, filename=self.download_name)
 
-        Game.objects.filter(pk=game.pk).update(downloads=F("downloads") + 1)
-        return FileResponse(file_handle, as_attachment=True, filename="archivo.zip")
+        download_counter.increment(game.pk)
+        event_log.record(game.pk, GameEvent.KIND_DOWNLOAD)
+        return response
+
+    def _redirect_url(self, game, mode):
+        storage = game.game_file.storage
+        if mode == "presigned" and hasattr(storage, "presigned_url"):
+            ttl = getattr(settings, "GAME_DOWNLOAD_URL_TTL", 300)
+            return storage.presigned_url(game.game_file.name, ttl, filename=self.download_name)
+        # Supabase agrega Content-Disposition: attachment con ?download=<nombre>.
+        return f"{game.game_file.url}?{urlencode({'download': self.download_name})}"
 
 
 class GameAssetProxyView(View):
@@ -276,55 +473,165 @@ class GameAssetProxyView(View):
     para todos los archivos, rompiendo el renderizado de HTML/JS/CSS en iframes.
     Este proxy corrige ese problema inyectando el header correcto desde Django.
 
-    URL: /juegos/<pk>/asset/<path:asset_path>
+    Con almacenamiento local sirve los blobs del disco sin copiarlos en
+    Python (ver sendfile.py). En ambos casos solo entrega juegos aprobados,
+    salvo a su autor o al staff.
+
+    URLs:
+    - /juegos/<pk>/asset/<path:asset_path>: build publicado (o builds antiguos).
+    - /juegos/<pk>/build/<build_id>/<path:asset_path>: una versión concreta del
+      manifiesto, para que el cambio de versión no mezcle archivos.
     """
 
-    MIME_MAP = {
-        ".html": "text/html; charset=utf-8",
-        ".htm":  "text/html; charset=utf-8",
-        ".js":   "application/javascript",
-        ".css":  "text/css",
-        ".wasm": "application/wasm",
-        ".json": "application/json",
-        ".png":  "image/png",
-        ".jpg":  "image/jpeg",
-        ".jpeg": "image/jpeg",
-        ".gif":  "image/gif",
-        ".svg":  "image/svg+xml",
-        ".ico":  "image/x-icon",
-        ".mp3":  "audio/mpeg",
-        ".ogg":  "audio/ogg",
-        ".wav":  "audio/wav",
-        ".mp4":  "video/mp4",
-    }
-
-    def get(self, request, pk, asset_path):
-        import requests as req
-        import mimetypes
-        from pathlib import PurePosixPath
-
-        game = Game.objects.filter(pk=pk).first()
+    def get(self, request, pk, asset_path, build_id=None):
+        import hashlib
+
+        game = (
+            Game.objects.filter(pk=pk)
+            .select_related("current_build")
+            .defer("current_build__manifest")
+            .first()
+        )
         if not game or not game.web_build_path:
             raise Http404("Juego no encontrado")
+        user = request.user
+        if not game.is_approved and not (user.is_authenticated and (user.pk == game.uploaded_by_id or user.is_staff)):
+            raise Http404("Juego no encontrado")
 
-        # Construir la URL base del build: quitar el nombre del archivo de web_build_path
-        # web_build_path = https://.../object/public/juegos/games/builds/14/snake/index.html
-        build_url = game.web_build_path
-        base_url = build_url.rsplit("/", 1)[0]  # Quitar 'index.html'
-        asset_url = f"{base_url}/{asset_path}"
+        build = game.current_build
+        if build_id is not None and build_id != game.current_build_id:
+            # Versión anterior que algún jugador todavía tiene cargada.
+            build = GameBuild.objects.filter(pk=build_id, game=game).only("pk", "created_at").first()
+            if build is None:
+                raise Http404("Versión del build no disponible")
+
+        encoding = ""
+        decode = ""
+        vary = False
+        local_file = None
+        if build:
+            # Build con manifiesto: tipo, codificación y blob ya se calcularon al
+            # procesar el ZIP. Lo que no está en el manifiesto no se pide a Supabase.
+            entry = lookup_asset(build.pk, asset_path)
+            if entry is None:
+                raise Http404(f"Asset no encontrado: {asset_path}")
+            accept_encoding = request.headers.get("Accept-Encoding")
+            storage_path = entry.storage_path
+            cache_key = entry.sha256
+            encoding = entry.encoding
+            if entry.variants:
+                # Variante precomprimida (.br/.gz) según lo que acepte el cliente.
+                vary = True
+                variant = negotiate_encoding(accept_encoding, entry.variants)
+                if variant:
+                    storage_path = variant_path(storage_path, variant)
+                    cache_key = f"{entry.sha256}-{variant}"
+                    encoding = variant
+            elif encoding and encoding not in accepted_encodings(accept_encoding) and can_decode(encoding):
+                # El juego trae el archivo comprimido pero el cliente no acepta
+                # esa codificación: se descomprime al vuelo.
+                vary = True
+                decode, encoding = encoding, ""
+            asset_url = _supabase_public_url(storage_path)
+            if not _is_s3_storage():
+                local_file = Path(settings.MEDIA_ROOT) / storage_path
+            etag = f'"{cache_key}-identity"' if decode else f'"{cache_key}"'
+            last_modified = build.created_at
+            content_type = entry.content_type
+        else:
+            # Builds antiguos: quitar el nombre del archivo de web_build_path
+            # web_build_path = https://.../object/public/juegos/games/builds/14/snake/index.html
+            build_url = game.web_build_path
+            base_url = build_url.rsplit("/", 1)[0]  # Quitar 'index.html'
+            asset_url = f"{base_url}/{asset_path}"
+            # Sin hash de contenido: la clave cambia cada vez que se edita el juego.
+            version = int(game.updated_at.timestamp())
+            cache_key = hashlib.sha256(f"{game.pk}:{version}:{asset_path}".encode()).hexdigest()
+            etag = f'"{cache_key[:32]}"'
+            last_modified = game.updated_at
+            # Determinar Content-Type por extensión (ignoramos lo que manda Supabase)
+            content_type = content_type_for(asset_path)
+
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+        if response is None:
+            if local_file is not None:
+                response = self._serve_local(request, local_file, content_type, etag, decode, asset_path)
+            elif decode:
+                response = self._serve_decoded(cache_key, asset_url, content_type, decode, asset_path)
+            else:
+                response = self._serve(request, cache_key, asset_url, content_type, etag, asset_path)
+
+        response["ETag"] = etag
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if vary:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+        response["Accept-Ranges"] = "none" if decode else "bytes"
+        if not game.is_approved:
+            # Vista previa del autor: que ningún caché compartido la guarde.
+            response["Cache-Control"] = "private, max-age=60"
+        elif build_id is not None:
+            # URL versionada: su contenido no cambia nunca.
+            response["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response["Cache-Control"] = "public, max-age=60"
+        return response
 
+    def _serve_local(self, request, path, content_type, etag, decode, asset_path):
+        """Build en almacenamiento local: entrega el blob con sendfile / X-Accel-Redirect."""
+        if decode:
+            if not path.is_file():
+                raise Http404("El archivo no está disponible en el servidor.")
+            chunks = read_span(path.open("rb"), path.stat().st_size)
+            return StreamingHttpResponse(decode_stream(chunks, decode), content_type=content_type)
+        # El blob se llama por su hash: el navegador ve el nombre del asset pedido.
+        return sendfile_response(request, path, content_type, etag, filename=posixpath.basename(asset_path))
+
+    def _serve(self, request, cache_key, asset_url, content_type, etag, asset_path):
+        """Responde desde la caché en disco o hace streaming desde Supabase llenándola."""
+        cache = get_asset_cache()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return asset_file_response(request, cached, content_type, etag, filename=posixpath.basename(asset_path))
+
+        range_header = request.headers.get("Range")
+        headers = {"Range": range_header} if range_header else {}
         try:
-            resp = req.get(asset_url, timeout=15)
-            resp.raise_for_status()
+            resp = upstream_session().get(asset_url, headers=headers, stream=True, timeout=15)
         except Exception:
             raise Http404(f"Asset no encontrado: {asset_path}")
+        if resp.status_code not in (200, 206):
+            resp.close()
+            if resp.status_code == 416:
+                return HttpResponse(status=416)
+            raise Http404(f"Asset no encontrado: {asset_path}")
 
-        # Determinar Content-Type por extensión (ignoramos lo que manda Supabase)
-        ext = PurePosixPath(asset_path).suffix.lower()
-        content_type = self.MIME_MAP.get(ext)
-        if not content_type:
-            content_type, _ = mimetypes.guess_type(asset_path)
-        if not content_type:
-            content_type = "application/octet-stream"
+        body = resp.iter_content(chunk_size=64 * 1024)
+        length = resp.headers.get("Content-Length")
+        if resp.status_code == 200 and cache.accepts(int(length) if length else None):
+            body = cache.fill(cache_key, body)
 
-        return HttpResponse(resp.content, content_type=content_type)
+        response = StreamingHttpResponse(body, status=resp.status_code, content_type=content_type)
+        if length:
+            response["Content-Length"] = length
+        if resp.status_code == 206 and "Content-Range" in resp.headers:
+            response["Content-Range"] = resp.headers["Content-Range"]
+        return response
+
+    def _serve_decoded(self, cache_key, asset_url, content_type, encoding, asset_path):
+        """Sirve descomprimido un archivo que el juego trae ya comprimido (sin rangos)."""
+        cached = get_asset_cache().get(cache_key)
+        if cached is not None:
+            fileobj = cached.open("rb")
+            chunks = read_span(fileobj, cached.stat().st_size)
+        else:
+            try:
+                resp = upstream_session().get(asset_url, stream=True, timeout=15)
+            except Exception:
+                raise Http404(f"Asset no encontrado: {asset_path}")
+            if resp.status_code != 200:
+                resp.close()
+                raise Http404(f"Asset no encontrado: {asset_path}")
+            chunks = resp.iter_content(chunk_size=64 * 1024)
+        return StreamingHttpResponse(decode_stream(chunks, encoding), content_type=content_type)
@@ -3,6 +3,9 @@ ASGI config for mi_proyecto project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Las peticiones HTTP van a Django; las conexiones WebSocket en
+CHAT_WEBSOCKET_PATH van al chat en tiempo real (apps/chat/consumers.py).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -13,4 +16,21 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mi_proyecto.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importar después de inicializar Django (usa modelos y settings).
+from django.conf import settings  # noqa: E402
+
+from apps.chat.consumers import ChatSocket  # noqa: E402
+
+chat_socket = ChatSocket()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        if scope['path'] == getattr(settings, 'CHAT_WEBSOCKET_PATH', '/ws/chat/'):
+            return await chat_socket(scope, receive, send)
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4004})
+        return
+    return await django_application(scope, receive, send)
@@ -65,6 +65,8 @@ AUTHENTICATION_BACKENDS = [
 # LOGIN_REDIRECT_URL and LOGOUT_REDIRECT_URL moved to the bottom
 
 MIDDLEWARE = [
+    # Primero, para contar también las consultas de sesión y autenticación; inactivo sin QUERY_PROFILER.
+    'apps.web.middleware.QueryProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -214,12 +216,41 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Cache (memoria local — sin dependencias externas)
 # Para producción, considera django-redis para caché compartida entre workers.
-CACHES = {
-    'default': {
+# Caché compartida por todos los procesos (ver apps/web/caching.py). CACHE_BACKEND:
+# - database (por defecto): tabla sudaplay_cache, la crea la migración web 0015
+# - file: archivos en CACHE_FILE_PATH (todos los procesos en la misma máquina)
+# - redis: CACHE_REDIS_URL (requiere el paquete redis)
+# - locmem: por proceso; solo para desarrollo con un único proceso
+CACHE_BACKEND = config('CACHE_BACKEND', default='database')
+_CACHE_BACKENDS = {
+    'database': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'sudaplay_cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_FILE_PATH', default=str(BASE_DIR / 'cache' / 'django')),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_REDIS_URL', default='redis://localhost:6379/1'),
+    },
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'sudaplay-cache',
+    },
+}
+CACHES = {
+    'default': {
+        **_CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'sudaplay',
     }
 }
+# Cachés por usuario (apps/login/caches.py); las señales las invalidan al cambiar los datos
+NAVBAR_PROFILE_CACHE_TTL = 6 * 3600   # segundos
+NOTIFICATIONS_CACHE_TTL = 3600
 
 # Email Configuration
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
@@ -250,6 +281,126 @@ AWS_S3_SIGNATURE_VERSION = 's3v4'       # Firma requerida por Supabase
 AWS_S3_FILE_OVERWRITE = True            # Evita el HeadObject check (que falla con RLS de Supabase)
 AWS_DEFAULT_ACL = None                  # Supabase usa RLS — dejar en None
 AWS_QUERYSTRING_AUTH = False            # URLs públicas directas en vez de presigned
+AWS_S3_MAX_MEMORY_SIZE = 8 * 1024 * 1024  # Al leer un objeto >8MB se vuelca a disco en vez de RAM
+
+# Subida paralela de builds web a Supabase Storage (apps/web/uploads.py)
+GAME_BUILD_UPLOAD_WORKERS = config('GAME_BUILD_UPLOAD_WORKERS', default=8, cast=int)
+GAME_BUILD_UPLOAD_RETRIES = config('GAME_BUILD_UPLOAD_RETRIES', default=3, cast=int)
+GAME_BUILD_UPLOAD_BACKOFF = config('GAME_BUILD_UPLOAD_BACKOFF', default=0.5, cast=float)  # segundos
+
+# Cola de procesamiento de builds en la base de datos (apps/web/jobs.py).
+# Consumidor: python manage.py process_build_jobs
+BUILD_QUEUE_WORKERS = config('BUILD_QUEUE_WORKERS', default=2, cast=int)
+BUILD_JOB_MAX_ATTEMPTS = 3
+BUILD_JOB_RETRY_DELAY = 30      # segundos; se duplica en cada reintento
+BUILD_JOB_STALE_AFTER = 300     # segundos sin latido para considerar un trabajo interrumpido
+GAME_BUILD_KEEP_PREVIOUS = 1    # versiones anteriores de cada build que se siguen sirviendo
+GAME_BUILD_DRAFT_MAX_AGE = 6 * 3600  # segundos; un build sin publicar más viejo se da por abandonado
+
+# Caché en disco del proxy de assets de juegos (apps/web/asset_cache.py)
+GAME_ASSET_CACHE_DIR = config('GAME_ASSET_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'game_assets'))
+GAME_ASSET_CACHE_MAX_BYTES = config('GAME_ASSET_CACHE_MAX_BYTES', default=2 * 1024 ** 3, cast=int)
+
+# Variantes gzip/brotli de los assets de los builds (apps/web/precompress.py)
+GAME_BUILD_PRECOMPRESS = config('GAME_BUILD_PRECOMPRESS', default=True, cast=bool)
+GAME_BUILD_PRECOMPRESS_MIN_SIZE = 1024  # bytes; los archivos más chicos no ganan nada
+GAME_BUILD_BROTLI_QUALITY = 9           # 11 comprime ~5% más pero tarda varias veces más
+
+# Entrega de builds y ZIPs locales sin pasar los bytes por Python (apps/web/sendfile.py):
+# '' (FileResponse / os.sendfile vía Gunicorn), 'nginx' (X-Accel-Redirect) o 'xsendfile'.
+GAME_FILE_SENDFILE_MODE = config('GAME_FILE_SENDFILE_MODE', default='')
+GAME_FILE_SENDFILE_URL = config('GAME_FILE_SENDFILE_URL', default='/protected-media/')
+
+# Descargas de ZIPs en Supabase: 'public' (redirige a la URL pública del bucket),
+# 'presigned' (URL firmada de GAME_DOWNLOAD_URL_TTL segundos) o 'proxy' (pasa por Django).
+GAME_DOWNLOAD_MODE = config('GAME_DOWNLOAD_MODE', default='public')
+GAME_DOWNLOAD_URL_TTL = 300
+
+# Contadores de vistas y descargas y eventos de juegos agrupados (apps/web/counters.py, analytics.py)
+GAME_COUNTER_FLUSH_INTERVAL = 10   # segundos
+GAME_COUNTER_MAX_PENDING = 100     # incrementos acumulados que fuerzan la escritura
+
+# Catálogo de la página de inicio (apps/web/catalog.py)
+HOME_CATALOG_PAGE_SIZE = 24
+HOME_CATALOG_CACHE_TTL = 300       # segundos; descargas y calificaciones se refrescan al vencer
+
+# Clasificaciones precalculadas (apps/web/rankings.py); las recalcula `rebuild_rankings`
+RANKING_SIZE = 100                       # posiciones guardadas por clasificación y género
+RANKING_TRENDING_HALF_LIFE = 24 * 3600   # segundos en que la actividad pierde la mitad de su peso
+RANKING_MIN_VOTES = 5                    # votos "previos" con el promedio del catálogo (bayesiano)
+RANKING_CACHE_TTL = 900                  # segundos; las listas de la portada
+HOME_RANKING_SIZE = 5
+
+# Perfilado de consultas SQL por request (apps/web/middleware.py), para desarrollo y tests:
+# Server-Timing, log en "apps.web.queries" y presupuestos por vista (QUERY_PROFILER_STRICT
+# lanza QueryBudgetExceeded al pasarse, así los tests fallan).
+QUERY_PROFILER = config('QUERY_PROFILER', default=False, cast=bool)
+QUERY_PROFILER_STRICT = config('QUERY_PROFILER_STRICT', default=False, cast=bool)
+QUERY_PROFILER_REPEAT_THRESHOLD = 5  # misma huella de SQL en un request: posible N+1
+QUERY_BUDGET_DEFAULT = None
+# Máximo de consultas por vista, incluidas sesión y usuario (medido con caché fría).
+QUERY_BUDGETS = {
+    'web:home': 10,
+    'web:catalog_page': 2,
+    'web:game_search': 2,
+    'web:game_rankings': 2,
+    'web:game_detail': 5,
+    'web:game_play': 5,
+    'web:my_games': 6,
+    'login:profile': 8,
+    'login:player_profile': 6,
+    'login:notifications_api': 5,
+    'login:search_players': 5,
+    'chat:inbox': 6,
+}
+
+# Eventos y estadísticas por día (apps/web/analytics.py); los resume `rollup_game_events`
+GAME_EVENT_RETENTION_DAYS = 90     # días que se guardan los eventos crudos
+ANALYTICS_DASHBOARD_DAYS = 30      # días de las series de "Mis juegos" y del admin
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'apps.web.queries': {
+            'handlers': ['console'],
+            'level': 'INFO' if QUERY_PROFILER else 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Variantes de portada (apps/web/covers.py): anchos en píxeles, formatos en orden de
+# preferencia (los que Pillow no soporte se omiten) y el `sizes` de las tarjetas.
+GAME_COVER_WIDTHS = (240, 480, 720)
+GAME_COVER_FORMATS = ('avif', 'webp')
+GAME_COVER_SIZES = '(max-width: 600px) 50vw, 260px'
+
+# Búsqueda de juegos (apps/web/search.py); la configuración la crea la migración web 0013
+GAME_SEARCH_CONFIG = 'sudaplay_es'
+
+# Búsqueda de jugadores (apps/login/players.py); índices en la migración login 0007
+PLAYER_SEARCH_PAGE_SIZE = 20
+PLAYER_SEARCH_MAX_PAGE = 10
+PLAYER_AUTOCOMPLETE_LIMIT = 8
+
+# Miniaturas de avatar (apps/login/avatars.py): tamaños en píxeles (la mayor sirve para
+# pantallas 2x) y formatos en orden de preferencia; los que Pillow no soporte se omiten.
+AVATAR_THUMBNAIL_SIZES = (64, 128)
+AVATAR_DERIVATIVE_FORMATS = ('avif', 'webp', 'png')
+
+# Chat en tiempo real (apps/chat/realtime.py). La capa en memoria sirve con un solo
+# proceso (ASGI o WSGI); si varios procesos atienden requests hay que usar la de Redis
+# (requiere el paquete redis): con la capa en memoria los eventos de un proceso no
+# llegan a los WebSocket ni al long-polling de los demás, que solo ven los mensajes
+# nuevos al volver a consultar la base de datos.
+CHAT_WEBSOCKET_PATH = '/ws/chat/'
+CHAT_CHANNEL_LAYER = config('CHAT_CHANNEL_LAYER', default='apps.chat.realtime.InMemoryChannelLayer')
+CHAT_REDIS_URL = config('CHAT_REDIS_URL', default='redis://localhost:6379/0')
+CHAT_LONG_POLL_TIMEOUT = config('CHAT_LONG_POLL_TIMEOUT', default=2, cast=int)  # segundos; ocupa un worker WSGI
 
 # Almacenamiento de media en Supabase S3 (portadas y archivos de juegos)
 STORAGES = {